@@ -0,0 +1,109 @@
+"""
+Frozen copy of the generic type checking dispatch of the original ``type_checker`` module (and of the dictionary
+branch of the original ``DTOMeta.__instancecheck__`` for nested DTOs), kept as the baseline of
+``bench_type_checker``. Typing introspection goes through the current helpers so that it runs on every supported
+Python version, and the key/value swap of the original ``Dict`` check is fixed so that both sides accept the same
+values.
+"""
+import datetime
+from typing import Dict, List
+
+import pydto
+import type_checker
+
+_BUILTIN_TYPES = [str, float, int, bool, complex, dict, list, datetime.datetime]
+
+
+def check_type(type_, value):
+    if type_checker._is_union(type_):
+        return _check_type_Union(type_, value)
+
+    elif type_ in _BUILTIN_TYPES:
+        if not isinstance(value, type_):
+            raise TypeError
+        return type_
+
+    elif isinstance(type_, pydto.DTOMeta):
+        if not _dto_instance_check(type_, value):
+            raise TypeError
+        return type_
+
+    elif type_checker._is_generic(type_, Dict, dict):
+        return _check_type_Dict(type_, value)
+
+    elif type_checker._is_generic(type_, List, list):
+        return _check_type_List(type_, value)
+
+    elif type_ is None.__class__:
+        if value is not None:
+            raise TypeError
+        return type_
+
+    else:
+        raise NotImplementedError("Type checker for type {} is not implemented".format(type_))
+
+
+def _dto_instance_check(dto_class, value):
+    if type(value) == dto_class:
+        return True
+    if isinstance(value, dict):
+        if not dto_class._partial:
+            if len(value.keys()) != len(dto_class._dto_descriptors.keys()):
+                return False
+            for k, v in value.items():
+                try:
+                    check_type(dto_class._dto_descriptors[k][0], v)
+                except (TypeError, KeyError):
+                    return False
+        else:
+            for k in dto_class._dto_descriptors.keys():
+                try:
+                    check_type(dto_class._dto_descriptors[k][0], value[k])
+                except (TypeError, KeyError):
+                    return False
+        return True
+    return False
+
+
+def _check_type_Union(type_, value):
+    matched_types = []
+    for arg in type_checker._union_args(type_):
+        try:
+            arg = check_type(arg, value)
+        except TypeError:
+            pass
+        else:
+            matched_types.append(arg)
+
+    if not matched_types:
+        raise TypeError
+
+    assert len(matched_types) == 1, "Value {} matches multiple subtype of type {}".format(value, type_)
+
+    return check_type(matched_types[0], value)
+
+
+def _check_type_Dict(type_, value):
+    if not isinstance(value, dict):
+        raise TypeError
+
+    key_value_types = type_checker._generic_args(type_)
+    if key_value_types is not None:
+        key_type, value_type = key_value_types
+        for k, v in value.items():
+            check_type(key_type, k)
+            check_type(value_type, v)
+
+    return type_
+
+
+def _check_type_List(type_, value):
+    if not isinstance(value, list):
+        raise TypeError
+
+    value_type = type_checker._generic_args(type_)
+    if value_type is not None:
+        for v in value:
+            check_type(value_type[0], v)
+
+    return type_
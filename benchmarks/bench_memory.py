@@ -0,0 +1,40 @@
+"""
+Measures with ``tracemalloc`` the memory held per DTO instance of the README ``UserDTO`` example. Field values are
+shared between the instances so that only the DTO objects themselves are accounted for.
+
+Run from the repository root: ``python -m benchmarks.bench_memory``
+"""
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.schemas import UserDTO, user_dict
+
+NUMBER = 100000
+
+
+def _allocated(factory):
+    tracemalloc.start()
+    objects = [factory() for _ in range(NUMBER)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / NUMBER
+
+
+def main():
+    values = user_dict()
+    values["birth_date"] = datetime(1974, 1, 20)
+    values = [values[field] for field in UserDTO._dto_descriptors]
+
+    per_dto = _allocated(lambda: UserDTO._from_validated(values))
+    # The previous storage layout allocated two dicts per instance on top of the object itself
+    per_dicts = _allocated(lambda: (dict.fromkeys(UserDTO._dto_descriptors, True),
+                                    dict(zip(UserDTO._dto_descriptors, values))))
+
+    print("{} fields, {} instances".format(len(UserDTO._dto_descriptors), NUMBER))
+    print("slot-backed DTO:             {:>8.1f} bytes per instance".format(per_dto))
+    print("per-instance dicts (before): {:>8.1f} bytes per instance (excluding the object itself)".format(per_dicts))
+
+
+if __name__ == '__main__':
+    main()
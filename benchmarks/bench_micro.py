@@ -0,0 +1,65 @@
+"""
+Micro-benchmarks of reading a field, setting a mutable field and constructing a DTO on the README ``UserDTO``
+example. Results can be saved and compared with a previous run to track regressions.
+
+Run from the repository root: ``python -m benchmarks.bench_micro [--save results.json] [--compare results.json]``
+"""
+import argparse
+import json
+import timeit
+
+from benchmarks.schemas import UserDTO, user_dict
+
+REPEAT = 5
+
+
+def _best_time(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=REPEAT)) / number
+
+
+def run():
+    dto_dict = user_dict()
+    user_dto = UserDTO.from_dict(dto_dict)
+
+    return {
+        "get": _best_time(lambda: user_dto.first_name, 1000000),
+        "set": _best_time(lambda: setattr(user_dto, "email", "dwight@schrutefarms.com"), 200000),
+        "construct": _best_time(lambda: UserDTO.from_dict(dto_dict), 20000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--save", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with a previously saved JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    results = run()
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for name, seconds in results.items():
+        line = "{:<10} {:>10.3f} us".format(name, seconds * 1e6)
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += " {:>+8.1%}".format(change)
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        raise SystemExit("Regressions: {}".format(", ".join(regressions)))
+
+
+if __name__ == '__main__':
+    main()
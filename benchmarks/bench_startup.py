@@ -0,0 +1,73 @@
+"""
+Startup benchmark of the code cache (``dto_cache``): times the import of a generated module of a few hundred DTO
+classes in fresh processes, without the cache, with an empty cache (filled by the import) and with a filled cache.
+
+Run from the repository root: ``python -m benchmarks.bench_startup [--classes 300] [--runs 5]``
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_FIELD_TYPES = ["int", "str", "Optional[float]", "List[int]", "Dict[str, int]", "bool", "datetime",
+                "Optional[List[str]]"]
+
+_IMPORT_TIME = "import time; start = time.perf_counter(); import generated_dtos; print(time.perf_counter() - start)"
+
+
+def _module_source(classes: int) -> str:
+    lines = ["from datetime import datetime", "from typing import Dict, List, Optional", "from pydto import DTO", ""]
+    for i in range(classes):
+        lines.append("")
+        lines.append("class GeneratedDTO{}(DTO):".format(i))
+        # Schemas differ by their number of fields
+        for j in range(8 + i % 8):
+            lines.append("    field_{} = {},".format(j, _FIELD_TYPES[(i + j) % len(_FIELD_TYPES)]))
+        if i:
+            lines.append("    nested = Optional[GeneratedDTO{}],".format(i - 1))
+    return "\n".join(lines) + "\n"
+
+
+def _import_time(directory: str, cache_directory: str = None) -> float:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.getcwd(), directory]))
+    env.pop("PYDTO_CACHE_DIR", None)
+    if cache_directory is not None:
+        env["PYDTO_CACHE_DIR"] = cache_directory
+    output = subprocess.check_output([sys.executable, "-c", _IMPORT_TIME], env=env)
+    return float(output)
+
+
+def run(classes: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "generated_dtos.py"), "w") as f:
+            f.write(_module_source(classes))
+        cache_directory = os.path.join(directory, "cache")
+        # Compiles the .pyc of the generated module, so that every run below imports it the same way
+        _import_time(directory)
+
+        results = {"no cache": [], "empty cache": [], "filled cache": []}
+        for _ in range(runs):
+            results["no cache"].append(_import_time(directory))
+            if os.path.isdir(cache_directory):
+                for name in os.listdir(cache_directory):
+                    os.unlink(os.path.join(cache_directory, name))
+            results["empty cache"].append(_import_time(directory, cache_directory))
+            results["filled cache"].append(_import_time(directory, cache_directory))
+    return {name: statistics.median(times) for name, times in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--classes", type=int, default=300, help="number of generated DTO classes (default: 300)")
+    parser.add_argument("--runs", type=int, default=5, help="number of imports of each kind (default: 5)")
+    args = parser.parse_args()
+
+    results = run(args.classes, args.runs)
+    for name, seconds in results.items():
+        print("{:<14} {:>8.1f} ms {:>8.2f}x".format(name, seconds * 1e3, results["no cache"] / seconds))
+
+
+if __name__ == "__main__":
+    main()
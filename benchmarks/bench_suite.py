@@ -0,0 +1,177 @@
+"""
+Benchmark suite of the main operations (construction, field access, validation, serialization) on realistic
+schemas: the README ``UserDTO``, a flat wide DTO, deeply nested DTOs, large ``List`` / ``Dict`` fields, ``Optional``
+and ``Union`` fields and a partial DTO (see ``schemas``).
+
+Each benchmark is timed over samples of a fixed number of calls, giving the throughput (calls per second, from the
+median sample), and its calls are then timed one by one for the 50th, 90th and 99th percentiles of their latency
+(which include the overhead of the clock, about 0.05 us). The peak memory
+allocated (``tracemalloc``) while building a batch of DTOs is measured per schema. Results can be saved and compared
+with a previous run, e.g. of the previous release, to evaluate an upgrade.
+
+Run from the repository root:
+``python -m benchmarks.bench_suite [--quick] [--filter wide] [--save results.json] [--compare results.json]``
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from benchmarks import schemas
+
+# Schema name: (DTO class, dictionary factory, a field to read)
+SCHEMAS = {
+    "user": (schemas.UserDTO, schemas.user_dict, "first_name"),
+    "wide": (schemas.WideDTO, schemas.wide_dict, "str_7"),
+    "nested": (schemas.NestedDTO, schemas.nested_dict, "child"),
+    "collections": (schemas.CollectionsDTO, schemas.collections_dict, "ids"),
+    "optional": (schemas.OptionalDTO, schemas.optional_dict, "address"),
+    "partial": (schemas.PartialDTO, schemas.partial_dict, "email"),
+}
+
+# Maximum number of dictionaries of the batches of from_dicts and of the memory measure
+BATCH_SIZE = 1000
+
+
+def _calls(dto_class, dto_dict) -> int:
+    """Number of calls per sample, so that a sample of constructions takes about 1 ms."""
+    start = time.perf_counter()
+    dto_class.from_dict(dto_dict)
+    return max(1, min(10000, int(1e-3 / max(time.perf_counter() - start, 1e-7))))
+
+
+def _operations(dto_class, factory, field, calls: int):
+    """
+    Returns the benchmarked operations of a schema, as (name, function, number of calls per sample, number of
+    DTOs built per call).
+    """
+    dto_dict = factory()
+    dto = dto_class.from_dict(dto_dict)
+    json_string = json.dumps(dto_dict)
+    batch = [factory() for _ in range(min(BATCH_SIZE, 10 * calls))]
+
+    return [
+        ("from_dict", lambda: dto_class.from_dict(dto_dict), calls, 1),
+        ("get", lambda: getattr(dto, field), 10000, 1),
+        ("validate", lambda: dto_class._dto_validate(dto_dict), calls, 1),
+        ("try_from_dict", lambda: dto_class.try_from_dict(dto_dict), calls, 1),
+        ("to_dict", lambda: dto.to_dict(), calls, 1),
+        ("to_json", lambda: dto.to_json(), calls, 1),
+        ("from_json", lambda: dto_class.from_json(json_string), calls, 1),
+        # Per row of the batch
+        ("from_dicts/row", lambda: dto_class.from_dicts(batch), 1, len(batch)),
+    ]
+
+
+def _time(function, calls: int, samples: int) -> list:
+    """Returns the per-call time of each sample, in seconds."""
+    times = []
+    clock = time.perf_counter
+    for _ in range(samples):
+        start = clock()
+        for _ in range(calls):
+            function()
+        times.append((clock() - start) / calls)
+    return times
+
+
+def _latencies(function, count: int) -> list:
+    """Returns the sorted durations of ``count`` calls timed one by one, in seconds."""
+    times = []
+    clock = time.perf_counter
+    for _ in range(count):
+        start = clock()
+        function()
+        times.append(clock() - start)
+    times.sort()
+    return times
+
+
+def _percentile(sorted_times: list, percent: float) -> float:
+    return sorted_times[min(len(sorted_times) - 1, int(len(sorted_times) * percent / 100))]
+
+
+def _peak_memory(dto_class, factory, count: int) -> int:
+    """Peak memory allocated while building ``count`` DTOs out of their dictionaries, per DTO."""
+    dicts = [factory() for _ in range(count)]
+    tracemalloc.start()
+    dtos = [dto_class.from_dict(dto_dict) for dto_dict in dicts]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dtos
+    return peak // count
+
+
+def run(samples: int, name_filter: str = None) -> dict:
+    results = {}
+    for schema, (dto_class, factory, field) in SCHEMAS.items():
+        if name_filter and name_filter not in schema:
+            continue
+        calls = _calls(dto_class, factory())
+        for operation, function, operation_calls, dtos in _operations(dto_class, factory, field, calls):
+            median = statistics.median(_time(function, operation_calls, samples)) / dtos
+            latencies = [t / dtos for t in _latencies(function, max(20, min(operation_calls * samples // 10, 10000)))]
+            results["{}.{}".format(schema, operation)] = {
+                "throughput": 1 / median, "p50": _percentile(latencies, 50), "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99)}
+        results["{}.memory".format(schema)] = {"peak_bytes": _peak_memory(dto_class, factory,
+                                                                          min(BATCH_SIZE, 10 * calls))}
+    return results
+
+
+def _report(results: dict, baseline: dict, threshold: float) -> list:
+    """Prints the results and returns the names of the benchmarks slower than the baseline by more than threshold."""
+    regressions = []
+    print("{:<28} {:>14} {:>10} {:>10} {:>10} {:>9}".format("benchmark", "calls/s", "p50 (us)", "p90 (us)",
+                                                             "p99 (us)", "change"))
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if "peak_bytes" in result:
+            line = "{:<28} {:>14} {:>32}".format(name, "", "{} bytes/DTO peak".format(result["peak_bytes"]))
+            if previous:
+                change = result["peak_bytes"] / previous["peak_bytes"] - 1
+                line += " {:>+8.1%}".format(change)
+        else:
+            line = "{:<28} {:>14,.0f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                name, result["throughput"], result["p50"] * 1e6, result["p90"] * 1e6, result["p99"] * 1e6)
+            if previous:
+                # Slowdown of the median latency
+                change = result["p50"] / previous["p50"] - 1
+                line += " {:>+8.1%}".format(change)
+        if previous and change > threshold:
+            regressions.append(name)
+            line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer samples, for a rough check")
+    parser.add_argument("--samples", type=int, default=30, help="samples per benchmark (default: 30)")
+    parser.add_argument("--filter", help="only run the schemas whose name contains this string")
+    parser.add_argument("--save", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with a previously saved JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    results = run(5 if args.quick else args.samples, args.filter)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = _report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        raise SystemExit("Regressions: {}".format(", ".join(regressions)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Compares the generic type checking dispatch of the original code (frozen in ``baseline_checker``) with the checkers
+compiled by ``DTOMeta`` for every field of the README ``UserDTO`` example.
+
+Run from the repository root: ``python -m benchmarks.bench_type_checker``
+"""
+import timeit
+from datetime import datetime
+
+from benchmarks import baseline_checker
+from benchmarks.schemas import UserDTO, user_dict
+
+NUMBER = 100000
+
+
+def main():
+    values = user_dict()
+    values["birth_date"] = datetime(1974, 1, 20)
+
+    old_total = new_total = 0.0
+    print("{:<12} {:>12} {:>12} {:>8}".format("field", "old (us)", "new (us)", "speedup"))
+    for field in UserDTO._dto_descriptors:
+        descriptor = UserDTO._dto_fields[field]
+        value = values[field]
+
+        old = min(timeit.repeat(lambda: baseline_checker.check_type(descriptor._type, value), number=NUMBER, repeat=3))
+        new = min(timeit.repeat(lambda: descriptor._checker(value), number=NUMBER, repeat=3))
+        old_total += old
+        new_total += new
+        print("{:<12} {:>12.3f} {:>12.3f} {:>7.1f}x".format(field, old / NUMBER * 1e6, new / NUMBER * 1e6, old / new))
+
+    print("{:<12} {:>12.3f} {:>12.3f} {:>7.1f}x".format("total", old_total / NUMBER * 1e6, new_total / NUMBER * 1e6,
+                                                         old_total / new_total))
+
+
+if __name__ == '__main__':
+    main()
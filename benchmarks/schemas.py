@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Union
+from datetime import datetime
+from pydto import DTO, DTOMeta
+
+
+class CarDTO(DTO, partial=True):
+    year = int, {"validator": lambda value: value > 1980}
+    license = str,
+
+
+class AddressDTO(DTO):
+    city = str,
+
+
+class UserDTO(DTO):
+    first_name = str,
+    middle_name = str,
+    last_name = str,
+    birth_date = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+    car = CarDTO,
+    address = AddressDTO,
+    email = str, {"immutable": False}
+    salary = Optional[float],
+
+
+USER_JSON = '{"salary": null, "middle_name": "kurt", "address": {"city": "scranton"}, "first_name": "dwight", ' \
+            '"email": "dshrute@schrutefarms.com", "car": {"license": "4018 JXT", "year": 1987, "color": "red"}, ' \
+            '"last_name": "schrute", "birth_date": "1974-01-20"}'
+
+
+def user_dict():
+    return {"salary": None, "middle_name": "kurt", "address": {"city": "scranton"}, "first_name": "dwight",
+            "email": "dshrute@schrutefarms.com", "car": {"license": "4018 JXT", "year": 1987, "color": "red"},
+            "last_name": "schrute", "birth_date": "1974-01-20"}
+
+
+# Schemas of the benchmark suite (bench_suite), with a factory of their dictionaries
+
+class WideDTO(DTO):
+    """Flat DTO of 60 fields of builtin types."""
+    for _i in range(15):
+        locals()["int_{}".format(_i)] = int,
+        locals()["str_{}".format(_i)] = str,
+        locals()["float_{}".format(_i)] = float,
+        locals()["bool_{}".format(_i)] = bool,
+    del _i
+
+
+def wide_dict():
+    values = {}
+    for i in range(15):
+        values.update({"int_{}".format(i): i, "str_{}".format(i): "value {}".format(i),
+                       "float_{}".format(i): i / 3, "bool_{}".format(i): bool(i % 2)})
+    return values
+
+
+class LeafDTO(DTO):
+    name = str,
+    value = int, {"validator": lambda value: value >= 0}
+
+
+NESTING_DEPTH = 8
+
+
+def _nested_class(depth):
+    # Level 0 holds a leaf, each level holds the previous one
+    child = LeafDTO if depth == 0 else _nested_class(depth - 1)
+    return DTOMeta("NestedDTO{}".format(depth), (DTO,), {"level": (int,), "child": (child,), "__module__": __name__})
+
+
+NestedDTO = _nested_class(NESTING_DEPTH - 1)
+
+
+def nested_dict():
+    dto_dict = {"name": "leaf", "value": 1}
+    for depth in range(NESTING_DEPTH):
+        dto_dict = {"level": depth, "child": dto_dict}
+    return dto_dict
+
+
+class CollectionsDTO(DTO):
+    """Large List and Dict fields."""
+    ids = List[int],
+    weights = Dict[str, float],
+    leaves = List[LeafDTO],
+
+
+def collections_dict(size=10000):
+    return {"ids": list(range(size)), "weights": {"key {}".format(i): i / 7 for i in range(size)},
+            "leaves": [{"name": "leaf {}".format(i), "value": i} for i in range(size // 100)]}
+
+
+class OptionalDTO(DTO):
+    """Optional fields and unions, half of them None."""
+    name = Optional[str],
+    age = Optional[int],
+    score = Union[int, float],
+    tags = Optional[List[str]],
+    address = Optional[AddressDTO],
+    car = Optional[CarDTO],
+
+
+def optional_dict():
+    return {"name": "dwight", "age": None, "score": 2.5, "tags": None, "address": {"city": "scranton"},
+            "car": None}
+
+
+class PartialDTO(DTO, partial=True):
+    """Partial DTO of a few fields of larger dictionaries."""
+    id = int,
+    name = str,
+    email = str, {"immutable": False}
+
+
+def partial_dict():
+    values = {"id": 1, "name": "dwight", "email": "dshrute@schrutefarms.com"}
+    values.update(("extra_{}".format(i), i) for i in range(20))
+    return values
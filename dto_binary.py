@@ -0,0 +1,645 @@
+"""
+Compact binary encoding of DTOs. The values are written positionally, in the order of the field names and with an
+encoding chosen from their declared type, so no field name or type tag goes on the wire. Every payload starts with
+a header holding a fingerprint of the schema of the DTO class (nested DTO classes included), checked when decoding.
+
+Decoded values are not validated again, they are trusted to come from DTOs of the same schema (validators are not
+part of the fingerprint).
+"""
+import datetime
+import decimal
+import dto_cache
+import hashlib
+import struct
+import pydto
+import type_checker
+import types
+import uuid
+from typing import Dict, List
+
+_MAGIC = b'PDTO'
+_HEADER_SIZE = len(_MAGIC) + 8
+
+_FLOAT = struct.Struct('<d')
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _encode_uint(value: int, out: bytearray):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_uint(data, pos: int):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_int(value: int, out: bytearray):
+    # Zigzag encoding, small negative ints stay short
+    _encode_uint(value << 1 if value >= 0 else (-value << 1) - 1, out)
+
+
+def _decode_int(data, pos: int):
+    value, pos = _decode_uint(data, pos)
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+
+
+def _encode_float(value: float, out: bytearray):
+    out += _FLOAT.pack(value)
+
+
+def _decode_float(data, pos: int):
+    return _FLOAT.unpack_from(data, pos)[0], pos + 8
+
+
+def _encode_str(value: str, out: bytearray):
+    encoded = value.encode('utf-8')
+    _encode_uint(len(encoded), out)
+    out += encoded
+
+
+def _decode_str(data, pos: int):
+    length, pos = _decode_uint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise IndexError("String out of the data")
+    return str(data[pos:end], 'utf-8'), end
+
+
+def _encode_bool(value: bool, out: bytearray):
+    out.append(1 if value else 0)
+
+
+def _decode_bool(data, pos: int):
+    return data[pos] != 0, pos + 1
+
+
+def _encode_complex(value: complex, out: bytearray):
+    out += _FLOAT.pack(value.real)
+    out += _FLOAT.pack(value.imag)
+
+
+def _decode_complex(data, pos: int):
+    return complex(_FLOAT.unpack_from(data, pos)[0], _FLOAT.unpack_from(data, pos + 8)[0]), pos + 16
+
+
+def _encode_datetime(value: datetime.datetime, out: bytearray):
+    # Microseconds of the wall time since the epoch, followed by the UTC offset of aware datetimes (their time zone
+    # is decoded as a fixed offset)
+    offset = value.utcoffset()
+    if offset is None:
+        out.append(0)
+        _encode_int((value - _EPOCH) // _MICROSECOND, out)
+    else:
+        out.append(1)
+        _encode_int((value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND, out)
+        _encode_int(offset // _MICROSECOND, out)
+
+
+def _decode_datetime(data, pos: int):
+    aware = data[pos]
+    microseconds, pos = _decode_int(data, pos + 1)
+    value = _EPOCH + datetime.timedelta(microseconds=microseconds)
+    if aware:
+        offset, pos = _decode_int(data, pos)
+        value = value.replace(tzinfo=datetime.timezone(datetime.timedelta(microseconds=offset)))
+    return value, pos
+
+
+def _encode_date(value: datetime.date, out: bytearray):
+    _encode_uint(value.toordinal(), out)
+
+
+def _decode_date(data, pos: int):
+    ordinal, pos = _decode_uint(data, pos)
+    return datetime.date.fromordinal(ordinal), pos
+
+
+def _encode_bytes(value: bytes, out: bytearray):
+    _encode_uint(len(value), out)
+    out += value
+
+
+def _decode_bytes(data, pos: int):
+    length, pos = _decode_uint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise IndexError("Bytes out of the data")
+    return bytes(data[pos:end]), end
+
+
+def _encode_decimal(value: decimal.Decimal, out: bytearray):
+    _encode_str(str(value), out)
+
+
+def _decode_decimal(data, pos: int):
+    value, pos = _decode_str(data, pos)
+    return decimal.Decimal(value), pos
+
+
+def _encode_uuid(value: uuid.UUID, out: bytearray):
+    out += value.bytes
+
+
+def _decode_uuid(data, pos: int):
+    if pos + 16 > len(data):
+        raise IndexError("UUID out of the data")
+    return uuid.UUID(bytes=bytes(data[pos:pos + 16])), pos + 16
+
+
+def _compile_enum(enum_class):
+    """Members are encoded by their (tagged) value."""
+    def encode_enum(value, out):
+        _encode_any(value.value, out)
+
+    def decode_enum(data, pos):
+        value, pos = _decode_any(data, pos)
+        return enum_class(value), pos
+
+    return encode_enum, decode_enum
+
+
+def _encode_None(value, out: bytearray):
+    pass
+
+
+def _decode_None(data, pos: int):
+    return None, pos
+
+
+# Values of untyped list and dict fields are prefixed by a tag of their type (the mapping proxies of the frozen
+# fields are decoded as dictionaries)
+_ANY_TAGS = {None.__class__: 0, bool: 1, int: 2, float: 3, str: 4, list: 5, dict: 6, datetime.datetime: 7,
+             complex: 8, types.MappingProxyType: 6, datetime.date: 9, decimal.Decimal: 10, uuid.UUID: 11, bytes: 12}
+
+
+def _encode_any(value, out: bytearray):
+    tag = _ANY_TAGS.get(value.__class__)
+    if tag is None:
+        raise TypeError("Value '{}' of type '{}' cannot be encoded".format(value, type(value)))
+    out.append(tag)
+    if tag == 5:
+        _encode_uint(len(value), out)
+        for item in value:
+            _encode_any(item, out)
+    elif tag == 6:
+        _encode_uint(len(value), out)
+        for key, item in value.items():
+            _encode_any(key, out)
+            _encode_any(item, out)
+    else:
+        _ANY_ENCODERS[tag](value, out)
+
+
+def _decode_any(data, pos: int):
+    tag = data[pos]
+    pos += 1
+    if tag == 5:
+        length, pos = _decode_uint(data, pos)
+        value = []
+        for _ in range(length):
+            item, pos = _decode_any(data, pos)
+            value.append(item)
+        return value, pos
+    if tag == 6:
+        length, pos = _decode_uint(data, pos)
+        value = {}
+        for _ in range(length):
+            key, pos = _decode_any(data, pos)
+            value[key], pos = _decode_any(data, pos)
+        return value, pos
+    return _ANY_DECODERS[tag](data, pos)
+
+
+_ANY_ENCODERS = {0: _encode_None, 1: _encode_bool, 2: _encode_int, 3: _encode_float, 4: _encode_str,
+                 7: _encode_datetime, 8: _encode_complex, 9: _encode_date, 10: _encode_decimal, 11: _encode_uuid,
+                 12: _encode_bytes}
+_ANY_DECODERS = {0: _decode_None, 1: _decode_bool, 2: _decode_int, 3: _decode_float, 4: _decode_str,
+                 7: _decode_datetime, 8: _decode_complex, 9: _decode_date, 10: _decode_decimal, 11: _decode_uuid,
+                 12: _decode_bytes}
+
+# Codecs of the declared builtin types, list and dict without item types are encoded with type tags
+_BUILTIN_CODECS = {
+    None.__class__: (_encode_None, _decode_None),
+    bool: (_encode_bool, _decode_bool),
+    int: (_encode_int, _decode_int),
+    float: (_encode_float, _decode_float),
+    str: (_encode_str, _decode_str),
+    complex: (_encode_complex, _decode_complex),
+    datetime.datetime: (_encode_datetime, _decode_datetime),
+    datetime.date: (_encode_date, _decode_date),
+    decimal.Decimal: (_encode_decimal, _decode_decimal),
+    uuid.UUID: (_encode_uuid, _decode_uuid),
+    bytes: (_encode_bytes, _decode_bytes),
+    list: (_encode_any, _decode_any),
+    dict: (_encode_any, _decode_any),
+}
+
+
+def _compile(type_):
+    """Returns the ``(encode, decode)`` functions of the values of a declared field type."""
+    codec = _BUILTIN_CODECS.get(type_) if isinstance(type_, type) else None
+    if codec is not None:
+        return codec
+
+    if isinstance(type_, pydto.DTOMeta):
+        encode, decode, _ = _dto_codec(type_)
+        return encode, decode
+
+    if type_checker._is_enum(type_):
+        return _compile_enum(type_)
+
+    if type_checker._is_union(type_):
+        return _compile_Union(type_)
+
+    if type_checker._is_generic(type_, Dict, dict):
+        args = type_checker._generic_args(type_)
+        if args is None:
+            return _encode_any, _decode_any
+        return _compile_Dict(_compile(args[0]), _compile(args[1]))
+
+    if type_checker._is_generic(type_, List, list):
+        args = type_checker._generic_args(type_)
+        if args is None:
+            return _encode_any, _decode_any
+        if args[0] is float:
+            return _encode_float_list, _decode_float_list
+        return _compile_List(_compile(args[0]))
+
+    raise TypeError("Values of type '{}' cannot be encoded".format(type_))
+
+
+def _compile_Union(type_):
+    args = type_checker._union_args(type_)
+    if len(args) == 2 and None.__class__ in args:
+        # Optional
+        encode, decode = _compile(args[0] if args[1] is None.__class__ else args[1])
+
+        def encode_optional(value, out):
+            if value is None:
+                out.append(0)
+            else:
+                out.append(1)
+                encode(value, out)
+
+        def decode_optional(data, pos):
+            if data[pos] == 0:
+                return None, pos + 1
+            return decode(data, pos + 1)
+
+        return encode_optional, decode_optional
+
+    # The index of the member matching the value precedes it
+    checkers = [type_checker._compile_type(arg, construct=False, level="types") for arg in args]
+    codecs = [_compile(arg) for arg in args]
+
+    def encode_union(value, out):
+        for index, checker in enumerate(checkers):
+            if checker(value) is not type_checker._INVALID:
+                out.append(index)
+                codecs[index][0](value, out)
+                return
+        raise TypeError("Value '{}' is not of type '{}'".format(value, type_))
+
+    def decode_union(data, pos):
+        return codecs[data[pos]][1](data, pos + 1)
+
+    return encode_union, decode_union
+
+
+def _compile_List(item_codec):
+    encode_item, decode_item = item_codec
+
+    def encode_list(value, out):
+        _encode_uint(len(value), out)
+        for item in value:
+            encode_item(item, out)
+
+    def decode_list(data, pos):
+        length, pos = _decode_uint(data, pos)
+        value = []
+        append = value.append
+        for _ in range(length):
+            item, pos = decode_item(data, pos)
+            append(item)
+        return value, pos
+
+    return encode_list, decode_list
+
+
+def _encode_float_list(value, out: bytearray):
+    _encode_uint(len(value), out)
+    out += struct.pack('<{}d'.format(len(value)), *value)
+
+
+def _decode_float_list(data, pos: int):
+    length, pos = _decode_uint(data, pos)
+    return list(struct.unpack_from('<{}d'.format(length), data, pos)), pos + 8 * length
+
+
+def _compile_Dict(key_codec, value_codec):
+    (encode_key, decode_key), (encode_value, decode_value) = key_codec, value_codec
+
+    def encode_dict(value, out):
+        _encode_uint(len(value), out)
+        for k, v in value.items():
+            encode_key(k, out)
+            encode_value(v, out)
+
+    def decode_dict(data, pos):
+        length, pos = _decode_uint(data, pos)
+        value = {}
+        for _ in range(length):
+            k, pos = decode_key(data, pos)
+            value[k], pos = decode_value(data, pos)
+        return value, pos
+
+    return encode_dict, decode_dict
+
+
+def _wire_fields(dto_class) -> list:
+    """
+    Returns the ``(field, descriptor)`` tuples of a DTO class sorted by field name, the order of the fields on the
+    wire. The declaration order is not used: class bodies are not ordered on Python 3.5, where it would change from
+    one process to another.
+    """
+    return sorted(dto_class._dto_fields.items(), key=lambda item: item[0])
+
+
+def _describe(type_) -> str:
+    """Describes a declared type independently of the Python version, for the schema fingerprint."""
+    if isinstance(type_, pydto.DTOMeta):
+        fields = ["{}:{}{}".format(field, _describe(descriptor._type), "[array]" if descriptor._array else "")
+                  for field, descriptor in _wire_fields(type_)]
+        return "{}({})".format(type_.__qualname__, ",".join(fields))
+    if type_ is None.__class__:
+        return "None"
+    if type_checker._is_union(type_):
+        return "Union[{}]".format(",".join(_describe(arg) for arg in type_checker._union_args(type_)))
+    for generic, builtin in ((Dict, dict), (List, list)):
+        if type_ is not builtin and type_checker._is_generic(type_, generic, builtin):
+            args = type_checker._generic_args(type_)
+            if args is None:
+                return builtin.__name__
+            return "{}[{}]".format(builtin.__name__.title(), ",".join(_describe(arg) for arg in args))
+    return type_.__name__
+
+
+def _dto_codec(dto_class):
+    """
+    Returns the ``(encode, decode, header)`` of a DTO class, compiled on first use and stored on the class (not
+    inherited by its subclasses), so that they are collected with the class.
+    """
+    codec = dto_class.__dict__.get('_dto_codec')
+    if codec is not None:
+        return codec
+
+    wire_fields = _wire_fields(dto_class)
+    slots, encoders, decoders = [], [], []
+    for _, descriptor in wire_fields:
+        encode, decode = _compile(descriptor._type)
+        if descriptor._array:
+            decode = _decode_stored(decode, descriptor._compiled_checker("trusted"))
+        elif descriptor._frozen:
+            # The decoded dictionary is new, it is not copied again
+            decode = _decode_stored(decode, _mapping_proxy)
+        slots.append(descriptor._slot)
+        encoders.append(encode)
+        decoders.append(decode)
+    fields = tuple(field for field, _ in wire_fields)
+
+    def encode_partial(dto, out):
+        values = dto._dto_values()
+        # Bit i of the mask is set if the field i is initialized
+        mask = 0
+        for i, field in enumerate(fields):
+            if field in values:
+                mask |= 1 << i
+        _encode_uint(mask, out)
+        for encode, field in zip(encoders, fields):
+            if field in values:
+                encode(values[field], out)
+
+    def decode_partial(obj, mask, data, pos):
+        for i, (slot, decode) in enumerate(zip(slots, decoders)):
+            if mask >> i & 1:
+                value, pos = decode(data, pos)
+                slot.__set__(obj, value)
+        return obj, pos
+
+    encode_dto = _generate_encode(dto_class, fields, encoders, encode_partial)
+    decode_dto = _generate_decode(dto_class, [descriptor for _, descriptor in wire_fields], decoders, decode_partial)
+    fingerprint = hashlib.sha1(_describe(dto_class).encode('utf-8')).digest()[:8]
+    codec = encode_dto, decode_dto, _MAGIC + fingerprint
+    dto_class._dto_codec = codec
+    return codec
+
+
+def _generate_encode(dto_class, fields: tuple, encoders, encode_partial):
+    """
+    Generates the encoder of the DTOs of a class whose fields are all initialized, with the encoding of the str, int,
+    float and bool fields inlined. Other DTOs go through ``encode_partial``.
+    """
+    full_mask = bytearray()
+    _encode_uint((1 << len(fields)) - 1, full_mask)
+    namespace = {'_encode_partial': encode_partial, '_encode_uint': _encode_uint, '_full_mask': bytes(full_mask),
+                 '_pack_float': _FLOAT.pack}
+
+    lines = ["def encode_dto(dto, out):",
+             "    try:"]
+    lines.extend("        v{} = dto.{}".format(i, field) for i, field in enumerate(fields))
+    lines += ["    except AttributeError:",
+              "        return _encode_partial(dto, out)",
+              "    out += _full_mask"]
+    for i, encode in enumerate(encoders):
+        if encode is _encode_str:
+            lines += ["    e = v{}.encode('utf-8')".format(i),
+                      "    if len(e) < 128:",
+                      "        out.append(len(e))",
+                      "    else:",
+                      "        _encode_uint(len(e), out)",
+                      "    out += e"]
+        elif encode is _encode_float:
+            lines.append("    out += _pack_float(v{})".format(i))
+        elif encode is _encode_bool:
+            lines.append("    out.append(1 if v{} else 0)".format(i))
+        elif encode is _encode_int:
+            lines += ["    if 0 <= v{} < 64:".format(i),
+                      "        out.append(v{} << 1)".format(i),
+                      "    else:",
+                      "        _encode_int_{}(v{}, out)".format(i, i)]
+            namespace['_encode_int_{}'.format(i)] = _encode_int
+        else:
+            namespace['_encode_{}'.format(i)] = encode
+            lines.append("    _encode_{}(v{}, out)".format(i, i))
+
+    code = dto_cache.compile_source("\n".join(lines), "<generated {} encoder>".format(dto_class.__qualname__))
+    exec(code, namespace)
+    return namespace['encode_dto']
+
+
+def _generate_decode(dto_class, descriptors: list, decoders, decode_partial):
+    """
+    Generates the decoder of the DTOs of a class, setting the slots of the fields in a straight line when they are
+    all present, with the decoding of the str, int, float and bool fields inlined. Other DTOs go through
+    ``decode_partial``.
+    """
+    namespace = {'_decode_partial': decode_partial, '_decode_uint': _decode_uint, '_decode_int': _decode_int,
+                 '_full_mask': (1 << len(descriptors)) - 1, '_new': object.__new__, '_dto_class': dto_class,
+                 '_unpack_float': _FLOAT.unpack_from}
+
+    lines = ["def decode_dto(data, pos):",
+             "    mask, pos = _decode_uint(data, pos)",
+             "    obj = _new(_dto_class)",
+             "    if mask != _full_mask:",
+             "        return _decode_partial(obj, mask, data, pos)"]
+    for i, (descriptor, decode) in enumerate(zip(descriptors, decoders)):
+        namespace['_set_{}'.format(i)] = descriptor._slot.__set__
+        if decode is _decode_str:
+            lines += ["    n = data[pos]",
+                      "    if n < 128:",
+                      "        pos += 1",
+                      "    else:",
+                      "        n, pos = _decode_uint(data, pos)",
+                      "    if pos + n > len(data):",
+                      "        raise IndexError('String out of the data')",
+                      "    _set_{}(obj, str(data[pos:pos + n], 'utf-8'))".format(i),
+                      "    pos += n"]
+        elif decode is _decode_float:
+            lines += ["    _set_{}(obj, _unpack_float(data, pos)[0])".format(i),
+                      "    pos += 8"]
+        elif decode is _decode_bool:
+            lines += ["    _set_{}(obj, data[pos] != 0)".format(i),
+                      "    pos += 1"]
+        elif decode is _decode_int:
+            lines += ["    n = data[pos]",
+                      "    if n < 128 and not n & 1:",
+                      "        _set_{}(obj, n >> 1)".format(i),
+                      "        pos += 1",
+                      "    else:",
+                      "        n, pos = _decode_int(data, pos)",
+                      "        _set_{}(obj, n)".format(i)]
+        else:
+            namespace['_decode_{}'.format(i)] = decode
+            lines += ["    value, pos = _decode_{}(data, pos)".format(i),
+                      "    _set_{}(obj, value)".format(i)]
+    lines.append("    return obj, pos")
+
+    code = dto_cache.compile_source("\n".join(lines), "<generated {} decoder>".format(dto_class.__qualname__))
+    exec(code, namespace)
+    return namespace['decode_dto']
+
+
+def _mapping_proxy(value):
+    return None if value is None else types.MappingProxyType(value)
+
+
+def _decode_stored(decode, to_stored):
+    """Wraps a decoder with the conversion of its values to their storage (arrays, mapping proxies)."""
+    def decode_stored(data, pos):
+        value, pos = decode(data, pos)
+        return to_stored(value), pos
+
+    return decode_stored
+
+
+def _check_header(dto_class, header: bytes, data):
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("Data is not encoded DTOs")
+    if data[:_HEADER_SIZE] != header:
+        raise ValueError("Data was encoded with another schema than the one of DTO class '{}'".format(
+            dto_class.__qualname__))
+
+
+def to_bytes(dto) -> bytes:
+    encode, _, header = _dto_codec(type(dto))
+    out = bytearray(header)
+    encode(dto, out)
+    return bytes(out)
+
+
+def from_bytes(dto_class, data):
+    _, decode, header = _dto_codec(dto_class)
+    _check_header(dto_class, header, bytes(data[:_HEADER_SIZE]))
+    try:
+        dto, pos = decode(data, _HEADER_SIZE)
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError("Truncated or corrupted DTO data ({})".format(e))
+    if pos != len(data):
+        raise ValueError("{} unexpected bytes after the DTO data".format(len(data) - pos))
+    return dto
+
+
+def dump_many(dto_class, dtos, fileobj):
+    """Writes the header once then each DTO prefixed by its size."""
+    encode, _, header = _dto_codec(dto_class)
+    fileobj.write(header)
+    out, record = bytearray(), bytearray()
+    for dto in dtos:
+        if type(dto) is not dto_class:
+            raise TypeError("Value '{}' is not a DTO of class '{}'".format(dto, dto_class.__qualname__))
+        encode(dto, record)
+        _encode_uint(len(record), out)
+        out += record
+        record.clear()
+        if len(out) >= 65536:
+            fileobj.write(out)
+            out.clear()
+    fileobj.write(out)
+
+
+def load_many(dto_class, fileobj, chunk_size: int = 65536):
+    """Yields the DTOs written by ``dump_many``, reading the file object by chunks."""
+    _, decode, header = _dto_codec(dto_class)
+    reader = _Reader(fileobj, chunk_size)
+    reader.fill(_HEADER_SIZE)
+    _check_header(dto_class, header, reader.data[:_HEADER_SIZE])
+    reader.pos = _HEADER_SIZE
+    # A size prefix takes at most 10 bytes
+    while reader.fill(10):
+        try:
+            size, start = _decode_uint(reader.data, reader.pos)
+        except IndexError:
+            raise ValueError("Truncated DTO data")
+        reader.pos = start
+        if not reader.fill(size) or len(reader.data) - reader.pos < size:
+            raise ValueError("Truncated DTO data")
+        record = reader.data[reader.pos:reader.pos + size]
+        reader.pos += size
+        try:
+            dto, pos = decode(record, 0)
+        except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+            raise ValueError("Corrupted DTO data ({})".format(e))
+        if pos != size:
+            raise ValueError("Corrupted DTO data")
+        yield dto
+
+
+class _Reader:
+    """Byte buffer over a file object that only keeps the unread tail of what has been read."""
+    __slots__ = "_read", "_chunk_size", "data", "pos"
+
+    def __init__(self, fileobj, chunk_size: int):
+        self._read = fileobj.read
+        self._chunk_size = chunk_size
+        self.data = b''
+        self.pos = 0
+
+    def fill(self, size: int) -> bool:
+        """Reads until ``size`` bytes are available or the end of the file, returns whether any byte is left."""
+        while len(self.data) - self.pos < size:
+            chunk = self._read(max(self._chunk_size, size))
+            if not chunk:
+                break
+            self.data = self.data[self.pos:] + chunk
+            self.pos = 0
+        return len(self.data) > self.pos
@@ -0,0 +1,90 @@
+"""
+Opt-in on-disk cache of the code generated for DTO classes (``__init__``, ``to_dict``, binary encoders and decoders).
+Compiling the generated source is the largest part of the creation of a DTO class; with the cache enabled, the code
+objects are marshalled to a directory and loaded back by the next processes instead of being compiled again, e.g. in
+short-lived workers importing hundreds of DTO classes.
+
+Entries are keyed by a fingerprint of the generated source, which is derived from the schema of the class (its fields,
+their options and types), and of the Python version: changing a class definition changes its fingerprint, so stale
+entries are never used. The cache is enabled with ``enable(directory)`` or the ``PYDTO_CACHE_DIR`` environment
+variable, before the DTO classes are defined.
+"""
+import hashlib
+import importlib.util
+import marshal
+import os
+import tempfile
+import types
+
+_directory = os.environ.get("PYDTO_CACHE_DIR") or None
+
+
+def enable(directory: str):
+    """Caches the generated code in ``directory``, created if needed."""
+    global _directory
+    _directory = directory
+
+
+def disable():
+    global _directory
+    _directory = None
+
+
+def get_directory() -> str:
+    """Returns the cache directory, None when the cache is disabled."""
+    return _directory
+
+
+def _fingerprint(source: str, filename: str) -> str:
+    digest = hashlib.sha1(importlib.util.MAGIC_NUMBER)
+    digest.update(filename.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def compile_source(source: str, filename: str):
+    """
+    ``compile(source, filename, "exec")`` going through the cache when it is enabled. Unreadable entries are compiled
+    again and write failures (e.g. a read-only directory) are ignored, the cache is only an optimization.
+    """
+    directory = _directory
+    if directory is None:
+        return compile(source, filename, "exec")
+
+    path = os.path.join(directory, _fingerprint(source, filename) + '.bin')
+    try:
+        with open(path, 'rb') as fileobj:
+            code = marshal.loads(fileobj.read())
+        if isinstance(code, types.CodeType):
+            return code
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    code = compile(source, filename, "exec")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first so that concurrent processes never read a partial entry
+        fd, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fileobj:
+                marshal.dump(code, fileobj)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError:
+        pass
+    return code
+
+
+def clear():
+    """Deletes the entries of the cache directory."""
+    if _directory is None:
+        return
+    for name in os.listdir(_directory):
+        if name.endswith('.bin'):
+            try:
+                os.unlink(os.path.join(_directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,159 @@
+"""
+Built-in coerce functions of DTO fields, selected by name in the field definition, e.g.
+``created = datetime, {"coerce": "iso_datetime"}``. They convert the values found in JSON (mostly strings) to the
+declared type, let the values already of that type and None (for ``Optional`` fields) through unchanged, and only
+depend on the value, so that the batch validation (``from_dicts``) converts each distinct string of a column once.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import enum as enum_module
+import uuid as uuid_module
+import type_checker
+
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+_date_fromisoformat = getattr(datetime.date, 'fromisoformat', None)
+
+# Formats of the ISO-8601 strings parsed on Python versions without datetime.fromisoformat (before 3.7)
+_ISO_FORMATS = ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S',
+                '%Y-%m-%dT%H:%M', '%Y-%m-%d')
+
+
+class Coercer:
+    """
+    Coerce function converting the values of a field to ``type_`` with ``convert``, which is only called for values
+    that are neither None nor instances of ``type_`` and raises ``TypeError`` or ``ValueError`` for invalid values.
+    """
+    __slots__ = "name", "type", "_convert"
+
+    def __init__(self, name: str, type_: type, convert):
+        self.name = name
+        self.type = type_
+        self._convert = convert
+
+    def __call__(self, value):
+        if value is None or isinstance(value, self.type):
+            return value
+        return self._convert(value)
+
+    def cached(self):
+        """
+        Returns a version of the coercer remembering the conversions of strings, for a batch of values: a repeated
+        string (e.g. a timestamp or a status) is converted once.
+        """
+        convert, type_ = self._convert, self.type
+        cache = {}
+
+        def coerce(value):
+            if value.__class__ is str:
+                result = cache.get(value)
+                if result is None:
+                    result = cache[value] = convert(value)
+                return result
+            if value is None or isinstance(value, type_):
+                return value
+            return convert(value)
+
+        return coerce
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__qualname__, self.name)
+
+
+def _parse_iso_datetime(value):
+    if value.__class__ is not str:
+        raise TypeError("Value '{}' is not an ISO-8601 string".format(value))
+    if _fromisoformat is not None:
+        return _fromisoformat(value)
+    for format_ in _ISO_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, format_)
+        except ValueError:
+            pass
+    raise ValueError("Value '{}' is not an ISO-8601 date and time".format(value))
+
+
+def _parse_iso_date(value):
+    if value.__class__ is not str:
+        raise TypeError("Value '{}' is not an ISO-8601 string".format(value))
+    if _date_fromisoformat is not None:
+        return _date_fromisoformat(value)
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _to_decimal(value):
+    if value.__class__ is float:
+        # The shortest representation of the float, not its exact binary expansion
+        return decimal.Decimal(repr(value))
+    if value.__class__ is not str and value.__class__ is not int:
+        raise TypeError("Value '{}' cannot be converted to a Decimal".format(value))
+    try:
+        return decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        raise ValueError("Value '{}' is not a decimal number".format(value))
+
+
+def _to_uuid(value):
+    if value.__class__ is not str:
+        raise TypeError("Value '{}' is not a UUID string".format(value))
+    return uuid_module.UUID(value)
+
+
+def _from_base64(value):
+    if value.__class__ is not str:
+        raise TypeError("Value '{}' is not a base64 string".format(value))
+    try:
+        return base64.b64decode(value, validate=True)
+    except binascii.Error as e:
+        raise ValueError("Value '{}' is not valid base64 ({})".format(value, e))
+
+
+iso_datetime = Coercer("iso_datetime", datetime.datetime, _parse_iso_datetime)
+iso_date = Coercer("iso_date", datetime.date, _parse_iso_date)
+decimal_ = Coercer("decimal", decimal.Decimal, _to_decimal)
+uuid = Coercer("uuid", uuid_module.UUID, _to_uuid)
+base64_bytes = Coercer("base64", bytes, _from_base64)
+
+_COERCERS = {coercer.name: coercer for coercer in (iso_datetime, iso_date, decimal_, uuid, base64_bytes)}
+
+
+def enum(enum_class):
+    """Returns a coercer converting values (or, failing that, names) to the members of an ``Enum`` class."""
+    members = enum_class.__members__
+
+    def convert(value):
+        try:
+            return enum_class(value)
+        except ValueError:
+            member = members.get(value) if value.__class__ is str else None
+            if member is None:
+                raise
+            return member
+
+    return Coercer("enum", enum_class, convert)
+
+
+def get(name: str, type_) -> Coercer:
+    """Returns the built-in coercer named ``name`` for a field of type ``type_`` ("enum" uses the Enum of the type)."""
+    if name == "enum":
+        enum_class = _enum_class(type_)
+        if enum_class is None:
+            raise TypeError("Coerce 'enum' requires an Enum or Optional Enum field type, not '{}'".format(type_))
+        return enum(enum_class)
+    try:
+        return _COERCERS[name]
+    except KeyError:
+        raise ValueError("Unknown coerce '{}', built-in coerce functions are {}".format(
+            name, sorted(list(_COERCERS) + ["enum"])))
+
+
+def _enum_class(type_):
+    if type_checker._is_union(type_):
+        args = [arg for arg in type_checker._union_args(type_) if arg is not None.__class__]
+        if len(args) != 1:
+            return None
+        type_ = args[0]
+    if isinstance(type_, type) and issubclass(type_, enum_module.Enum):
+        return type_
+    return None
@@ -0,0 +1,108 @@
+"""
+Validation errors of DTOs. A failure is described by a ``FieldError`` (path of the field, expected type, value and
+reason) whose message is only formatted when it is read, so that rejected values cost no string formatting when the
+caller discards the error (batch validation, ``try_from_dict``, checks of nested DTOs).
+"""
+
+# Reasons of the failures
+TYPE = "type"
+VALIDATOR = "validator"
+COERCE = "coerce"
+MISSING = "missing"
+UNEXPECTED = "unexpected"
+
+
+class FieldError:
+    """
+    One validation failure of a value.
+
+    :ivar reason: one of "type" (the value is not of the expected type), "validator" (rejected by the validator of
+    the field), "coerce" (the coerce function raised ``cause``), "missing" (the field is not in the dictionary) and
+    "unexpected" (the key is not a field of the DTO class)
+    :ivar path: dotted path of the field from the validated dictionary, e.g. "address.city" ("" for the dictionary
+    itself)
+    :ivar expected: declared type of the field (None for unexpected keys)
+    :ivar value: the invalid value (None for missing fields)
+    :ivar dto_class: name of the validated DTO class
+    """
+    __slots__ = "reason", "path", "expected", "value", "dto_class", "cause"
+
+    def __init__(self, reason: str, path: str, expected, value, dto_class: str, cause: Exception = None):
+        self.reason = reason
+        self.path = path
+        self.expected = expected
+        self.value = value
+        self.dto_class = dto_class
+        self.cause = cause
+
+    @property
+    def message(self) -> str:
+        if self.reason == TYPE:
+            if not self.path:
+                return "Value '{}' is not of type '{}' (DTO class '{}')".format(self.value, self.expected,
+                                                                                 self.dto_class)
+            return "Value '{}' is not of type '{}' (field '{}' of DTO class '{}')".format(self.value, self.expected,
+                                                                                           self.path, self.dto_class)
+        if self.reason == VALIDATOR:
+            return "{} is not a valid value for the field '{}' or DTO class {} using its validator".format(
+                self.value, self.path, self.dto_class)
+        if self.reason == COERCE:
+            return "Value '{}' of field '{}' of DTO class '{}' cannot be coerced ({})".format(self.value, self.path,
+                                                                                               self.dto_class,
+                                                                                               self.cause)
+        if self.reason == MISSING:
+            return "Field '{}' of DTO class '{}' is missing".format(self.path, self.dto_class)
+        return "Key '{}' is not a field of DTO class '{}'".format(self.path, self.dto_class)
+
+    def to_exception(self) -> Exception:
+        """Returns the exception ``from_dict`` raises for this failure."""
+        if self.reason == COERCE:
+            return self.cause
+        if self.reason == TYPE:
+            return InvalidTypeError(self)
+        if self.reason == VALIDATOR:
+            return InvalidValueError(self)
+        return FieldsMismatchError(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, FieldError):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    __hash__ = None
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return '{}({!r}, {!r}, {!r}, {!r}, {!r})'.format(self.__class__.__qualname__, self.reason, self.path,
+                                                         self.expected, self.value, self.dto_class)
+
+
+class ValidationError(Exception):
+    """
+    Base class of the exceptions raised by the validation of DTOs, built with the ``FieldError`` objects of the
+    failures (in ``errors``). The message is formatted when the exception is printed.
+    """
+
+    @property
+    def errors(self) -> list:
+        return list(self.args)
+
+    def __str__(self):
+        return '; '.join(error.message for error in self.args)
+
+
+class InvalidTypeError(ValidationError, TypeError):
+    """Raised for a value that is not of the type of its field."""
+
+
+class InvalidValueError(ValidationError, ValueError):
+    """Raised for a value rejected by the validator of its field."""
+
+
+class FieldsMismatchError(ValidationError, AssertionError):
+    """
+    Raised for a dictionary whose keys do not match the fields of the DTO class, with the "missing" and "unexpected"
+    ``FieldError`` of the keys. It is an ``AssertionError`` as the key checks used to be assertions.
+    """
@@ -0,0 +1,183 @@
+import array
+import itertools
+import pydto
+
+# Typecodes of the columns of int and float fields, stored as arrays instead of lists of boxed objects
+_COLUMN_TYPECODES = {int: 'q', float: 'd'}
+
+
+def _to_column(type_, values: list):
+    """Stores the validated values of a field as an array when they all are exactly of the type of the field."""
+    typecode = _COLUMN_TYPECODES.get(type_)
+    # bool values (or float subclasses) would not come back out of an array as they went in
+    if typecode is not None and {type_}.issuperset(map(type, values)):
+        try:
+            return array.array(typecode, values)
+        except OverflowError:
+            # Ints that do not fit in 64 bits
+            pass
+    return values
+
+
+def _take(column, selectors):
+    """Returns the items of a column (array or list) whose selector is true, keeping the column storage."""
+    if column.__class__ is array.array:
+        return array.array(column.typecode, itertools.compress(column, selectors))
+    return list(itertools.compress(column, selectors))
+
+
+class DTOFrame:
+    """
+    Columnar collection of DTOs of one class: the values of each field are stored in one column, an ``array.array``
+    for ``int`` and ``float`` fields and a list otherwise, instead of one object per DTO. Frames are read-only,
+    ``filter`` and ``select`` return new frames sharing nothing with the original one.
+    """
+    __slots__ = "_dto_class", "_columns", "_length"
+
+    def __init__(self, dto_class, columns: dict, length: int):
+        """Use ``from_dicts`` or ``from_dtos``, the columns are expected to be already validated."""
+        self._dto_class = dto_class
+        self._columns = columns
+        self._length = length
+
+    @classmethod
+    def from_dicts(cls, dto_class, dicts, validate: str = None):
+        """
+        Builds a frame out of dictionaries, validated column-wise with the descriptors of ``dto_class`` exactly like
+        ``dto_class.from_dicts`` (at the ``validate`` level, by default the one of the class).
+
+        :return: a tuple of the frame of the valid dictionaries (in input order) and a list of ``(index, exception)``
+        tuples for the dictionaries that failed validation
+        """
+        errors = {}
+        rows, columns = dto_class._validate_rows(list(enumerate(dicts)), errors, validate)
+        valid = [index not in errors for index, _ in rows]
+        frame_columns = {}
+        for field, column in zip(dto_class._dto_descriptors, columns):
+            if errors:
+                column = list(itertools.compress(column, valid))
+            frame_columns[field] = _to_column(dto_class._dto_fields[field]._type, column)
+        return cls(dto_class, frame_columns, sum(valid)), sorted(errors.items(), key=lambda error: error[0])
+
+    @classmethod
+    def from_dtos(cls, dto_class, dtos):
+        """Builds a frame out of DTOs of ``dto_class``, whose fields must all be initialized."""
+        dtos = list(dtos)
+        for dto in dtos:
+            if type(dto) is not dto_class:
+                raise TypeError("Value '{}' is not a DTO of class '{}'".format(dto, dto_class.__qualname__))
+        columns = {}
+        for field, descriptor in dto_class._dto_fields.items():
+            columns[field] = _to_column(descriptor._type, [getattr(dto, field) for dto in dtos])
+        return cls(dto_class, columns, len(dtos))
+
+    @property
+    def dto_class(self):
+        return self._dto_class
+
+    @property
+    def fields(self) -> tuple:
+        return tuple(self._columns)
+
+    def column(self, field: str):
+        """Returns the column of a field (an ``array.array`` or a list), which must not be modified."""
+        try:
+            return self._columns[field]
+        except KeyError:
+            raise KeyError("DTO frame of class '{}' has no field '{}'".format(self._dto_class.__qualname__, field))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield DTORow(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DTOFrame(self._dto_class, {field: column[index] for field, column in self._columns.items()},
+                            len(range(*index.indices(self._length))))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("DTO frame index out of range")
+        return DTORow(self, index)
+
+    def filter(self, predicate):
+        """
+        Returns a frame of the rows for which ``predicate`` (called with a ``DTORow``) is true. ``predicate`` may
+        also be a sequence of booleans, one per row, e.g. computed over a column.
+        """
+        if callable(predicate):
+            selectors = [bool(predicate(row)) for row in self]
+        else:
+            selectors = list(predicate)
+            if len(selectors) != self._length:
+                raise ValueError("Filter of {} values on a DTO frame of {} rows".format(len(selectors),
+                                                                                        self._length))
+        columns = {field: _take(column, selectors) for field, column in self._columns.items()}
+        return DTOFrame(self._dto_class, columns, sum(1 for selector in selectors if selector))
+
+    def select(self, fields):
+        """Returns a frame of only some of the fields (sharing their columns), e.g. to save memory."""
+        return DTOFrame(self._dto_class, {field: self.column(field) for field in fields}, self._length)
+
+    def to_dicts(self) -> list:
+        """Converts every row to a dictionary, as ``to_dict`` of the DTOs would."""
+        fields, to_dict_value = tuple(self._columns), pydto._to_dict_value
+        return [{field: to_dict_value(value) for field, value in zip(fields, values)}
+                for values in zip(*self._columns.values())]
+
+    def to_dtos(self) -> list:
+        """Builds the DTOs of the rows, without validating their values again."""
+        return [self._dto(index) for index in range(self._length)]
+
+    def _dto(self, index: int):
+        dto_class = self._dto_class
+        if len(self._columns) == len(dto_class._dto_descriptors):
+            return dto_class._from_validated([column[index] for column in self._columns.values()])
+        # Projected frames leave the other fields not initialized
+        obj = object.__new__(dto_class)
+        for field, column in self._columns.items():
+            dto_class._dto_fields[field]._slot.__set__(obj, column[index])
+        return obj
+
+    def __repr__(self):
+        return '{}({}, {} rows, fields {})'.format(self.__class__.__qualname__, self._dto_class.__qualname__,
+                                                   self._length, list(self._columns))
+
+
+class DTORow:
+    """Read-only view of one row of a ``DTOFrame``, whose fields read the columns of the frame."""
+    __slots__ = "_frame", "_index"
+
+    def __init__(self, frame: DTOFrame, index: int):
+        object.__setattr__(self, '_frame', frame)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, attr):
+        try:
+            column = self._frame._columns[attr]
+        except KeyError:
+            raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, attr))
+        return column[self._index]
+
+    def __setattr__(self, attr, val):
+        raise AttributeError("Rows of a DTO frame are read-only")
+
+    def to_dict(self) -> dict:
+        return {field: pydto._to_dict_value(column[self._index]) for field, column in self._frame._columns.items()}
+
+    def to_dto(self):
+        """Builds the DTO of the row, without validating its values again."""
+        return self._frame._dto(self._index)
+
+    def __eq__(self, other):
+        if isinstance(other, DTORow):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({})'.format(self._frame._dto_class.__qualname__, self.to_dict())
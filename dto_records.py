@@ -0,0 +1,296 @@
+"""
+Fixed-layout binary record files of DTOs, read through memory-mapped views. Every record of a class has the same
+size and its fields are at fixed offsets, so a record is found by its index and a field is decoded only when it is
+read, straight from the mapped file. Forked processes reading the same file share its pages.
+
+Supported field types are ``int`` (64 bits), ``float``, ``bool``, ``datetime`` (naive), ``str`` fields declared with
+a ``max_length`` (the maximum size of their UTF-8 encoding), ``Optional`` of these and nested DTOs made of them.
+All the fields of the written DTOs must be initialized.
+"""
+import datetime
+import hashlib
+import mmap
+import struct
+import dto_binary
+import pydto
+import type_checker
+
+_MAGIC = b'PDRF'
+# Magic, schema fingerprint, record size, number of records
+_HEADER = struct.Struct('<4s8sIQ')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class _Layout:
+    """
+    Fixed layout of the values of a type: their struct format, a function converting a value to the tuple of its
+    struct values and a function returning a reader of the value at a given offset of a record.
+    """
+    __slots__ = "format", "size", "pack_values", "reader"
+
+    def __init__(self, format_: str, pack_values, reader):
+        self.format = format_
+        self.size = struct.calcsize('<' + format_)
+        self.pack_values = pack_values
+        self.reader = reader
+
+
+def _scalar_layout(format_: str, convert=None, restore=None) -> _Layout:
+    unpack_from = struct.Struct('<' + format_).unpack_from
+
+    if convert is None:
+        def pack_values(value):
+            return value,
+    else:
+        def pack_values(value):
+            return convert(value),
+
+    def reader(offset):
+        if restore is None:
+            return lambda buffer, base: unpack_from(buffer, base + offset)[0]
+        return lambda buffer, base: restore(unpack_from(buffer, base + offset)[0])
+
+    return _Layout(format_, pack_values, reader)
+
+
+def _datetime_to_int(value: datetime.datetime) -> int:
+    if value.tzinfo is not None:
+        raise ValueError("Aware datetime '{}' cannot be stored in a record".format(value))
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _int_to_datetime(value: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _str_layout(max_length: int) -> _Layout:
+    length_size = struct.calcsize('<H')
+    unpack_length = struct.Struct('<H').unpack_from
+
+    def pack_values(value):
+        encoded = value.encode('utf-8')
+        if len(encoded) > max_length:
+            raise ValueError("Value '{}' is longer than the max_length {} of its field".format(value, max_length))
+        return len(encoded), encoded
+
+    def reader(offset):
+        def read(buffer, base):
+            start = base + offset + length_size
+            return str(buffer[start:start + unpack_length(buffer, base + offset)[0]], 'utf-8')
+
+        return read
+
+    return _Layout('H{}s'.format(max_length), pack_values, reader)
+
+
+def _optional_layout(layout: _Layout) -> _Layout:
+    # Presence flag followed by the value, zeros for None
+    absent = (False,) + struct.unpack('<' + layout.format, bytes(layout.size))
+    value_pack_values = layout.pack_values
+
+    def pack_values(value):
+        if value is None:
+            return absent
+        return (True,) + tuple(value_pack_values(value))
+
+    def reader(offset):
+        read_value = layout.reader(offset + 1)
+        return lambda buffer, base: read_value(buffer, base) if buffer[base + offset] else None
+
+    return _Layout('?' + layout.format, pack_values, reader)
+
+
+def _compile(type_, field: str, max_length: int) -> _Layout:
+    if type_ is int:
+        return _scalar_layout('q')
+    if type_ is float:
+        return _scalar_layout('d')
+    if type_ is bool:
+        return _scalar_layout('?')
+    if type_ is datetime.datetime:
+        return _scalar_layout('q', _datetime_to_int, _int_to_datetime)
+    if type_ is str:
+        if max_length is None:
+            raise TypeError("Field '{}' of type str needs a max_length to be stored in records".format(field))
+        return _str_layout(max_length)
+    if isinstance(type_, pydto.DTOMeta):
+        return _dto_layout(type_)[0]
+    if type_checker._is_union(type_):
+        args = type_checker._union_args(type_)
+        if len(args) == 2 and None.__class__ in args:
+            return _optional_layout(_compile(args[0] if args[1] is None.__class__ else args[1], field, max_length))
+    raise TypeError("Field '{}' of type '{}' cannot be stored in records".format(field, type_))
+
+
+def _dto_layout(dto_class):
+    """
+    Returns the ``(layout, view class)`` of a DTO class, compiled on first use and stored on the class (not inherited
+    by its subclasses), so that they are collected with the class.
+    """
+    compiled = dto_class.__dict__.get('_dto_layout')
+    if compiled is not None:
+        return compiled
+
+    # Fields in the order of their names, see dto_binary._wire_fields
+    wire_fields = dto_binary._wire_fields(dto_class)
+    layouts = [_compile(descriptor._type, field, descriptor._max_length) for field, descriptor in wire_fields]
+    fields = tuple(field for field, _ in wire_fields)
+    offsets = []
+    offset = 0
+    for layout in layouts:
+        offsets.append(offset)
+        offset += layout.size
+
+    def pack_values(dto):
+        values = []
+        for field, layout in zip(fields, layouts):
+            try:
+                value = getattr(dto, field)
+            except AttributeError:
+                raise ValueError("Field '{}' of DTO '{}' is not initialized".format(field, dto))
+            values.extend(layout.pack_values(value))
+        return values
+
+    class_dict = {'__slots__': (), '_dto_class': dto_class}
+    for field, layout, field_offset in zip(fields, layouts, offsets):
+        class_dict[field] = _view_property(layout.reader(field_offset))
+    view_class = type('{}View'.format(dto_class.__name__), (DTOView,), class_dict)
+    view_class.__qualname__ = '{}View'.format(dto_class.__qualname__)
+
+    def reader(offset):
+        return lambda buffer, base: view_class(buffer, base + offset)
+
+    compiled = _Layout(''.join(layout.format for layout in layouts), pack_values, reader), view_class
+    dto_class._dto_layout = compiled
+    return compiled
+
+
+def _view_property(read):
+    return property(lambda self: read(self._buffer, self._offset))
+
+
+def _fingerprint(dto_class, layout: _Layout) -> bytes:
+    return hashlib.sha1((dto_binary._describe(dto_class) + layout.format).encode('utf-8')).digest()[:8]
+
+
+class DTOView:
+    """
+    Read-only view of a DTO stored in a record, its fields are decoded from the record each time they are read.
+    Nested DTOs are views as well.
+    """
+    __slots__ = "_buffer", "_offset"
+
+    def __init__(self, buffer, offset: int):
+        object.__setattr__(self, '_buffer', buffer)
+        object.__setattr__(self, '_offset', offset)
+
+    def __setattr__(self, attr, val):
+        raise AttributeError("DTO views are read-only")
+
+    def _values(self):
+        return [(field, getattr(self, field)) for field in self._dto_class._dto_descriptors]
+
+    def to_dto(self):
+        """Copies the record into a DTO, its values are not validated again."""
+        return self._dto_class._from_validated([value.to_dto() if isinstance(value, DTOView) else value
+                                                for _, value in self._values()])
+
+    def to_dict(self) -> dict:
+        return {field: value.to_dict() if isinstance(value, DTOView) else value for field, value in self._values()}
+
+    def __eq__(self, other):
+        if isinstance(other, DTOView):
+            return self._dto_class is other._dto_class and self.to_dict() == other.to_dict()
+        if isinstance(other, pydto.DTO):
+            return self.to_dto() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__qualname__, self.to_dict())
+
+
+def write_records(dto_class, dtos, path: str) -> int:
+    """
+    Writes DTOs of ``dto_class`` to a record file.
+
+    :return: the number of records written
+    """
+    layout = _dto_layout(dto_class)[0]
+    record = struct.Struct('<' + layout.format)
+    fingerprint = _fingerprint(dto_class, layout)
+    count = 0
+    with open(path, 'wb') as fileobj:
+        fileobj.write(_HEADER.pack(_MAGIC, fingerprint, record.size, 0))
+        chunk = bytearray()
+        for dto in dtos:
+            if type(dto) is not dto_class:
+                raise TypeError("Value '{}' is not a DTO of class '{}'".format(dto, dto_class.__qualname__))
+            try:
+                chunk += record.pack(*layout.pack_values(dto))
+            except (struct.error, OverflowError) as e:
+                raise ValueError("DTO '{}' cannot be stored in a record ({})".format(dto, e))
+            count += 1
+            if len(chunk) >= 65536:
+                fileobj.write(chunk)
+                chunk.clear()
+        fileobj.write(chunk)
+        fileobj.seek(0)
+        fileobj.write(_HEADER.pack(_MAGIC, fingerprint, record.size, count))
+    return count
+
+
+class RecordFile:
+    """
+    Sequence of the ``DTOView`` of the records of a file written by ``write_records``, memory-mapped read-only.
+    Views must not be used once the file is closed.
+    """
+
+    def __init__(self, dto_class, path: str):
+        layout, self._view_class = _dto_layout(dto_class)
+        self.dto_class = dto_class
+        with open(path, 'rb') as fileobj:
+            size = fileobj.seek(0, 2)
+            if size < _HEADER.size:
+                raise ValueError("File '{}' is not a DTO record file".format(path))
+            self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fingerprint, self._record_size, self._count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError("File '{}' is not a DTO record file".format(path))
+        if fingerprint != _fingerprint(dto_class, layout) or self._record_size != layout.size:
+            self._mmap.close()
+            raise ValueError("Records of file '{}' were written with another schema than the one of DTO class "
+                             "'{}'".format(path, dto_class.__qualname__))
+        if _HEADER.size + self._count * self._record_size > size:
+            self._mmap.close()
+            raise ValueError("Record file '{}' is truncated".format(path))
+        self._buffer = memoryview(self._mmap)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Record index out of range")
+        return self._view_class(self._buffer, _HEADER.size + index * self._record_size)
+
+    def __iter__(self):
+        view_class, buffer, record_size = self._view_class, self._buffer, self._record_size
+        for offset in range(_HEADER.size, _HEADER.size + self._count * record_size, record_size):
+            yield view_class(buffer, offset)
+
+    def close(self):
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
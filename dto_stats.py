@@ -0,0 +1,98 @@
+"""
+Performance statistics of the DTO classes, recorded once enabled with ``pydto.enable_stats()``: per class the time
+of the constructions (``__init__`` and ``from_dict``), of ``to_dict`` and of the batches of ``from_dicts`` /
+``from_json_lines`` and the number of failures, per field the time spent in the coerce function, the type check
+and the validator and the number of failures.
+
+Statistics cost nothing while disabled (the default): the code generated for the DTO classes only records them when
+it is generated with statistics enabled, which ``enable_stats`` does for the classes already defined.
+"""
+
+# Histogram bucket i counts the durations d such that int(d in microseconds) has i bits, i.e. d < 2 ** i us
+_BUCKETS = 32
+
+_callbacks = []
+
+
+class Histogram:
+    """Number, total and distribution of durations, in buckets of powers of 2 microseconds."""
+    __slots__ = "count", "total", "buckets"
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * _BUCKETS
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), _BUCKETS - 1)] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Returns an upper bound of the ``percent`` percentile of the durations, in seconds (0 without durations)."""
+        rank = percent / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return 2 ** i / 1e6
+        return 0.0
+
+    def snapshot(self) -> dict:
+        """
+        :return: ``count``, ``total`` (seconds), ``mean`` (seconds) and ``buckets``, the counts of the non-empty
+        buckets keyed by their (exclusive) upper bound in microseconds
+        """
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                "buckets": {2 ** i: count for i, count in enumerate(self.buckets) if count}}
+
+
+class FieldStats:
+    __slots__ = "coerce", "check", "validator", "failures"
+
+    def __init__(self):
+        self.coerce = Histogram()
+        self.check = Histogram()
+        self.validator = Histogram()
+        self.failures = 0
+
+    def snapshot(self) -> dict:
+        return {"coerce": self.coerce.snapshot(), "check": self.check.snapshot(),
+                "validator": self.validator.snapshot(), "failures": self.failures}
+
+
+class ClassStats:
+    __slots__ = "constructions", "failures", "key_failures", "to_dict", "batches", "batch_failures", "fields"
+
+    def __init__(self, fields):
+        self.constructions = Histogram()
+        # Failed constructions, including the ones of the fields and of the keys of the dictionaries
+        self.failures = 0
+        self.key_failures = 0
+        self.to_dict = Histogram()
+        self.batches = Histogram()
+        self.batch_failures = 0
+        self.fields = {field: FieldStats() for field in fields}
+
+    def failed(self, field: str):
+        """Records a failed construction, while validating ``field`` (None for the keys of the dictionary)."""
+        self.failures += 1
+        if field is None:
+            self.key_failures += 1
+        else:
+            self.fields[field].failures += 1
+
+    def snapshot(self) -> dict:
+        return {"constructions": self.constructions.snapshot(), "failures": self.failures,
+                "key_failures": self.key_failures, "to_dict": self.to_dict.snapshot(),
+                "batches": self.batches.snapshot(), "batch_failures": self.batch_failures,
+                "fields": {field: stats.snapshot() for field, stats in self.fields.items()}}
+
+
+def add_callback(callback: callable):
+    """Registers a function called with the statistics snapshots by ``pydto.export_stats``, e.g. to a metrics system."""
+    _callbacks.append(callback)
+
+
+def remove_callback(callback: callable):
+    _callbacks.remove(callback)
@@ -0,0 +1,108 @@
+"""
+Registry of the JSON libraries used by ``DTO.from_json`` and ``DTO.to_json``. The fastest installed library among
+orjson, ujson and rapidjson is selected at import time, falling back to the standard library ``json`` module.
+
+orjson and ujson only handle 64 bits integers: their backends hand the documents that may hold wider integers over to
+the standard library, so that every backend gives the same results.
+"""
+import json
+
+
+class JSONBackend:
+    __slots__ = "name", "loads", "dumps"
+
+    def __init__(self, name: str, loads: callable, dumps: callable):
+        """
+        :param loads: parses a JSON string (str or bytes)
+        :param dumps: ``dumps(obj, default)`` serializes ``obj`` to a JSON str, calling ``default`` for objects the
+        library cannot serialize natively
+        """
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+_backends = {}
+_backend = None
+
+
+def register_backend(name: str, loads: callable, dumps: callable):
+    _backends[name] = JSONBackend(name, loads, dumps)
+
+
+def set_backend(name: str):
+    global _backend
+    if name not in _backends:
+        raise ValueError("JSON backend '{}' is not registered (available: {})".format(name, list(_backends)))
+    _backend = _backends[name]
+
+
+def get_backend() -> JSONBackend:
+    return _backend
+
+
+def loads(json_string):
+    return _backend.loads(json_string)
+
+
+def dumps(obj, default: callable) -> str:
+    return _backend.dumps(obj, default)
+
+
+def _stdlib_dumps(obj, default: callable) -> str:
+    return json.dumps(obj, default=default, separators=(',', ':'))
+
+
+register_backend('json', json.loads, _stdlib_dumps)
+
+# Integers of 19 digits or more may not fit in 64 bits. The check is on the text (digits in strings also match), with
+# every digit translated to '0' and everything else to ' ' so that a single substring search finds them
+_DIGITS = bytes(ord('0') if ord('0') <= byte <= ord('9') else ord(' ') for byte in range(256))
+_WIDE_INTEGER = b'0' * 19
+
+
+def _int64_backend(loads: callable, dumps: callable):
+    """Wraps the functions of a library limited to 64 bits integers to fall back on the standard library."""
+    def int64_loads(json_string):
+        text = json_string.encode('utf-8') if isinstance(json_string, str) else json_string
+        if _WIDE_INTEGER in text.translate(_DIGITS):
+            return json.loads(json_string)
+        return loads(json_string)
+
+    def int64_dumps(obj, default: callable) -> str:
+        try:
+            return dumps(obj, default)
+        except (TypeError, OverflowError):
+            # Integers wider than 64 bits, objects default() cannot serialize fail again in the standard library
+            return _stdlib_dumps(obj, default)
+
+    return int64_loads, int64_dumps
+
+
+try:
+    import rapidjson
+except ImportError:
+    pass
+else:
+    register_backend('rapidjson', rapidjson.loads,
+                     lambda obj, default: rapidjson.dumps(obj, default=default, datetime_mode=rapidjson.DM_ISO8601))
+
+try:
+    import ujson
+except ImportError:
+    pass
+else:
+    register_backend('ujson', *_int64_backend(ujson.loads, lambda obj, default: ujson.dumps(obj, default=default)))
+
+try:
+    import orjson
+except ImportError:
+    pass
+else:
+    register_backend('orjson', *_int64_backend(orjson.loads,
+                                               lambda obj, default: orjson.dumps(obj, default=default).decode()))
+
+for _name in ('orjson', 'ujson', 'rapidjson', 'json'):
+    if _name in _backends:
+        set_backend(_name)
+        break
@@ -0,0 +1,168 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+# Longest JSON token that may be cut by the end of the buffer without being at its end: "-Infinity"
+_MAX_CUT_TOKEN = 10
+_NUMBER_TAIL = frozenset('0123456789.eE+-')
+
+
+class _Buffer:
+    """Text buffer over a file object that only keeps the unparsed tail of what has been read."""
+    __slots__ = "_read", "_chunk_size", "_decoder", "text", "position", "eof"
+
+    def __init__(self, fileobj, chunk_size: int):
+        self._read = fileobj.read
+        self._chunk_size = chunk_size
+        self._decoder = None
+        self.text = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size: int = None) -> bool:
+        if self.eof:
+            return False
+        while True:
+            raw = self._read(size or self._chunk_size)
+            chunk = raw
+            if isinstance(raw, bytes):
+                if self._decoder is None:
+                    self._decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = self._decoder.decode(raw, final=not raw)
+            if not raw:
+                # The end of the input is decided on the raw chunk, a short read may decode to no character
+                self.eof = True
+                if not chunk:
+                    return False
+            if chunk:
+                break
+        self.text = self.text[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def skip_whitespace(self) -> str:
+        """Returns the next non whitespace character (without consuming it) or '' at the end of the input."""
+        while True:
+            text, position = self.text, self.position
+            while position < len(text) and text[position] in _WHITESPACE:
+                position += 1
+            self.position = position
+            if position < len(text):
+                return text[position]
+            if not self.fill():
+                return ''
+
+
+def _may_be_truncated(error: json.JSONDecodeError, text: str) -> bool:
+    return len(text) - error.pos <= _MAX_CUT_TOKEN or error.msg.startswith("Unterminated string")
+
+
+def _may_continue(value, text: str, end: int) -> bool:
+    if end == len(text):
+        return True
+    # A number followed by the start of its fraction or exponent cut by the end of the buffer, e.g. "1." or "1e-"
+    return value.__class__ in (int, float) and all(char in _NUMBER_TAIL for char in text[end:])
+
+
+def iter_json_values(fileobj, chunk_size: int = 65536):
+    """
+    Incrementally parses a file object (text or binary) holding either a top-level JSON array or a sequence of JSON
+    values (e.g. JSON lines) and yields the values one at a time. Only the value being parsed is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = _Buffer(fileobj, chunk_size)
+
+    in_array = buffer.skip_whitespace() == '['
+    if in_array:
+        buffer.position += 1
+        if buffer.skip_whitespace() == ']':
+            buffer.position += 1
+            in_array = False
+
+    while True:
+        char = buffer.skip_whitespace()
+        if not char:
+            if in_array:
+                raise json.JSONDecodeError("Unterminated array", buffer.text, buffer.position)
+            return
+
+        read_size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer.text, buffer.position)
+            except json.JSONDecodeError as e:
+                # Only read more if the value may just be cut by the end of the buffer, a malformed value fails at
+                # once instead of reading the rest of the input
+                if not _may_be_truncated(e, buffer.text) or not buffer.fill(read_size):
+                    raise
+            else:
+                # A value ending with the buffer (e.g. a number) may continue in the next chunk
+                if not _may_continue(value, buffer.text, end) or not buffer.fill(read_size):
+                    break
+            read_size *= 2
+        buffer.position = end
+        yield value
+
+        if in_array:
+            char = buffer.skip_whitespace()
+            if char == ',':
+                buffer.position += 1
+            elif char == ']':
+                buffer.position += 1
+                if buffer.skip_whitespace():
+                    raise json.JSONDecodeError("Extra data", buffer.text, buffer.position)
+                return
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer.text, buffer.position)
+
+
+class AsyncLines:
+    """
+    Async iterator of the lines (bytes, with their line ending) read from an ``asyncio.StreamReader`` (or any object
+    with a ``read(n)`` coroutine) or from an async iterable of byte chunks. Chunks are only read when the lines
+    already read are consumed, so a slow consumer slows down the reads.
+    """
+
+    def __init__(self, source, chunk_size: int = 65536):
+        read = getattr(source, 'read', None)
+        if not callable(read):
+            read = None
+        self._read = (lambda: read(chunk_size)) if read is not None else None
+        self._chunks = source.__aiter__() if read is None else None
+        self._buffer = b''
+        self._position = 0
+        self._eof = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            end = self._buffer.find(b'\n', self._position)
+            if end >= 0:
+                line = self._buffer[self._position:end + 1]
+                self._position = end + 1
+                return line
+            if self._eof:
+                if self._position < len(self._buffer):
+                    line = self._buffer[self._position:]
+                    self._buffer, self._position = b'', 0
+                    return line
+                raise StopAsyncIteration
+            chunk = await self._next_chunk()
+            if chunk is None:
+                self._eof = True
+                continue
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            self._buffer = self._buffer[self._position:] + chunk
+            self._position = 0
+
+    async def _next_chunk(self):
+        """Returns the next chunk, or None at the end of the input."""
+        if self._read is not None:
+            return (await self._read()) or None
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
@@ -1,12 +1,47 @@
-import json
+import asyncio
+import base64
+import collections
+import collections.abc
+import concurrent.futures
+import datetime
+import decimal
+import dto_binary
+import dto_cache
+import dto_coercers
+import dto_errors
+import dto_records
+import dto_stats
+import enum
+import functools
+import itertools
+import json_backend
+import json_stream
+import os
+import time
 import type_checker
+import types
+import uuid
+import weakref
+from typing import Dict, List
+
+# "full" runs type checks and validators, "types" only type checks, "sampled" fully validates one object out of
+# `sample_every` and checks only the first `sample_items` items of List/Dict fields, "trusted" only coerces values
+# and materializes nested DTOs
+VALIDATION_LEVELS = ("full", "types", "sampled", "trusted")
+
+# DTO classes, whose generated code is regenerated when statistics are enabled or disabled
+_dto_classes = weakref.WeakSet()
+_stats_enabled = False
 
 
 class DTODescriptor:
-    __slots__ = "_immutable", "_type", "_field", "_validator", "_dto_class_name", "_coerce"
+    __slots__ = "_immutable", "_type", "_field", "_validator", "_dto_class_name", "_coerce", "_checker", \
+                "_check_only", "_checkers", "_slot", "_lazy", "_array", "_max_length", "_nested_dto", \
+                "_frozen", "_stats", "_validated"
 
     def __init__(self, dto_class_name: str, field: str, type_: type, immutable: bool = True,
-                 validator: callable = None, coerce: callable = None):
+                 validator: callable = None, coerce: callable = None, array=False, max_length: int = None,
+                 frozen: bool = False):
         self._dto_class_name = dto_class_name
         self._field = field
         self._type = type_
@@ -16,160 +51,1235 @@ class DTODescriptor:
                                                                                                 self._dto_class_name))
         self._validator = validator
 
+        if isinstance(coerce, str):
+            # Built-in coerce function (see dto_coercers)
+            coerce = dto_coercers.get(coerce, type_)
         if coerce and not callable(coerce):
             raise TypeError("Coerce for field '{}' of DTO class '{}' is not callable".format(field,
                                                                                              self._dto_class_name))
         self._coerce = coerce
 
+        if array and type_checker._array_item_type(type_) is None:
+            raise TypeError("Array storage of field '{}' of DTO class '{}' requires a List[int] or List[float] "
+                            "type".format(field, self._dto_class_name))
+        if array == "numpy" and type_checker.numpy is None:
+            raise ImportError("NumPy is required by the array storage of field '{}' of DTO class '{}'".format(
+                field, self._dto_class_name))
+        self._array = array
+
+        if frozen and not type_checker._is_generic(_optional_arg(type_), Dict, dict):
+            raise TypeError("Frozen storage of field '{}' of DTO class '{}' requires a Dict or dict type (or an "
+                            "Optional one)".format(field, self._dto_class_name))
+        # Stored as a read-only MappingProxyType of a copy of the dictionary (None stays None)
+        self._frozen = frozen
+
+        # Size of the str fields in record files (see dto_records)
+        if max_length is not None and not 0 < max_length <= 65535:
+            raise ValueError("Max length of field '{}' of DTO class '{}' must be between 1 and 65535".format(
+                field, self._dto_class_name))
+        self._max_length = max_length
+        # Nested DTOs are materialized by _checker, _check_only validates them without constructing them
+        self._checkers = {}
+        self._checker = self._compiled_checker("full")
+        self._check_only = self._compiled_checker("full", construct=False)
+        self._lazy = False
+        # DTO class of the DTO and Optional DTO fields, whose dictionaries try_from_dict validates field by field
+        self._nested_dto = None if array else _nested_dto_class(type_)
+        self._set_stats(None)
+
+    def _set_stats(self, stats):
+        """
+        Records the statistics of the field in ``stats`` (a ``dto_stats.FieldStats``) when values are set, replaced or
+        validated in batches, or stops recording them (None): ``_validated`` is swapped for its timed version so that
+        setting fields costs nothing more while statistics are disabled.
+        """
+        self._stats = stats
+        self._validated = self._validated_plain if stats is None else self._validated_timed
+
+    def _compiled_checker(self, level: str, construct: bool = True, max_items: int = None):
+        """Returns the checker of this field for a validation level, compiling it on first use."""
+        key = level, construct, max_items
+        checker = self._checkers.get(key)
+        if checker is None:
+            if not construct and not type_checker._contains_dto(self._type) and not self._frozen:
+                # Same checker as with construct, compiled once
+                checker = self._compiled_checker(level, True, max_items)
+            elif self._array:
+                checker = type_checker._compile_array(self._type, self._array, check=level != "trusted")
+            else:
+                checker = type_checker._compile_type(self._type, construct, level, max_items)
+                if self._frozen:
+                    checker = type_checker._compile_frozen(checker, construct)
+            self._checkers[key] = checker
+        return checker
+
     def __get__(self, instance, type):
-        if not instance._initialized_dto_descriptors[self._field]:
+        if instance is None:
+            return self
+        try:
+            return self._slot.__get__(instance, type)
+        except AttributeError:
+            if self._lazy and self._field in self._pending_values(instance):
+                return self._materialize(instance)
             raise AttributeError("Field '{}' of DTO class '{} is not Initialized".format(self._field,
                                                                                          self._dto_class_name))
-        return instance._dto_descriptors_values.get(self._field)
+
+    def _is_initialized(self, instance):
+        try:
+            self._slot.__get__(instance)
+        except AttributeError:
+            return self._lazy and self._field in self._pending_values(instance)
+        return True
+
+    @staticmethod
+    def _pending_values(instance):
+        try:
+            return instance._dto_pending
+        except AttributeError:
+            return {}
+
+    def _materialize(self, instance):
+        # The pending value has already been validated when the DTO was created
+        value = self._compiled_checker("trusted")(instance._dto_pending.pop(self._field))
+        self._slot.__set__(instance, value)
+        return value
 
     def _check_value(self, value):
         if self._validator is not None and not self._validator(value):
-            raise ValueError(
-                "{} is not a valid value for the field '{}' or DTO class {} using its validator".format(
-                    value, self._field, self._dto_class_name))
+            raise self._invalid_value(value)
 
-    def __set__(self, instance, value):
+    def _invalid_value(self, value):
+        return dto_errors.InvalidValueError(dto_errors.FieldError(dto_errors.VALIDATOR, self._field, self._type, value,
+                                                                  self._dto_class_name))
+
+    def _try_value(self, value, level: str, path: str, dto_class_name: str, errors: list):
+        """
+        Coerces, type checks and validates a value of this field like ``__set__`` (at a validation level) but appends
+        the ``FieldError`` of the failures to ``errors`` instead of raising.
+
+        :return: the validated value, or ``_INVALID``
+        """
+        if self._coerce:
+            try:
+                value = self._coerce(value)
+            except (TypeError, ValueError) as e:
+                errors.append(dto_errors.FieldError(dto_errors.COERCE, path, self._type, value, dto_class_name, e))
+                return type_checker._INVALID
+        if self._nested_dto is not None and value.__class__ is dict:
+            checked = self._nested_dto._try_build(value, level, path + '.', dto_class_name, errors)
+        else:
+            checked = self._compiled_checker(level)(value)
+            if checked is type_checker._INVALID:
+                _type_errors(self._type, value, level, path, dto_class_name, errors)
+        if checked is type_checker._INVALID:
+            return checked
+        if level == "full" and self._validator is not None and checked is not None and not self._validator(checked):
+            errors.append(dto_errors.FieldError(dto_errors.VALIDATOR, path, self._type, checked, dto_class_name))
+            return type_checker._INVALID
+        return checked
+
+    def _validate_column(self, rows, errors, level: str = "full", sample_every: int = 1, sample_items: int = None):
+        """
+        Coerces, type checks and validates the values of this field over many rows at once. Failures are recorded
+        in ``errors`` (row index -> first exception of the row) instead of being raised. Type checks and validators
+        are left out according to the validation ``level``, with "sampled" one row out of ``sample_every`` is fully
+        validated (checking ``sample_items`` items of List/Dict values) and the others are trusted.
+        """
+        field = self._field
+        column = [row[field] for _, row in rows]
+        invalid = set()
+        stats = self._stats
+        if level == "sampled":
+            checker = self._compiled_checker("full", True, sample_items)
+            trusted = self._compiled_checker("trusted")
+            if stats is not None and checker is not trusted:
+                checker = _timed(checker, stats.check)
+            checkers = [trusted if position % sample_every else checker for position in range(len(column))]
+        else:
+            checker = self._compiled_checker(level)
+            if stats is not None and checker is not type_checker._trusted:
+                checker = _timed(checker, stats.check)
+            checkers = itertools.repeat(checker)
+
+        if self._coerce:
+            coerce = self._coerce
+            if isinstance(coerce, dto_coercers.Coercer):
+                # Repeated strings of the column are converted once
+                coerce = coerce.cached()
+            if stats is not None:
+                coerce = _timed(coerce, stats.coerce)
+            for position, value in enumerate(column):
+                try:
+                    column[position] = coerce(value)
+                except (TypeError, ValueError) as e:
+                    errors.setdefault(rows[position][0], e)
+                    invalid.add(position)
+
+        for position, value, checker in zip(itertools.count(), column, checkers):
+            if position in invalid or checker is type_checker._trusted:
+                continue
+            checked = checker(value)
+            if checked is type_checker._INVALID:
+                errors.setdefault(rows[position][0], type_checker._value_not_valid_type(self, value))
+                invalid.add(position)
+            else:
+                column[position] = checked
+
+        if self._validator is not None and level in ("full", "sampled"):
+            validator = self._validator
+            if stats is not None:
+                validator = _timed(validator, stats.validator)
+            step = sample_every if level == "sampled" else 1
+            for position in range(0, len(column), step):
+                value = column[position]
+                if value is not None and position not in invalid and not validator(value):
+                    errors.setdefault(rows[position][0], self._invalid_value(value))
+                    invalid.add(position)
+
+        if stats is not None:
+            stats.failures += len(invalid)
+        return column
+
+    def _validated_plain(self, value):
+        """Coerces, type checks and validates a new value of the field."""
         if self._coerce:
             value = self._coerce(value)
 
-        if self._immutable and instance._initialized_dto_descriptors[self._field]:
+        checked = self._checker(value)
+        if checked is type_checker._INVALID:
+            type_checker._raise_value_not_valid_type(self, value)
+
+        if checked is not None:
+            self._check_value(checked)
+        return checked
+
+    def _validated_timed(self, value):
+        """``_validated_plain`` recording the coerce, type check and validator times and the failures."""
+        stats = self._stats
+        try:
+            if self._coerce:
+                start = time.perf_counter()
+                value = self._coerce(value)
+                stats.coerce.record(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            checked = self._checker(value)
+            stats.check.record(time.perf_counter() - start)
+            if checked is type_checker._INVALID:
+                type_checker._raise_value_not_valid_type(self, value)
+
+            if checked is not None and self._validator is not None:
+                start = time.perf_counter()
+                valid = self._validator(checked)
+                stats.validator.record(time.perf_counter() - start)
+                if not valid:
+                    raise self._invalid_value(checked)
+        except Exception:
+            stats.failures += 1
+            raise
+        return checked
+
+    def __set__(self, instance, value):
+        if self._immutable and self._is_initialized(instance):
             raise AttributeError("Immutable attribute '{}' of DTO class '{}' cannot be changed".format(self._field,
                                                                                                        instance.__class__.__name__))
-        _type = type_checker._check_type_dto_descriptor(self, value)
+        self._slot.__set__(instance, self._validated(value))
+        if self._lazy:
+            self._pending_values(instance).pop(self._field, None)
+
+
+def _generate_init(cls, level: str = "full", max_items: int = None, stats=None):
+    """
+    Generates a straight-line ``__init__`` for a DTO class, equivalent to ``DTO.__init__`` but with the key checks,
+    coercion, type checks and validators of every field inlined instead of going through ``setattr`` and
+    ``DTODescriptor.__set__``. Type checks and validators are left out according to the validation ``level``.
+
+    :param stats: ``dto_stats.ClassStats`` of the class, the generated code then records the construction, coercion,
+    type check and validator times and the failures in them
+    """
+    namespace = {
+        '_INVALID': type_checker._INVALID,
+        '_raise_value_not_valid_type': type_checker._raise_value_not_valid_type,
+        '_fields': frozenset(cls._dto_descriptors),
+        '_fields_mismatch': _fields_mismatch_error,
+    }
+
+    def timed(i, histogram, statement):
+        if stats is None:
+            return ["    " + statement]
+        return ["    _start_field = _clock()",
+                "    " + statement,
+                "    _field_stats_{}.{}.record(_clock() - _start_field)".format(i, histogram)]
+
+    body = []
+    if not cls._partial:
+        body.append("    if dto_dict.keys() != _fields:")
+    else:
+        body.append("    if not _fields <= dto_dict.keys():")
+    body.append("        raise _fields_mismatch(type(self), dto_dict)")
+    if cls._lazy:
+        namespace['_set_pending'] = cls._dto_pending.__set__
+        body.append("    _pending = {}")
+        body.append("    _set_pending(self, _pending)")
+
+    for i, field in enumerate(cls._dto_descriptors):
+        descriptor = cls._dto_fields[field]
+        namespace['_descriptor_{}'.format(i)] = descriptor
+        if stats is not None:
+            namespace['_field_stats_{}'.format(i)] = stats.fields[field]
+            body.append("    _field = {!r}".format(field))
+        body.append("    value = dto_dict[{!r}]".format(field))
+        if descriptor._coerce:
+            namespace['_coerce_{}'.format(i)] = descriptor._coerce
+            body.extend(timed(i, "coerce", "value = _coerce_{}(value)".format(i)))
+        if descriptor._lazy:
+            # Validated now, materialized by DTODescriptor.__get__ on first access
+            if level != "trusted":
+                namespace['_check_{}'.format(i)] = descriptor._compiled_checker(level, False, max_items)
+                body.extend(timed(i, "check", "checked = _check_{}(value)".format(i)))
+                body.append("    if checked is _INVALID:")
+                body.append("        _raise_value_not_valid_type(_descriptor_{}, value)".format(i))
+            body.append("    _pending[{!r}] = value".format(field))
+            continue
+        checker = descriptor._compiled_checker(level, True, max_items)
+        if checker is not type_checker._trusted:
+            namespace['_check_{}'.format(i)] = checker
+            body.extend(timed(i, "check", "checked = _check_{}(value)".format(i)))
+            body.append("    if checked is _INVALID:")
+            body.append("        _raise_value_not_valid_type(_descriptor_{}, value)".format(i))
+            body.append("    value = checked")
+        if descriptor._validator is not None and level == "full":
+            namespace['_validator_{}'.format(i)] = descriptor._validator
+            if stats is None:
+                body.append("    if value is not None and not _validator_{}(value):".format(i))
+            else:
+                body.extend(timed(i, "validator", "valid = value is None or _validator_{}(value)".format(i)))
+                body.append("    if not valid:")
+            body.append("        _descriptor_{}._check_value(value)".format(i))
+        namespace['_set_{}'.format(i)] = descriptor._slot.__set__
+        body.append("    _set_{}(self, value)".format(i))
+
+    lines = ["def __init__(self, dto_dict):"]
+    if stats is None:
+        lines.extend(body)
+    else:
+        namespace['_clock'] = time.perf_counter
+        namespace['_stats'] = stats
+        lines.extend(["    _start = _clock()",
+                      "    _field = None",
+                      "    try:"])
+        lines.extend("    " + line for line in body)
+        lines.extend(["    except Exception:",
+                      "        _stats.failed(_field)",
+                      "        raise",
+                      "    _stats.constructions.record(_clock() - _start)"])
+
+    code = dto_cache.compile_source("\n".join(lines), "<generated {}.__init__>".format(cls.__qualname__))
+    exec(code, namespace)
+    init = namespace['__init__']
+    init.__qualname__ = "{}.__init__".format(cls.__qualname__)
+    return init
+
+
+def _generate_to_dict(cls):
+    """
+    Generates a ``to_dict`` for a DTO class that reads the fields in declaration order and only converts back to
+    dictionaries the fields whose declared type may hold nested DTOs.
+    """
+    namespace = {'_project': _project, '_parse_paths': _parse_paths}
+    lines = ["def to_dict(self, fields=None):",
+             "    if fields is not None:",
+             "        return _project(self, _parse_paths(tuple(fields)))",
+             "    dto_dict = {}"]
+    for i, (field, descriptor) in enumerate(cls._dto_fields.items()):
+        if descriptor._array:
+            to_dict_value = _array_to_list
+        elif descriptor._frozen:
+            to_dict_value = _to_dict_value
+        else:
+            to_dict_value = _compile_to_dict_value(descriptor._type)
+        lines.append("    try:")
+        if to_dict_value is None:
+            lines.append("        dto_dict[{!r}] = self.{}".format(field, field))
+        else:
+            namespace['_to_dict_value_{}'.format(i)] = to_dict_value
+            lines.append("        dto_dict[{!r}] = _to_dict_value_{}(self.{})".format(field, i, field))
+        lines.append("    except AttributeError:")
+        lines.append("        pass")
+    lines.append("    return dto_dict")
+
+    code = dto_cache.compile_source("\n".join(lines), "<generated {}.to_dict>".format(cls.__qualname__))
+    exec(code, namespace)
+    to_dict = namespace['to_dict']
+    to_dict.__qualname__ = "{}.to_dict".format(cls.__qualname__)
+    to_dict.__doc__ = DTO.to_dict.__doc__
+    if _stats_enabled:
+        to_dict = _timed_to_dict(to_dict, cls._dto_stats.to_dict)
+    return to_dict
+
+
+def _timed(function, histogram):
+    """Wraps a one-argument function (coerce, checker, validator) with the recording of its time in ``histogram``."""
+    clock = time.perf_counter
+
+    def timed(value):
+        start = clock()
+        try:
+            return function(value)
+        finally:
+            histogram.record(clock() - start)
+
+    return timed
+
+
+def _timed_to_dict(to_dict, histogram):
+    clock = time.perf_counter
+
+    @functools.wraps(to_dict)
+    def timed_to_dict(self, fields=None):
+        start = clock()
+        dto_dict = to_dict(self, fields)
+        histogram.record(clock() - start)
+        return dto_dict
+
+    return timed_to_dict
+
+
+def enable_stats():
+    """
+    Starts recording the performance statistics of the DTO classes (see ``dto_stats``), read with ``stats()``. The
+    generated code of the DTO classes is regenerated with the instrumentation.
+    """
+    global _stats_enabled
+    _stats_enabled = True
+    for dto_class in list(_dto_classes):
+        if dto_class._dto_stats is None:
+            dto_class._dto_stats = dto_stats.ClassStats(dto_class._dto_descriptors)
+        dto_class._regenerate()
+
+
+def disable_stats():
+    """Stops recording statistics, the DTO classes get back their code without instrumentation."""
+    global _stats_enabled
+    _stats_enabled = False
+    for dto_class in list(_dto_classes):
+        dto_class._regenerate()
+
+
+def reset_stats():
+    for dto_class in list(_dto_classes):
+        if dto_class._dto_stats is not None:
+            dto_class._dto_stats = dto_stats.ClassStats(dto_class._dto_descriptors)
+            dto_class._regenerate()
+
+
+def stats() -> dict:
+    """
+    Returns a snapshot of the statistics recorded since ``enable_stats``, keyed by the "module.qualname" of the DTO
+    classes (see ``dto_stats.ClassStats.snapshot``).
+    """
+    return {'{}.{}'.format(dto_class.__module__, dto_class.__qualname__): dto_class._dto_stats.snapshot()
+            for dto_class in list(_dto_classes) if dto_class._dto_stats is not None}
+
+
+def export_stats(reset: bool = False) -> dict:
+    """
+    Passes a snapshot of the statistics to the callbacks registered with ``dto_stats.add_callback``, e.g. called
+    periodically to export them to a metrics system.
+
+    :param reset: start recording again from zero, so that each export holds the statistics since the previous one
+    """
+    snapshot = stats()
+    if reset:
+        reset_stats()
+    for callback in list(dto_stats._callbacks):
+        callback(snapshot)
+    return snapshot
+
+
+def _compile_to_dict_value(type_):
+    """Returns a function converting the nested DTOs of a value of ``type_`` to dictionaries, or None if not needed."""
+    if not type_checker._contains_dto(type_):
+        return None
+
+    if isinstance(type_, DTOMeta):
+        return _dto_to_dict
+
+    if type_checker._is_union(type_):
+        args = [arg for arg in type_checker._union_args(type_) if arg is not None.__class__]
+        if len(args) == 1:
+            # Optional
+            to_dict_value = _compile_to_dict_value(args[0])
+            return lambda value: None if value is None else to_dict_value(value)
+        return _to_dict_value
+
+    args = type_checker._generic_args(type_)
+    if type_checker._is_generic(type_, Dict, dict):
+        to_dict_value = _compile_to_dict_value(args[1]) or _to_dict_value
+        return lambda value: {k: to_dict_value(v) for k, v in value.items()}
+
+    to_dict_value = _compile_to_dict_value(args[0])
+    return lambda value: [to_dict_value(v) for v in value]
+
+
+def _dto_to_dict(dto):
+    return dto.to_dict()
+
+
+def _array_to_list(value):
+    return value.tolist()
 
-        if _type is type(None):
-            instance._dto_descriptors_values[self._field] = None
 
+@functools.lru_cache(maxsize=256)
+def _parse_paths(fields: tuple) -> dict:
+    """Parses projection paths such as ``("name", "address.city")`` into a tree of fields (None for whole fields)."""
+    tree = {}
+    for path in fields:
+        node = tree
+        *parents, leaf = path.split('.')
+        for parent in parents:
+            if parent in node and node[parent] is None:
+                break
+            node = node.setdefault(parent, {})
         else:
-            self._check_value(value)
-            instance._dto_descriptors_values[self._field] = value
+            node[leaf] = None
+    return tree
+
+
+def _project(value, tree: dict, path: str = ''):
+    if value is None:
+        return None
+    if value.__class__ is list:
+        return [_project(v, tree, path) for v in value]
+    if value.__class__ is dict or value.__class__ is types.MappingProxyType:
+        return {k: _project(v, tree, path) for k, v in value.items()}
+    if not isinstance(value, DTO):
+        raise KeyError("Field '{}' is not a DTO, it has no field '{}'".format(path[:-1], path + next(iter(tree))))
+
+    dto_dict = {}
+    for field, subtree in tree.items():
+        if field not in value._dto_fields:
+            raise KeyError("DTO class '{}' has no field '{}'".format(value.__class__.__qualname__, path + field))
+        field_value = getattr(value, field)
+        dto_dict[field] = _to_dict_value(field_value) if subtree is None else \
+            _project(field_value, subtree, path + field + '.')
+    return dto_dict
+
+
+def _sampled_init(full_init, trusted_init, sample_every: int):
+    counter = itertools.count()
+
+    def __init__(self, dto_dict):
+        if next(counter) % sample_every:
+            trusted_init(self, dto_dict)
+        else:
+            full_init(self, dto_dict)
+
+    return __init__
+
+
+def _chunks(iterable, chunksize: int):
+    """Yields ``(offset, chunk)`` tuples of consecutive lists of at most ``chunksize`` items."""
+    iterator = iter(iterable)
+    for offset in itertools.count(0, chunksize):
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield offset, chunk
+
+
+def _from_dicts_chunk(dto_class, offset: int, dicts: list, validate: str):
+    # Runs in the worker processes of DTO.parallel_from_dicts
+    dtos, errors = dto_class.from_dicts(dicts, validate)
+    return dtos, [(offset + index, error) for index, error in errors]
+
+
+def _from_json_lines_chunk(dto_class, offset: int, lines: list, validate: str):
+    # Runs in the worker processes of DTO.parallel_from_json_lines
+    dtos, errors = dto_class.from_json_lines(lines, validate)
+    return dtos, [(offset + index, error) for index, error in errors]
+
+
+def _from_json_lines_batch(dto_class, lines: list, validate: str) -> list:
+    """
+    Builds the DTOs of a batch of JSON lines for ``DTO.aiter_json_lines``, possibly in an executor. The exception of
+    an invalid line takes its place in the returned list.
+    """
+    results = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            results.append(dto_class.from_json(line, validate))
+        except (TypeError, ValueError, AssertionError) as e:
+            results.append(e)
+    return results
+
+
+class _AsyncDTOIterator:
+    """Async iterator of the DTOs built out of async JSON lines, returned by ``DTO.aiter_json_lines``."""
+
+    def __init__(self, dto_class, lines, validate: str, executor, batch_size: int):
+        self._dto_class = dto_class
+        self._lines = lines
+        self._validate = validate
+        self._executor = executor
+        self._batch_size = batch_size if executor is not None else 1
+        self._results = collections.deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._results:
+            lines = []
+            async for line in self._lines:
+                lines.append(line)
+                if len(lines) >= self._batch_size:
+                    break
+            if not lines:
+                raise StopAsyncIteration
+            if self._executor is None:
+                results = _from_json_lines_batch(self._dto_class, lines, self._validate)
+            else:
+                results = await asyncio.get_event_loop().run_in_executor(
+                    self._executor, _from_json_lines_batch, self._dto_class, lines, self._validate)
+            self._results.extend(results)
+        result = self._results.popleft()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _restore(dto_class, values: dict):
+    """Unpickles a DTO: its values were validated when it was created, they are not coerced or checked again."""
+    obj = object.__new__(dto_class)
+    fields = dto_class._dto_fields
+    for field, value in values.items():
+        descriptor = fields[field]
+        if descriptor._frozen and value is not None:
+            value = types.MappingProxyType(value)
+        descriptor._slot.__set__(obj, value)
+    return obj
+
+
+def _is_immutable(type_) -> bool:
+    """Returns whether values of ``type_`` have no mutable field, in nested DTOs (and their unions, lists...) too."""
+    if isinstance(type_, DTOMeta):
+        return all(descriptor._immutable and _is_immutable(descriptor._type)
+                   for descriptor in type_._dto_fields.values())
+    if type_checker._is_union(type_):
+        return all(_is_immutable(arg) for arg in type_checker._union_args(type_))
+    if type_checker._is_generic(type_, Dict, dict) or type_checker._is_generic(type_, List, list):
+        return all(_is_immutable(arg) for arg in type_checker._generic_args(type_) or ())
+    return True
+
 
-        instance._initialized_dto_descriptors[self._field] = True
+def _holds_containers(type_) -> bool:
+    """Returns whether values of ``type_`` may hold mutable lists, dicts or arrays, nested DTOs included."""
+    if isinstance(type_, DTOMeta):
+        return any(_field_holds_containers(descriptor) for descriptor in type_._dto_fields.values())
+    if type_checker._is_union(type_):
+        return any(_holds_containers(arg) for arg in type_checker._union_args(type_))
+    return type_ in (list, dict) or type_checker._is_generic(type_, Dict, dict) or \
+        type_checker._is_generic(type_, List, list)
+
+
+def _field_holds_containers(descriptor) -> bool:
+    if descriptor._array:
+        return True
+    if descriptor._frozen:
+        # Read-only mapping proxies, only their values may be mutable
+        args = type_checker._generic_args(_optional_arg(descriptor._type))
+        return args is None or _holds_containers(args[1])
+    return _holds_containers(descriptor._type)
+
+
+def _optional_arg(type_):
+    """Returns the type of the values of an ``Optional`` type that are not None, ``type_`` for other types."""
+    if type_checker._is_union(type_):
+        args = [arg for arg in type_checker._union_args(type_) if arg is not None.__class__]
+        if len(args) == 1:
+            return args[0]
+    return type_
+
+
+def _fields_mismatch(dto_class, dto_dict, path: str = '', dto_class_name: str = None) -> list:
+    """Returns the "missing" and "unexpected" (unless partial) ``FieldError`` of the keys of a dictionary."""
+    dto_class_name = dto_class_name or dto_class.__name__
+    fields = dto_class._dto_fields
+    errors = [dto_errors.FieldError(dto_errors.MISSING, path + field, descriptor._type, None, dto_class_name)
+              for field, descriptor in fields.items() if field not in dto_dict]
+    if not dto_class._partial:
+        errors.extend(dto_errors.FieldError(dto_errors.UNEXPECTED, '{}{}'.format(path, key), None, value,
+                                            dto_class_name)
+                      for key, value in dto_dict.items() if key not in fields)
+    return errors
+
+
+def _fields_mismatch_error(dto_class, dto_dict):
+    return dto_errors.FieldsMismatchError(*_fields_mismatch(dto_class, dto_dict))
+
+
+def _nested_dto_class(type_):
+    """Returns the DTO class of a DTO or ``Optional`` DTO type, None for other types."""
+    type_ = _optional_arg(type_)
+    return type_ if isinstance(type_, DTOMeta) else None
+
+
+@functools.lru_cache(maxsize=256)
+def _type_checker(type_, level: str):
+    return type_checker._compile_type(type_, construct=False, level=level)
+
+
+def _type_errors(type_, value, level: str, path: str, dto_class_name: str, errors: list):
+    """
+    Appends to ``errors`` the failures of a value that does not match ``type_``, for ``try_from_dict``: the failures
+    of its nested DTOs and of the items of its List and Dict values are reported with their own paths (e.g.
+    ``cars.1.year``), other values get a "type" failure.
+    """
+    count = len(errors)
+    dto_class = _nested_dto_class(type_)
+    if dto_class is not None and value.__class__ is dict:
+        dto_class._try_build(value, level, path + '.', dto_class_name, errors)
+    else:
+        container_type = _optional_arg(type_)
+        args = type_checker._generic_args(container_type)
+        if args is None:
+            pass
+        elif value.__class__ is list and type_checker._is_generic(container_type, List, list):
+            for i, item in enumerate(value):
+                if _type_checker(args[0], level)(item) is type_checker._INVALID:
+                    _type_errors(args[0], item, level, '{}.{}'.format(path, i), dto_class_name, errors)
+        elif value.__class__ is dict and type_checker._is_generic(container_type, Dict, dict):
+            for key, item in value.items():
+                item_path = '{}.{}'.format(path, key)
+                if _type_checker(args[0], level)(key) is type_checker._INVALID:
+                    errors.append(dto_errors.FieldError(dto_errors.TYPE, item_path, args[0], key, dto_class_name))
+                elif _type_checker(args[1], level)(item) is type_checker._INVALID:
+                    _type_errors(args[1], item, level, item_path, dto_class_name, errors)
+    if len(errors) == count:
+        errors.append(dto_errors.FieldError(dto_errors.TYPE, path, type_, value, dto_class_name))
 
 
 class DTOMeta(type):
 
-    def __init__(cls, name, bases, namespace, partial: bool = False):
+    def __init__(cls, name, bases, namespace, partial: bool = False, lazy: bool = False, validate: str = "full",
+                 sample_every: int = 1, sample_items: int = None, intern: int = None):
         super().__init__(name, bases, namespace)
 
-    def __new__(cls, name, bases, class_dict, partial: bool = False):
+    def __new__(cls, name, bases, class_dict, partial: bool = False, lazy: bool = False, validate: str = "full",
+                sample_every: int = 1, sample_items: int = None, intern: int = None):
+        if validate not in VALIDATION_LEVELS:
+            raise ValueError("Validation level '{}' of DTO class '{}' is not one of {}".format(validate, name,
+                                                                                              VALIDATION_LEVELS))
+        if not isinstance(sample_every, int) or sample_every < 1:
+            raise ValueError("Sampling rate sample_every of DTO class '{}' must be an int >= 1, not {!r}".format(
+                name, sample_every))
+        if sample_items is not None and (not isinstance(sample_items, int) or sample_items < 0):
+            raise ValueError("Number of checked items sample_items of DTO class '{}' must be None or an int >= 0, "
+                             "not {!r}".format(name, sample_items))
 
         descriptors = {k: v for k, v in class_dict.items() if isinstance(v, tuple)}
         _ = [class_dict.pop(k, None) for k in descriptors]
 
-        class_dict['__slots__'] = set(list(descriptors.keys()) + ['_dto_descriptors',
-                                                                  '_initialized_dto_descriptors',
-                                                                  '_dto_descriptors_values',
-                                                                  '_field_validators',
-                                                                  '_partial'])
+        # Field values are stored in real slots, an unset slot marks a field that is not initialized
+        class_dict['__slots__'] = tuple(descriptors)
+        if lazy:
+            # Validated values of the nested DTO fields that are not materialized yet
+            class_dict['__slots__'] += ('_dto_pending',)
 
         new_type = type.__new__(cls, name, bases, class_dict)
         new_type._dto_descriptors = descriptors
+        new_type._dto_slots = tuple(new_type.__dict__[attr] for attr in descriptors)
+        new_type._dto_fields = {}
         new_type._field_validators = {}
         new_type._partial = partial
-        for attr in new_type._dto_descriptors:
+        new_type._lazy = lazy
+        new_type._validate = validate
+        new_type._sample_every = sample_every
+        new_type._sample_items = sample_items
+        new_type._dto_initializers = {}
+        new_type._dto_generated = frozenset(method for method in ('__init__', 'to_dict') if method not in class_dict)
+        new_type._dto_stats = dto_stats.ClassStats(descriptors) if _stats_enabled else None
+        for attr, slot in zip(new_type._dto_descriptors, new_type._dto_slots):
             attr_type = new_type._dto_descriptors[attr][0]
             descriptor_args = {}
             if len(new_type._dto_descriptors[attr]) > 1:
                 descriptor_args = new_type._dto_descriptors[attr][1]
-            setattr(new_type, attr, DTODescriptor(dto_class_name=name, field=attr, type_=attr_type, **descriptor_args))
+            descriptor = DTODescriptor(dto_class_name=name, field=attr, type_=attr_type, **descriptor_args)
+            descriptor._slot = slot
+            descriptor._lazy = lazy and descriptor._validator is None and type_checker._contains_dto(attr_type)
+            # The slots stay the class attributes so that reading a field is a plain slot read, writes go through
+            # the descriptor in DTO.__setattr__
+            new_type._dto_fields[attr] = descriptor
+        new_type._regenerate()
+
+        immutable = _is_immutable(new_type)
+        if not immutable:
+            # Only DTOs whose fields (nested DTOs included) can not change are hashable
+            new_type.__hash__ = None
+        if intern and not immutable:
+            raise ValueError("DTO class '{}' has mutable fields and cannot be interned".format(name))
+        if intern and _holds_containers(new_type):
+            # Interned DTOs are shared, changing a list of one would change all of them (and their cache key)
+            raise ValueError("DTO class '{}' has list, dict or array fields and cannot be interned".format(name))
+        # Bounded LRU cache of the DTOs built by from_dict, keyed by their (frozen) dictionary
+        new_type._intern_size = intern
+        new_type._intern_cache = collections.OrderedDict() if intern else None
+        _dto_classes.add(new_type)
         return new_type
 
+    def _regenerate(cls):
+        """(Re)generates the ``__init__`` and ``to_dict`` of the class, unless they are defined by the class."""
+        cls._dto_initializers = {}
+        if '__init__' in cls._dto_generated:
+            cls.__init__ = cls._dto_initializer(cls._validate)
+        if 'to_dict' in cls._dto_generated:
+            cls.to_dict = _generate_to_dict(cls)
+        stats = cls._dto_stats if _stats_enabled else None
+        for field, descriptor in cls._dto_fields.items():
+            descriptor._set_stats(None if stats is None else stats.fields[field])
+
     def __instancecheck__(self, inst):
-        if type(inst) == type(self):
+        if type.__instancecheck__(self, inst):
             return True
-        if isinstance(inst, dict):
-            # Comparing a dictionary and a DTO
-            if not self._partial:
-                if len(inst.keys()) != len(self._dto_descriptors.keys()):
-                    return False
-                for k, v in inst.items():
-                    try:
-                        type_checker._check_type(self._dto_descriptors[k][0], v)
-                    except TypeError:
-                        return False
-            else:
-                for k in self._dto_descriptors.keys():
-                    try:
-                        type_checker._check_type(self._dto_descriptors[k][0], inst[k])
-                    except (TypeError, KeyError):
-                        return False
-            return True
-        return False
+        # Comparing a dictionary and a DTO
+        if not isinstance(inst, dict):
+            return False
+        if self._intern_cache is not None and self._validate == "full":
+            try:
+                if (None, _freeze(inst)) in self._intern_cache:
+                    return True
+            except TypeError:
+                pass
+        return self._dto_validate(inst)
 
 
 class DTO(metaclass=DTOMeta):
 
-    def __new__(cls, *args, **kwargs):
-        obj = super(DTO, cls).__new__(cls)
-        obj._initialized_dto_descriptors = dict()
-        obj._dto_descriptors_values = dict()
-        for attr in obj._dto_descriptors:
-            obj._initialized_dto_descriptors[attr] = False
+    @classmethod
+    def from_dict(cls, dictionary: dict, validate: str = None):
+        """
+        :param validate: validation level (see ``VALIDATION_LEVELS``) used instead of the one of the class
+        """
+        if cls._intern_cache is not None:
+            return cls._from_dict_interned(dictionary, validate)
+        if validate is None:
+            return cls(dictionary)
+        obj = object.__new__(cls)
+        cls._dto_initializer(validate)(obj, dictionary)
         return obj
 
     @classmethod
-    def from_dict(cls, dictionary: dict):
-        return cls(dictionary)
+    def try_from_dict(cls, dictionary: dict, validate: str = None):
+        """
+        Version of ``from_dict`` that does not raise for invalid dictionaries: all the failures of the dictionary,
+        nested DTOs included, are collected as ``dto_errors.FieldError`` objects (path, expected type, value and
+        reason) whose messages are only formatted when read. With the "sampled" level the dictionary is fully
+        validated.
+
+        :return: a tuple of the DTO (None if the dictionary is invalid) and the list of the failures
+        """
+        level = cls._validate if validate is None else validate
+        if level not in VALIDATION_LEVELS:
+            raise ValueError("Validation level '{}' is not one of {}".format(level, VALIDATION_LEVELS))
+        errors = []
+        dto = cls._try_build(dictionary, "full" if level == "sampled" else level, '', cls.__name__, errors)
+        return None if dto is type_checker._INVALID else dto, errors
 
     @classmethod
-    def from_json(cls, json_string: str):
-        dict_ = json.loads(json_string)
-        return cls.from_dict(dict_)
+    def _try_build(cls, dto_dict, level: str, path: str, dto_class_name: str, errors: list):
+        """Builds a DTO for ``try_from_dict``, returns ``_INVALID`` after appending the failures to ``errors``."""
+        if not isinstance(dto_dict, dict):
+            errors.append(dto_errors.FieldError(dto_errors.TYPE, path[:-1], cls, dto_dict, dto_class_name))
+            return type_checker._INVALID
+        count = len(errors)
+        fields = cls._dto_fields
+        if (dto_dict.keys() != fields.keys()) if not cls._partial else not (fields.keys() <= dto_dict.keys()):
+            errors.extend(_fields_mismatch(cls, dto_dict, path, dto_class_name))
+        obj = object.__new__(cls)
+        for field, descriptor in fields.items():
+            if field not in dto_dict:
+                continue
+            value = descriptor._try_value(dto_dict[field], level, path + field, dto_class_name, errors)
+            if value is not type_checker._INVALID:
+                descriptor._slot.__set__(obj, value)
+        return obj if len(errors) == count else type_checker._INVALID
 
-    def __setattr__(self, attr, val):
+    @classmethod
+    def _from_dict_interned(cls, dictionary: dict, validate: str):
+        cache = cls._intern_cache
         try:
-            obj = object.__getattribute__(self, attr)
-        except AttributeError:
-            object.__setattr__(self, attr, val)
+            key = validate, _freeze(dictionary)
+            dto = cache.get(key)
+        except TypeError:
+            # Unhashable values
+            key = dto = None
+        if dto is not None:
+            cache.move_to_end(key)
+            return dto
+
+        if validate is None:
+            dto = cls(dictionary)
         else:
-            if hasattr(obj, '__set__'):
-                obj.__set__(self, val)
+            dto = object.__new__(cls)
+            cls._dto_initializer(validate)(dto, dictionary)
+        if key is not None:
+            cache[key] = dto
+            if len(cache) > cls._intern_size:
+                cache.popitem(last=False)
+        return dto
+
+    @classmethod
+    def from_json(cls, json_string: str, validate: str = None):
+        dict_ = json_backend.loads(json_string)
+        return cls.from_dict(dict_, validate)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Decodes a DTO encoded by ``to_bytes``, the values are not validated again."""
+        return dto_binary.from_bytes(cls, data)
+
+    @classmethod
+    def dump_many(cls, dtos, fileobj):
+        """Writes DTOs of the class in the binary format of ``to_bytes`` to a binary file object."""
+        dto_binary.dump_many(cls, dtos, fileobj)
+
+    @classmethod
+    def load_many(cls, fileobj):
+        """Streams the DTOs written by ``dump_many`` out of a binary file object."""
+        return dto_binary.load_many(cls, fileobj)
+
+    @classmethod
+    def write_records(cls, dtos, path: str) -> int:
+        """
+        Writes DTOs of the class to a fixed-layout record file, read back by ``open_records``.
+
+        :return: the number of records written
+        """
+        return dto_records.write_records(cls, dtos, path)
+
+    @classmethod
+    def open_records(cls, path: str):
+        """
+        Memory-maps a record file written by ``write_records``. The returned ``RecordFile`` is a sequence of
+        read-only views decoding the fields of the records when they are read.
+        """
+        return dto_records.RecordFile(cls, path)
+
+    @classmethod
+    def _dto_initializer(cls, level: str):
+        """Returns the generated ``__init__`` of the class for a validation level."""
+        initializer = cls._dto_initializers.get(level)
+        if initializer is None:
+            if level not in VALIDATION_LEVELS:
+                raise ValueError("Validation level '{}' is not one of {}".format(level, VALIDATION_LEVELS))
+            stats = cls._dto_stats if _stats_enabled else None
+            if level == "sampled":
+                initializer = _sampled_init(_generate_init(cls, "full", cls._sample_items, stats),
+                                            cls._dto_initializer("trusted"), cls._sample_every)
+                initializer.__qualname__ = "{}.__init__".format(cls.__qualname__)
             else:
-                object.__setattr__(self, attr, val)
+                initializer = _generate_init(cls, level, stats=stats)
+            cls._dto_initializers[level] = initializer
+        return initializer
+
+    @classmethod
+    def _dto_validate(cls, dto_dict: dict, level: str = "full") -> bool:
+        """Returns whether ``from_dict`` would accept the dictionary, without constructing anything."""
+        fields = cls._dto_fields
+        if (dto_dict.keys() != fields.keys()) if not cls._partial else not (fields.keys() <= dto_dict.keys()):
+            return False
+        for field, descriptor in fields.items():
+            value = dto_dict[field]
+            if descriptor._coerce:
+                try:
+                    value = descriptor._coerce(value)
+                except (TypeError, ValueError):
+                    return False
+            if descriptor._compiled_checker(level, construct=False)(value) is type_checker._INVALID:
+                return False
+            if level == "full" and descriptor._validator is not None and value is not None and \
+                    not descriptor._validator(value):
+                return False
+        return True
+
+    @classmethod
+    def iter_json(cls, fileobj, chunk_size: int = 65536, validate: str = None):
+        """
+        Streams DTOs out of a file object holding a top-level JSON array or JSON lines, parsing the file incrementally
+        so that only one record is held in memory at a time.
+        """
+        for dict_ in json_stream.iter_json_values(fileobj, chunk_size):
+            yield cls.from_dict(dict_, validate)
+
+    @classmethod
+    def aiter_json_lines(cls, source, validate: str = None, executor=None, batch_size: int = 1000):
+        """
+        Async version of ``iter_json`` for JSON lines: ``async for dto in UserDTO.aiter_json_lines(reader)`` reads an
+        ``asyncio.StreamReader`` (or any object with a ``read(n)`` coroutine, or async iterable of byte chunks) only
+        as fast as the DTOs are consumed. Blank lines are skipped, an invalid line raises its exception and the
+        iteration can go on with the next lines.
+
+        :param executor: ``concurrent.futures`` executor parsing and validating batches of ``batch_size`` lines off
+        the event loop. DTO classes validated in a ``ProcessPoolExecutor`` must be defined at the top level of a
+        module. Without executor the lines are processed one at a time on the event loop.
+        """
+        return _AsyncDTOIterator(cls, json_stream.AsyncLines(source), validate, executor, batch_size)
+
+    @classmethod
+    def from_dicts(cls, dicts, validate: str = None):
+        """
+        Bulk version of ``from_dict``. The values of each field are validated together over all the dictionaries
+        (column-wise) and invalid rows do not abort the batch.
+
+        :param validate: validation level (see ``VALIDATION_LEVELS``) used instead of the one of the class
+        :return: a tuple of the list of DTOs built from the valid dictionaries (in input order) and a list of
+        ``(index, exception)`` tuples for the dictionaries that failed validation
+        """
+        return cls._from_rows(list(enumerate(dicts)), {}, validate)
+
+    @classmethod
+    def from_json_lines(cls, lines, validate: str = None):
+        """
+        Bulk version of ``from_json`` for JSON-lines input (any iterable of lines, e.g. an open file). Blank lines
+        are skipped, error indices are the 0-based line numbers.
+
+        :return: see ``from_dicts``
+        """
+        rows, errors = [], {}
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                rows.append((index, json_backend.loads(line)))
+            except ValueError as e:
+                errors[index] = e
+        return cls._from_rows(rows, errors, validate)
+
+    @classmethod
+    def parallel_from_dicts(cls, dicts, workers: int = None, chunksize: int = 10000, validate: str = None):
+        """
+        ``from_dicts`` run over chunks of ``chunksize`` dictionaries in a pool of ``workers`` processes (by default
+        one per CPU). The DTO class must be importable by the workers, i.e. defined at the top level of a module, and
+        the dictionaries picklable.
+
+        :return: see ``from_dicts``, the DTOs and errors are in input order
+        """
+        return cls._parallel(_from_dicts_chunk, dicts, workers, chunksize, validate)
+
+    @classmethod
+    def parallel_from_json_lines(cls, lines, workers: int = None, chunksize: int = 10000, validate: str = None):
+        """
+        ``from_json_lines`` run over chunks of ``chunksize`` lines in a pool of ``workers`` processes, the lines are
+        parsed by the workers as well.
+
+        :return: see ``from_dicts``
+        """
+        return cls._parallel(_from_json_lines_chunk, lines, workers, chunksize, validate)
+
+    @classmethod
+    def _parallel(cls, from_chunk, items, workers: int, chunksize: int, validate: str):
+        if chunksize < 1:
+            raise ValueError("Chunk size must be at least 1")
+        dtos, errors = [], []
+        # Only a bounded window of chunks is submitted at a time, the input is read (and pickled) as the results
+        # come back instead of all at once
+        window = 2 * (workers or os.cpu_count() or 1)
+        futures = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            for offset, chunk in _chunks(items, chunksize):
+                futures.append(executor.submit(from_chunk, cls, offset, chunk, validate))
+                if len(futures) >= window:
+                    chunk_dtos, chunk_errors = futures.popleft().result()
+                    dtos.extend(chunk_dtos)
+                    errors.extend(chunk_errors)
+            for future in futures:
+                chunk_dtos, chunk_errors = future.result()
+                dtos.extend(chunk_dtos)
+                errors.extend(chunk_errors)
+        return dtos, errors
+
+    @classmethod
+    def _from_rows(cls, rows, errors, validate: str = None):
+        if _stats_enabled:
+            start = time.perf_counter()
+        rows, columns = cls._validate_rows(rows, errors, validate)
+        dtos = [cls._from_validated(values)
+                for (index, _), values in zip(rows, zip(*columns)) if index not in errors]
+        if _stats_enabled:
+            cls._dto_stats.batches.record(time.perf_counter() - start)
+            cls._dto_stats.batch_failures += len(errors)
+        return dtos, sorted(errors.items(), key=lambda error: error[0])
+
+    @classmethod
+    def _validate_rows(cls, rows, errors, validate: str = None):
+        """
+        Validates ``(index, dictionary)`` rows column-wise, recording failures in ``errors``, at the ``validate``
+        level (by default the one of the class).
+
+        :return: the rows whose keys match the fields and one list of validated values per field (in the fields
+        declaration order), aligned on these rows. Values of the rows that failed validation are left as they are.
+        """
+        level = cls._validate if validate is None else validate
+        if level not in VALIDATION_LEVELS:
+            raise ValueError("Validation level '{}' is not one of {}".format(level, VALIDATION_LEVELS))
+        fields = frozenset(cls._dto_descriptors)
+        for index, row in rows:
+            if not isinstance(row, dict):
+                errors[index] = dto_errors.InvalidTypeError(dto_errors.FieldError(dto_errors.TYPE, '', dict, row,
+                                                                                  cls.__name__))
+            elif (row.keys() != fields) if not cls._partial else not (fields <= row.keys()):
+                errors[index] = _fields_mismatch_error(cls, row)
+        if errors:
+            rows = [(index, row) for index, row in rows if index not in errors]
 
-    def __getattribute__(self, attr):
-        obj = object.__getattribute__(self, attr)
-        if hasattr(obj, '__get__'):
-            return obj.__get__(self, type(self))
+        columns = [cls._dto_fields[field]._validate_column(rows, errors, level, cls._sample_every, cls._sample_items)
+                   for field in cls._dto_descriptors]
+        return rows, columns
+
+    @classmethod
+    def _from_validated(cls, values):
+        """Builds a DTO from already coerced and validated field values, given in the fields declaration order."""
+        obj = object.__new__(cls)
+        for slot, value in zip(cls._dto_slots, values):
+            slot.__set__(obj, value)
         return obj
 
-    def __init__(self, dto_dict: dict):
-        if not self._partial:
-            assert set(dto_dict.keys()) == set(self._dto_descriptors.keys()), \
-                "DTO {} fields {} mismatch the dictionary keys {}".format(self.__class__.__qualname__,
-                                                                          list(self._dto_descriptors.keys()),
-                                                                          list(dto_dict.keys()))
+    def replace(self, **changes):
+        """
+        Returns a copy of the DTO with the given fields changed, immutable fields included. Only the new values are
+        coerced and validated (by their descriptor, as when setting a field), the values of the other fields, nested
+        DTOs included, are shared with this DTO.
+        """
+        cls = type(self)
+        fields = cls._dto_fields
+        for field in changes:
+            if field not in fields:
+                raise TypeError("DTO class '{}' has no field '{}'".format(cls.__name__, field))
+        obj = object.__new__(cls)
+        for slot in cls._dto_slots:
+            try:
+                slot.__set__(obj, slot.__get__(self, cls))
+            except AttributeError:
+                pass
+        if cls._lazy:
+            pending = DTODescriptor._pending_values(self)
+            cls._dto_pending.__set__(obj, {field: value for field, value in pending.items() if field not in changes})
+        for field, value in changes.items():
+            descriptor = fields[field]
+            descriptor._slot.__set__(obj, descriptor._validated(value))
+        return obj
+
+    evolve = replace
+
+    def diff(self, other) -> dict:
+        """
+        Returns the fields whose values differ between this DTO and another one of the same class, as a dictionary of
+        ``(value, other value)`` tuples (None for a field that is not initialized). Values shared between the DTOs,
+        e.g. by ``replace``, are not compared.
+        """
+        if type(other) is not type(self):
+            raise TypeError("Cannot diff DTO of class '{}' with '{}'".format(type(self).__qualname__, other))
+        changes = {}
+        for field in self._dto_fields:
+            value, other_value = getattr(self, field, None), getattr(other, field, None)
+            if value is other_value:
+                continue
+            if isinstance(value, type_checker._ARRAY_TYPES) and isinstance(other_value, type_checker._ARRAY_TYPES):
+                # NumPy arrays compare element-wise
+                if value.tolist() == other_value.tolist():
+                    continue
+            elif value == other_value:
+                continue
+            changes[field] = value, other_value
+        return changes
+
+    def _dto_values(self):
+        """Returns the values of the initialized fields, in the fields declaration order."""
+        values = {}
+        for k, descriptor in self._dto_fields.items():
+            try:
+                values[k] = descriptor.__get__(self, type(self))
+            except AttributeError:
+                pass
+        return values
+
+    def __setattr__(self, attr, val):
+        descriptor = self._dto_fields.get(attr)
+        if descriptor is not None:
+            descriptor.__set__(self, val)
         else:
-            assert set(self._dto_descriptors.keys()) < set(dto_dict.keys()), \
-                "Partial DTO {} fields {} are missing in the dictionary keys".format(self.__class__.__qualname__,
-                                                                                     set(self._dto_descriptors.keys())
-                                                                                     > set(dto_dict.keys()))
+            object.__setattr__(self, attr, val)
+
+    def __delattr__(self, attr):
+        if attr in self._dto_fields:
+            raise AttributeError("Field '{}' of DTO class '{}' cannot be deleted".format(attr,
+                                                                                        self.__class__.__name__))
+        object.__delattr__(self, attr)
+
+    def __getattr__(self, attr):
+        # Only called when the normal lookup failed, i.e. for fields whose slot is not set yet
+        descriptor = self._dto_fields.get(attr)
+        if descriptor is not None:
+            return descriptor.__get__(self, type(self))
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, attr))
+
+    def __init__(self, dto_dict: dict):
+        if (set(dto_dict.keys()) != set(self._dto_descriptors.keys())) if not self._partial else \
+                not (set(self._dto_descriptors.keys()) <= set(dto_dict.keys())):
+            raise _fields_mismatch_error(type(self), dto_dict)
 
         for k in self._dto_descriptors.keys():
 
             setattr(self, k, dto_dict[k])
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
+        """
+        Converts the DTO (and its nested DTOs) to a dictionary of its initialized fields.
+
+        :param fields: only include these fields, nested fields are selected with dotted paths (e.g. "address.city")
+        """
+        if fields is not None:
+            return _project(self, _parse_paths(tuple(fields)))
         dto_dict = {}
-        for k, v in self._dto_descriptors_values.items():
-            if issubclass(v.__class__, DTO):
-                dto_dict[k] = v.to_dict()
-            else:
-                dto_dict[k] = v
+        for k, v in self._dto_values().items():
+            dto_dict[k] = _to_dict_value(v)
         return dto_dict
 
+    def as_mapping(self):
+        """Returns a read-only ``Mapping`` view of the initialized fields of the DTO, without copying them."""
+        return DTOMapping(self)
+
+    def to_json(self) -> str:
+        """Serializes the DTO with the current JSON backend, straight from the field values (no nested ``to_dict``)."""
+        return json_backend.dumps(self._dto_values(), _json_default)
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the DTO in a compact binary format: the values are written positionally according to the declared
+        types, after a fingerprint of the schema of the class checked by ``from_bytes``.
+        """
+        return dto_binary.to_bytes(self)
+
     def __str__(self):
-        return '{}({})'.format(self.__class__.__qualname__, str(self._dto_descriptors_values))
+        return '{}({})'.format(self.__class__.__qualname__, str(self._dto_values()))
 
     def __repr__(self):
         return str(self)
 
+    def __reduce__(self):
+        # Mapping proxies (frozen fields) cannot be pickled, they are restored from dictionaries
+        values = {field: dict(value) if value.__class__ is types.MappingProxyType else value
+                  for field, value in self._dto_values().items()}
+        return _restore, (type(self), values)
+
+    def __hash__(self):
+        return hash((type(self), tuple(_freeze(v, typed=False) for v in self._dto_values().values())))
+
     def __eq__(self, other):
         if type(self) != type(other):
             return False
@@ -178,7 +1288,87 @@ class DTO(metaclass=DTOMeta):
             return False
 
         for k in self._dto_descriptors:
-            if getattr(self, k) != getattr(other, k):
+            value, other_value = getattr(self, k), getattr(other, k)
+            if isinstance(value, type_checker._ARRAY_TYPES):
+                # NumPy arrays compare element-wise
+                if value.tolist() != other_value.tolist():
+                    return False
+            elif value != other_value:
                 return False
 
         return True
+
+
+def _json_default(value):
+    if isinstance(value, DTO):
+        return value._dto_values()
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, type_checker._ARRAY_TYPES):
+        return value.tolist()
+    if isinstance(value, types.MappingProxyType):
+        return dict(value)
+    raise TypeError("Value '{}' of type '{}' is not JSON serializable".format(value, type(value)))
+
+
+class DTOMapping(collections.abc.Mapping):
+    __slots__ = "_dto",
+
+    def __init__(self, dto: DTO):
+        self._dto = dto
+
+    def __getitem__(self, key):
+        descriptor = self._dto._dto_fields.get(key)
+        if descriptor is None:
+            raise KeyError(key)
+        try:
+            return descriptor.__get__(self._dto, type(self._dto))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, descriptor in self._dto._dto_fields.items():
+            if descriptor._is_initialized(self._dto):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__qualname__, self._dto)
+
+
+def _to_dict_value(value):
+    if issubclass(value.__class__, DTO):
+        return value.to_dict()
+    if value.__class__ is list:
+        return [_to_dict_value(v) for v in value]
+    if value.__class__ is dict or value.__class__ is types.MappingProxyType:
+        return {k: _to_dict_value(v) for k, v in value.items()}
+    if isinstance(value, type_checker._ARRAY_TYPES):
+        return value.tolist()
+    return value
+
+
+def _freeze(value, typed: bool = True):
+    """
+    Hashable equivalent of a value. With ``typed`` the types of the values are kept apart (``1`` and ``1.0`` do not
+    match), otherwise equal values have equal frozen equivalents.
+    """
+    value_class = value.__class__
+    if value_class is types.MappingProxyType:
+        # Equal to the dictionary it wraps
+        value_class = dict
+    if value_class is dict:
+        value = frozenset((_freeze(k, typed), _freeze(v, typed)) for k, v in value.items())
+    elif value_class is list:
+        value = tuple(_freeze(v, typed) for v in value)
+    elif isinstance(value, type_checker._ARRAY_TYPES):
+        value = tuple(value.tolist())
+    return (value_class, value) if typed else value
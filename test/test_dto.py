@@ -1,7 +1,49 @@
+import array
+import json
+import pickle
+import types
 from unittest import TestCase
 from pydto import DTO
-from typing import Optional, Dict, List
-from datetime import datetime
+from typing import Optional, Dict, List, Union
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+import dto_coercers
+import dto_stats
+import pydto
+import type_checker
+from dto_errors import FieldError, FieldsMismatchError, InvalidTypeError, InvalidValueError
+
+
+# Pickled DTO classes (by reference) must be defined at the top level of a module
+class PickledAddressDTO(DTO, lazy=True):
+    city = str,
+
+
+class PickledUserDTO(DTO, partial=True):
+    age = int, {"validator": lambda x: x > 0}
+    date = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+    scores = List[float], {"array": True}
+    addresses = List[PickledAddressDTO],
+    nickname = Optional[str], {"immutable": False}
+
+
+def pickled_user_dict(i):
+    return {"age": i, "date": "2011-01-{:02d}".format(i % 28 + 1), "scores": [i / 2], "addresses": [{"city": "c"}],
+            "nickname": None}
+
+
+class FrozenSettingsDTO(DTO):
+    name = str,
+    settings = Dict[str, int], {"frozen": True}
+    extra = dict, {"frozen": True}
+    options = Optional[Dict[str, str]], {"frozen": True}
+
+
+class Color(Enum):
+    RED = "red"
+    GREEN = "green"
 
 
 class TestDTO(TestCase):
@@ -472,6 +514,895 @@ class TestDTO(TestCase):
         with self.assertRaises(TypeError):
             simple_dto = SimpleDTO2.from_json(json_string)
 
+    def test_compiled_type_checker(self):
+        class SimpleDTO1(DTO, partial=True):
+            country = str,
+
+        class SimpleDTO2(DTO):
+            city = Optional[List[Dict[str, SimpleDTO1]]],
+
+        checker = SimpleDTO2._dto_fields["city"]._check_only
+
+        for value in [None, [], [{}], [{"a": {"country": "canada"}}]]:
+            self.assertIs(checker(value), value)
+
+        for value in [1, [1], [{"a": 1}], [{1: {"country": "canada"}}], [{"a": {"country": 1}}]]:
+            self.assertIs(checker(value), type_checker._INVALID)
+
+        self.assertTrue(isinstance({"country": "canada", "province": "alberta"}, SimpleDTO1))
+        self.assertFalse(isinstance({"province": "alberta"}, SimpleDTO1))
+
+    def test_generated_init(self):
+        class SimpleDTO(DTO):
+            attribute1 = float, {"validator": lambda x: x > 0}
+            attribute2 = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+
+        self.assertEqual(SimpleDTO.__init__.__qualname__, "{}.__init__".format(SimpleDTO.__qualname__))
+
+        simple_dto = SimpleDTO({"attribute1": 1.0, "attribute2": "2011-01-03"})
+        self.assertEqual(simple_dto.attribute1, 1.0)
+        self.assertEqual(simple_dto.attribute2, datetime(year=2011, month=1, day=3))
+
+        with self.assertRaises(ValueError):
+            SimpleDTO({"attribute1": -1.0, "attribute2": "2011-01-03"})
+
+        with self.assertRaises(TypeError):
+            SimpleDTO({"attribute1": 1, "attribute2": "2011-01-03"})
+
+    def test_partial_dto_with_exact_keys(self):
+        class SimpleDTO(DTO, partial=True):
+            age = int,
+
+        dto = SimpleDTO.from_dict({"age": 25})
+        self.assertEqual(dto.age, 25)
+
+        with self.assertRaises(AssertionError):
+            SimpleDTO.from_dict({"date": "2011-01-03"})
+
+    def test_from_dicts(self):
+        class SimpleDTO(DTO):
+            age = int, {"validator": lambda x: x > 0}
+            date = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+
+        dicts = [{"age": 25, "date": "2011-01-03"},
+                 {"age": "25", "date": "2011-01-03"},
+                 {"age": 0, "date": "2011-01-03"},
+                 {"age": 25},
+                 {"age": 26, "date": "2011-01-04"},
+                 {"age": 27, "date": "not a date"}]
+
+        dtos, errors = SimpleDTO.from_dicts(dicts)
+
+        self.assertEqual([dto.to_dict() for dto in dtos],
+                         [{"age": 25, "date": datetime(year=2011, month=1, day=3)},
+                          {"age": 26, "date": datetime(year=2011, month=1, day=4)}])
+        self.assertEqual(dtos[0], SimpleDTO.from_dict(dicts[0]))
+
+        with self.assertRaises(AttributeError):
+            dtos[0].age = 1
+
+        self.assertEqual([index for index, _ in errors], [1, 2, 3, 5])
+        self.assertEqual([type(error) for _, error in errors],
+                         [InvalidTypeError, InvalidValueError, FieldsMismatchError, ValueError])
+
+    def test_try_from_dict(self):
+        class AddressDTO(DTO):
+            city = str,
+            zip_code = int, {"validator": lambda x: x > 0}
+
+        class UserDTO(DTO):
+            name = str,
+            date = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+            address = Optional[AddressDTO],
+
+        valid = {"name": "a", "date": "2011-01-03", "address": {"city": "c", "zip_code": 1}}
+        dto, errors = UserDTO.try_from_dict(valid)
+        self.assertEqual((dto, errors), (UserDTO.from_dict(valid), []))
+        self.assertIsInstance(dto.address, AddressDTO)
+
+        dto, errors = UserDTO.try_from_dict({"name": 1, "date": "x", "address": {"zip_code": 0, "other": 2},
+                                             "extra": 3})
+        self.assertIsNone(dto)
+        self.assertEqual([(error.reason, error.path) for error in errors],
+                         [("unexpected", "extra"), ("type", "name"), ("coerce", "date"),
+                          ("missing", "address.city"), ("unexpected", "address.other"),
+                          ("validator", "address.zip_code")])
+        self.assertEqual(errors[1], FieldError("type", "name", str, 1, "UserDTO"))
+        self.assertIsInstance(errors[2].cause, ValueError)
+        self.assertIn("'address.city'", errors[3].message)
+
+        _, errors = UserDTO.try_from_dict({"name": "a", "date": "2011-01-03", "address": [1]})
+        self.assertEqual([(error.reason, error.path, error.expected) for error in errors],
+                         [("type", "address", Optional[AddressDTO])])
+        _, errors = UserDTO.try_from_dict(None)
+        self.assertEqual([(error.reason, error.path) for error in errors], [("type", "")])
+
+        # Type checks only
+        dto, errors = UserDTO.try_from_dict(dict(valid, address={"city": "c", "zip_code": 0}), validate="types")
+        self.assertEqual((dto.address.zip_code, errors), (0, []))
+
+        # Items of List and Dict fields
+        class CarsDTO(DTO):
+            cars = List[AddressDTO],
+            by_name = Optional[Dict[str, AddressDTO]],
+            counts = Dict[str, List[int]],
+
+        cars_dict = {"cars": [{"city": "a", "zip_code": 1}, {"city": "b", "zip_code": 2}],
+                     "by_name": {"x": {"city": "c", "zip_code": 3}}, "counts": {"a": [1, 2]}}
+        dto, errors = CarsDTO.try_from_dict(cars_dict)
+        self.assertEqual((dto, errors), (CarsDTO.from_dict(cars_dict), []))
+        self.assertIsInstance(dto.cars[1], AddressDTO)
+
+        dto, errors = CarsDTO.try_from_dict({"cars": [{"city": "a", "zip_code": 1}, {"city": "b", "zip_code": -1},
+                                                      {"zip_code": "1"}, 3],
+                                             "by_name": {"x": {"city": 1, "zip_code": 3}, 2: {}},
+                                             "counts": {"a": [1, "2"], "b": None}})
+        self.assertIsNone(dto)
+        self.assertEqual([(error.reason, error.path) for error in errors],
+                         [("validator", "cars.1.zip_code"), ("missing", "cars.2.city"), ("type", "cars.2.zip_code"),
+                          ("type", "cars.3"), ("type", "by_name.x.city"), ("type", "by_name.2"),
+                          ("type", "counts.a.1"), ("type", "counts.b")])
+        self.assertEqual(errors[3].expected, AddressDTO)
+        self.assertEqual((errors[5].expected, errors[5].value), (str, 2))
+        self.assertEqual(errors[6], FieldError("type", "counts.a.1", int, "2", "CarsDTO"))
+
+        _, errors = CarsDTO.try_from_dict(dict(cars_dict, cars={"a": 1}))
+        self.assertEqual([(error.path, error.expected) for error in errors], [("cars", List[AddressDTO])])
+
+    def test_validation_errors(self):
+        class Value:
+            formatted = 0
+
+            def __str__(self):
+                Value.formatted += 1
+                return "value"
+
+        class SimpleDTO(DTO):
+            x = int,
+
+        value = Value()
+        _, errors = SimpleDTO.from_dicts([{"x": value}] * 10)
+        _, try_errors = SimpleDTO.try_from_dict({"x": value})
+        # Messages are only formatted when read
+        self.assertEqual(Value.formatted, 0)
+        self.assertEqual(str(errors[0][1]), "Value 'value' is not of type '{}' (field 'x' of DTO class "
+                                            "'SimpleDTO')".format(int))
+        self.assertEqual(errors[0][1].errors, try_errors)
+
+        # Key checks are not assertions, they are not stripped by python -O
+        with self.assertRaises(FieldsMismatchError) as context:
+            SimpleDTO({"y": 1})
+        self.assertEqual([(error.reason, error.path) for error in context.exception.errors],
+                         [("missing", "x"), ("unexpected", "y")])
+        self.assertIsInstance(context.exception, AssertionError)
+
+        error = pickle.loads(pickle.dumps(context.exception))
+        self.assertEqual(error.errors, context.exception.errors)
+
+    def test_builtin_coercers(self):
+        class EventDTO(DTO):
+            time = datetime, {"coerce": "iso_datetime"}
+            day = Optional[date], {"coerce": "iso_date"}
+            amount = Decimal, {"coerce": "decimal"}
+            id = UUID, {"coerce": "uuid"}
+            color = Color, {"coerce": "enum"}
+            data = bytes, {"coerce": "base64"}
+
+        event_dict = {"time": "2011-01-03T10:20:30.123456+00:00", "day": "2011-01-03", "amount": 0.1,
+                      "id": "12345678-1234-5678-1234-567812345678", "color": "RED", "data": "AAE="}
+        event = EventDTO.from_dict(event_dict)
+        self.assertEqual(event.time, datetime(2011, 1, 3, 10, 20, 30, 123456, tzinfo=timezone.utc))
+        self.assertEqual((event.day, event.amount), (date(2011, 1, 3), Decimal("0.1")))
+        self.assertEqual((event.id, event.color, event.data),
+                         (UUID("12345678-1234-5678-1234-567812345678"), Color.RED, b"\x00\x01"))
+        self.assertEqual(EventDTO.from_json(event.to_json()), event)
+        # Values of the field type are kept
+        self.assertEqual(EventDTO.from_dict(event.to_dict()), event)
+        self.assertIsNone(EventDTO.from_dict(dict(event_dict, day=None)).day)
+
+        for field, value in [("time", "2011-13-03"), ("time", 1), ("amount", "x"), ("amount", True),
+                             ("id", "x"), ("color", "blue"), ("data", "A")]:
+            with self.assertRaises((TypeError, ValueError)):
+                EventDTO.from_dict(dict(event_dict, **{field: value}))
+
+        with self.assertRaises(ValueError):
+            class UnknownDTO(DTO):
+                x = int, {"coerce": "unknown"}
+        with self.assertRaises(TypeError):
+            class NotEnumDTO(DTO):
+                x = str, {"coerce": "enum"}
+
+    def test_coerce_columns(self):
+        calls = []
+
+        def convert(value):
+            calls.append(value)
+            return date(2011, 1, int(value))
+
+        class DayDTO(DTO):
+            day = date, {"coerce": dto_coercers.Coercer("day", date, convert)}
+
+        dtos, errors = DayDTO.from_dicts([{"day": "1"}, {"day": "2"}, {"day": "1"}, {"day": "x"}, {"day": "x"},
+                                          {"day": date(2011, 1, 5)}])
+        self.assertEqual([dto.day.day for dto in dtos], [1, 2, 1, 5])
+        self.assertEqual([index for index, _ in errors], [3, 4])
+        # Each distinct string is converted once, failures are not remembered
+        self.assertEqual(calls, ["1", "2", "x", "x"])
+
+    def test_replace(self):
+        class AddressDTO(DTO):
+            city = str,
+
+        class UserDTO(DTO, lazy=True):
+            age = int, {"validator": lambda x: x > 0}
+            date = datetime, {"coerce": "iso_datetime"}
+            address = AddressDTO,
+            previous = AddressDTO,
+            tags = List[str],
+
+        user = UserDTO({"age": 1, "date": "2011-01-03", "address": {"city": "a"}, "previous": {"city": "b"},
+                        "tags": ["x"]})
+        address = user.address
+        changed = user.replace(age=2, date="2011-01-04", previous={"city": "c"})
+        self.assertEqual(changed.to_dict(), {"age": 2, "date": datetime(2011, 1, 4), "address": {"city": "a"},
+                                             "previous": {"city": "c"}, "tags": ["x"]})
+        self.assertEqual((user.age, user.previous.city), (1, "b"))
+        # Unchanged values are shared
+        self.assertIs(changed.address, address)
+        self.assertIs(changed.tags, user.tags)
+        self.assertIsInstance(changed.previous, AddressDTO)
+        self.assertEqual(user.evolve(), user)
+
+        with self.assertRaises(InvalidValueError):
+            user.replace(age=0)
+        with self.assertRaises(InvalidTypeError):
+            user.replace(tags=[1])
+        with self.assertRaises(TypeError):
+            user.replace(other=1)
+
+        self.assertEqual(user.diff(user.replace(tags=["x"])), {})
+        self.assertEqual(user.diff(changed), {"age": (1, 2), "date": (datetime(2011, 1, 3), datetime(2011, 1, 4)),
+                                              "previous": (user.previous, changed.previous)})
+        with self.assertRaises(TypeError):
+            user.diff(user.address)
+
+        class PartialDTO(DTO, partial=True):
+            x = int,
+            y = Optional[int], {"immutable": False}
+
+        partial = PartialDTO.from_dict({"x": 1, "y": None})
+        self.assertEqual(partial.replace(y=2).diff(partial), {"y": (2, None)})
+
+    def test_stats(self):
+        class AddressDTO(DTO):
+            city = str,
+
+        self.addCleanup(pydto.disable_stats)
+        pydto.enable_stats()
+        self.assertIn("_clock", AddressDTO.__init__.__globals__)
+
+        class StatsDTO(DTO):
+            age = int, {"validator": lambda x: x > 0}
+            date = datetime, {"coerce": "iso_datetime"}
+            address = AddressDTO,
+
+        exports = []
+        dto_stats.add_callback(exports.append)
+        self.addCleanup(dto_stats.remove_callback, exports.append)
+
+        dto = StatsDTO.from_dict({"age": 1, "date": "2011-01-03", "address": {"city": "a"}})
+        dto.to_dict()
+        for invalid in [{"age": 0, "date": "2011-01-03", "address": {"city": "a"}},
+                        {"age": 1, "date": "x", "address": {"city": "a"}},
+                        {"age": 1}]:
+            with self.assertRaises((TypeError, ValueError, AssertionError)):
+                StatsDTO.from_dict(invalid)
+        StatsDTO.from_dicts([{"age": 1, "date": "2011-01-03", "address": {"city": "a"}}, {"age": 2}])
+
+        snapshot = pydto.export_stats(reset=True)
+        self.assertEqual(exports, [snapshot])
+        stats = snapshot["test.test_dto.TestDTO.test_stats.<locals>.StatsDTO"]
+        self.assertEqual(stats["constructions"]["count"], 1)
+        self.assertEqual((stats["failures"], stats["key_failures"], stats["batch_failures"]), (3, 1, 1))
+        self.assertEqual(stats["to_dict"]["count"], 1)
+        self.assertEqual(stats["batches"]["count"], 1)
+        fields = stats["fields"]
+        self.assertEqual([fields[field]["failures"] for field in ["age", "date", "address"]], [1, 1, 0])
+        # The from_dicts row included
+        self.assertEqual(fields["date"]["coerce"]["count"], 2)
+        self.assertEqual(fields["age"]["validator"]["count"], 4)
+        self.assertEqual(sum(fields["address"]["check"]["buckets"].values()), 2)
+        self.assertEqual(snapshot["test.test_dto.TestDTO.test_stats.<locals>.AddressDTO"]["constructions"]["count"], 2)
+
+        self.assertEqual(pydto.stats()["test.test_dto.TestDTO.test_stats.<locals>.StatsDTO"]["failures"], 0)
+        histogram = dto_stats.Histogram()
+        for seconds in [0.5e-6, 3e-6, 3e-6, 100e-6]:
+            histogram.record(seconds)
+        self.assertEqual(histogram.snapshot()["buckets"], {1: 1, 4: 2, 128: 1})
+        self.assertEqual((histogram.percentile(50), histogram.percentile(100)), (4e-6, 128e-6))
+
+        # Fields set, replaced and validated in batches
+        class MutableStatsDTO(DTO):
+            score = int, {"validator": lambda x: x >= 0, "immutable": False}
+            date = datetime, {"coerce": "iso_datetime"}
+
+        dto = MutableStatsDTO.from_dict({"score": 0, "date": "2011-01-03"})
+        pydto.reset_stats()
+        for score in range(5):
+            dto.score = score
+        with self.assertRaises(ValueError):
+            dto.score = -1
+        dto.replace(score=1, date="2011-01-04")
+        MutableStatsDTO.from_dicts([{"score": 1, "date": "2011-01-03"}, {"score": -1, "date": "2011-01-03"},
+                                    {"score": "1", "date": "x"}])
+        fields = pydto.stats()["test.test_dto.TestDTO.test_stats.<locals>.MutableStatsDTO"]["fields"]
+        self.assertEqual((fields["score"]["check"]["count"], fields["score"]["validator"]["count"]), (10, 9))
+        self.assertEqual((fields["date"]["coerce"]["count"], fields["date"]["check"]["count"]), (4, 3))
+        self.assertEqual((fields["score"]["failures"], fields["date"]["failures"]), (3, 1))
+
+        # No instrumentation once disabled
+        pydto.disable_stats()
+        self.assertNotIn("_clock", StatsDTO.__init__.__globals__)
+        dto.score = 2
+        MutableStatsDTO.from_dicts([{"score": -1, "date": "2011-01-03"}])
+        self.assertEqual(pydto.stats()["test.test_dto.TestDTO.test_stats.<locals>.MutableStatsDTO"]["fields"],
+                         fields)
+        StatsDTO.from_dict({"age": 1, "date": "2011-01-03", "address": {"city": "a"}})
+        self.assertEqual(pydto.stats()["test.test_dto.TestDTO.test_stats.<locals>.StatsDTO"]["constructions"]["count"],
+                         0)
+
+    def test_from_dicts_validation_levels(self):
+        class TrustedDTO(DTO, validate="trusted"):
+            x = int, {"validator": lambda x: x > 0}
+
+        class TypesDTO(DTO, validate="types"):
+            x = int, {"validator": lambda x: x > 0}
+
+        class SampledDTO(DTO, validate="sampled", sample_every=2):
+            x = int, {"validator": lambda x: x > 0}
+
+        dicts = [{"x": "bad"}, {"x": 0}, {"x": 1}, {"x": "bad"}]
+        self.assertEqual(TrustedDTO({"x": "bad"}).x, "bad")
+        self.assertEqual([dto.x for dto in TrustedDTO.from_dicts(dicts)[0]], ["bad", 0, 1, "bad"])
+        self.assertEqual([index for index, _ in TrustedDTO.from_dicts(dicts, validate="full")[1]], [0, 1, 3])
+        self.assertEqual([index for index, _ in TypesDTO.from_dicts(dicts)[1]], [0, 3])
+        self.assertEqual([index for index, _ in SampledDTO.from_dicts(dicts)[1]], [0])
+        self.assertEqual([index for index, _ in SampledDTO.from_json_lines(['{"x": 0}', '{"x": 0}'])[1]], [0])
+
+        for options in [{"sample_every": 0}, {"sample_every": -2}, {"sample_every": 1.5}, {"sample_items": -1}]:
+            with self.assertRaises(ValueError, msg=str(options)):
+                class WrongSampledDTO(DTO, validate="sampled", **options):
+                    x = int,
+        with self.assertRaises(ValueError):
+            TypesDTO.from_dicts(dicts, validate="unknown")
+
+    def test_from_json_lines(self):
+        class SimpleDTO(DTO, partial=True):
+            age = int,
+
+        lines = ['{"age": 25, "date": "2011-01-03"}\n', '\n', '{"age": 1.0}\n', '{"age": \n', '[1]\n', '{"age": 3}']
+
+        dtos, errors = SimpleDTO.from_json_lines(lines)
+
+        self.assertEqual([dto.age for dto in dtos], [25, 3])
+        self.assertEqual([index for index, _ in errors], [2, 3, 4])
+        self.assertIsInstance(errors[0][1], TypeError)
+        self.assertIsInstance(errors[1][1], ValueError)
+        self.assertIsInstance(errors[2][1], TypeError)
+
+    def test_slot_storage(self):
+        class SimpleDTO(DTO):
+            attribute1 = float,
+            attribute2 = Optional[int], {"immutable": False}
+
+        simple_dto = SimpleDTO({"attribute1": 1.0, "attribute2": None})
+
+        self.assertFalse(hasattr(simple_dto, "__dict__"))
+        self.assertEqual(simple_dto.to_dict(), {"attribute1": 1.0, "attribute2": None})
+
+        simple_dto.attribute2 = 2
+        self.assertEqual(simple_dto.attribute2, 2)
+
+        with self.assertRaises(AttributeError):
+            simple_dto.other = 1
+
+        uninitialized_dto = SimpleDTO.__new__(SimpleDTO)
+        with self.assertRaisesRegex(AttributeError, "is not Initialized"):
+            uninitialized_dto.attribute1
+        self.assertEqual(uninitialized_dto.to_dict(), {})
+
+        uninitialized_dto.attribute1 = 1.0
+        self.assertEqual(uninitialized_dto.to_dict(), {"attribute1": 1.0})
+        with self.assertRaises(AttributeError):
+            uninitialized_dto.attribute1 = 2.0
+
+    def test_field_access(self):
+        class SimpleDTO(DTO):
+            attribute1 = float,
+            attribute2 = int, {"immutable": False}
+
+        simple_dto = SimpleDTO({"attribute1": 1.0, "attribute2": 2})
+
+        with self.assertRaisesRegex(AttributeError, "has no attribute 'other'"):
+            simple_dto.other
+
+        with self.assertRaises(AttributeError):
+            del simple_dto.attribute1
+
+        with self.assertRaises(AttributeError):
+            del simple_dto.attribute2
+
+        self.assertEqual(simple_dto.to_dict(), {"attribute1": 1.0, "attribute2": 2})
+
+    def test_nested_dto_materialization(self):
+        class CarDTO(DTO, partial=True):
+            year = int, {"validator": lambda value: value > 1980}
+
+        class UserDTO(DTO):
+            car = CarDTO,
+            cars = List[CarDTO],
+            cars_by_name = Optional[Dict[str, CarDTO]],
+
+        dto_dict = {"car": {"year": 1987, "color": "red"}, "cars": [{"year": 1990}],
+                    "cars_by_name": {"old": {"year": 1987}}}
+        user_dto = UserDTO.from_dict(dto_dict)
+
+        self.assertIsInstance(user_dto.car, CarDTO)
+        self.assertEqual(user_dto.car.year, 1987)
+        self.assertEqual(user_dto.cars[0].year, 1990)
+        self.assertEqual(user_dto.cars_by_name["old"].year, 1987)
+        self.assertEqual(user_dto.to_dict(), {"car": {"year": 1987}, "cars": [{"year": 1990}],
+                                              "cars_by_name": {"old": {"year": 1987}}})
+        self.assertEqual(UserDTO.from_dict(user_dto.to_dict()), user_dto)
+
+        # Already materialized DTOs are kept as they are
+        self.assertIs(UserDTO.from_dict({"car": user_dto.car, "cars": [], "cars_by_name": None}).car, user_dto.car)
+
+        with self.assertRaises(TypeError):
+            UserDTO.from_dict({"car": {"year": 1970}, "cars": [], "cars_by_name": None})
+
+    def test_lazy_nested_dto(self):
+        class CarDTO(DTO):
+            year = int, {"validator": lambda value: value > 1980}
+
+        class UserDTO(DTO, lazy=True):
+            name = str,
+            car = CarDTO,
+            cars = List[CarDTO], {"immutable": False}
+
+        user_dto = UserDTO.from_dict({"name": "dwight", "car": {"year": 1987}, "cars": [{"year": 1990}]})
+        self.assertEqual(user_dto._dto_pending, {"car": {"year": 1987}, "cars": [{"year": 1990}]})
+
+        self.assertEqual(user_dto.car.year, 1987)
+        self.assertIs(user_dto.car, user_dto.car)
+        self.assertEqual(user_dto._dto_pending, {"cars": [{"year": 1990}]})
+
+        with self.assertRaises(AttributeError):
+            user_dto.car = {"year": 1988}
+
+        user_dto.cars = [{"year": 1991}]
+        self.assertEqual(user_dto._dto_pending, {})
+        self.assertEqual(user_dto.cars[0].year, 1991)
+
+        # Still validated up front
+        with self.assertRaises(TypeError):
+            UserDTO.from_dict({"name": "dwight", "car": {"year": 1970}, "cars": []})
+
+        user_dto = UserDTO.from_dict({"name": "dwight", "car": {"year": 1987}, "cars": [{"year": 1990}]})
+        self.assertEqual(user_dto.to_dict(), {"name": "dwight", "car": {"year": 1987}, "cars": [{"year": 1990}]})
+
+    def test_validation_levels(self):
+        class CarDTO(DTO):
+            year = int, {"validator": lambda value: value > 1980}
+
+        class SimpleDTO(DTO):
+            age = int, {"validator": lambda x: x > 0}
+            cars = List[CarDTO],
+
+        invalid_value = {"age": 0, "cars": [{"year": 1970}]}
+        invalid_type = {"age": "25", "cars": [{"year": 1987}]}
+
+        with self.assertRaises(ValueError):
+            SimpleDTO.from_dict(invalid_value, validate="full")
+        with self.assertRaises(TypeError):
+            SimpleDTO.from_dict(invalid_type, validate="types")
+
+        simple_dto = SimpleDTO.from_dict(invalid_value, validate="types")
+        self.assertEqual(simple_dto.age, 0)
+        self.assertEqual(simple_dto.cars[0].year, 1970)
+
+        simple_dto = SimpleDTO.from_dict(invalid_type, validate="trusted")
+        self.assertEqual(simple_dto.age, "25")
+        self.assertIsInstance(simple_dto.cars[0], CarDTO)
+
+        with self.assertRaises(ValueError):
+            SimpleDTO.from_dict(invalid_value, validate="unknown")
+
+        # Assignments are always validated
+        with self.assertRaises(AttributeError):
+            simple_dto.age = 1
+
+        with self.assertRaises(ValueError):
+            class WrongDTO(DTO, validate="unknown"):
+                age = int,
+
+    def test_trusted_class(self):
+        class SimpleDTO(DTO, validate="trusted"):
+            age = int, {"validator": lambda x: x > 0}
+
+        self.assertEqual(SimpleDTO.from_dict({"age": 0}).age, 0)
+        self.assertEqual(SimpleDTO.from_json('{"age": -1}').age, -1)
+
+        with self.assertRaises(ValueError):
+            SimpleDTO.from_dict({"age": 0}, validate="full")
+
+        with self.assertRaises(AssertionError):
+            SimpleDTO.from_dict({"other": 0})
+
+    def test_sampled_validation(self):
+        class SimpleDTO(DTO, validate="sampled", sample_items=2):
+            age = int, {"validator": lambda x: x > 0}
+            values = List[int],
+
+        self.assertEqual(SimpleDTO.__init__.__qualname__, "{}.__init__".format(SimpleDTO.__qualname__))
+
+        # Only the first items of the lists are checked
+        self.assertEqual(SimpleDTO.from_dict({"age": 1, "values": [1, 2, "3"]}).values, [1, 2, "3"])
+        with self.assertRaises(TypeError):
+            SimpleDTO.from_dict({"age": 1, "values": [1, 2.0, 3]})
+        with self.assertRaises(TypeError):
+            SimpleDTO.from_dict({"age": 1, "values": [1, 2, "3"]}, validate="full")
+
+        class SampledDTO(DTO, validate="sampled", sample_every=3):
+            age = int, {"validator": lambda x: x > 0}
+
+        # One object out of three is validated, the others are trusted
+        results = []
+        for _ in range(6):
+            try:
+                SampledDTO({"age": 0})
+            except ValueError:
+                results.append(False)
+            else:
+                results.append(True)
+        self.assertEqual(results, [False, True, True, False, True, True])
+
+    def test_dto_hash(self):
+        class AddressDTO(DTO):
+            city = str,
+            zip_codes = List[int],
+
+        class UserDTO(DTO):
+            name = str,
+            address = AddressDTO,
+
+        class MutableDTO(DTO):
+            name = str, {"immutable": False}
+
+        user_dto1 = UserDTO.from_dict({"name": "dwight", "address": {"city": "scranton", "zip_codes": [18503]}})
+        user_dto2 = UserDTO.from_dict({"name": "dwight", "address": {"city": "scranton", "zip_codes": [18503]}})
+
+        self.assertEqual(user_dto1, user_dto2)
+        self.assertEqual(hash(user_dto1), hash(user_dto2))
+        self.assertEqual(len({user_dto1, user_dto2}), 1)
+
+        with self.assertRaises(TypeError):
+            hash(MutableDTO.from_dict({"name": "dwight"}))
+
+    def test_interned_dto(self):
+        validated = []
+
+        class AddressDTO(DTO, intern=2):
+            city = str, {"validator": lambda value: validated.append(value) or True}
+            rank = float,
+
+        class UserDTO(DTO):
+            name = str,
+            address = AddressDTO,
+
+        users = [UserDTO.from_dict({"name": name, "address": {"city": "scranton", "rank": 1.0}})
+                 for name in ["dwight", "jim", "pam"]]
 
+        self.assertIs(users[0].address, users[1].address)
+        self.assertIs(users[0].address, users[2].address)
+        self.assertEqual(validated, ["scranton"])
+        self.assertTrue(isinstance({"city": "scranton", "rank": 1.0}, AddressDTO))
+
+        # Values of different types are not mixed up
+        with self.assertRaises(TypeError):
+            AddressDTO.from_dict({"city": "scranton", "rank": 1})
+
+        # Least recently used DTOs are evicted
+        AddressDTO.from_dict({"city": "stamford", "rank": 1.0})
+        AddressDTO.from_dict({"city": "nashua", "rank": 1.0})
+        self.assertIsNot(AddressDTO.from_dict({"city": "scranton", "rank": 1.0}), users[0].address)
+        self.assertEqual(len(AddressDTO._intern_cache), 2)
+
+        with self.assertRaises(ValueError):
+            class MutableDTO(DTO, intern=10):
+                name = str, {"immutable": False}
+
+        # Mutable fields of nested DTOs
+        class MutableAddressDTO(DTO):
+            city = str, {"immutable": False}
+
+        for field_type in [MutableAddressDTO, Optional[MutableAddressDTO], List[MutableAddressDTO],
+                           Dict[str, MutableAddressDTO], Union[int, MutableAddressDTO]]:
+            with self.assertRaises(ValueError):
+                class NestedMutableDTO(DTO, intern=10):
+                    address = field_type,
+
+        class NestedMutableDTO(DTO):
+            address = MutableAddressDTO,
+
+        self.assertIsNone(NestedMutableDTO.__hash__)
+        with self.assertRaises(TypeError):
+            hash(NestedMutableDTO.from_dict({"address": {"city": "c"}}))
+
+        class TagsDTO(DTO):
+            tags = Optional[List[str]],
+
+        for field_type in [List[str], Dict[str, int], dict, Optional[list], TagsDTO]:
+            with self.assertRaises(ValueError):
+                class ContainerDTO(DTO, intern=10):
+                    values = field_type,
+        with self.assertRaises(ValueError):
+            class ArrayDTO(DTO, intern=10):
+                values = List[int], {"array": True}
+
+    def test_to_dict_projection(self):
+        class AddressDTO(DTO):
+            city = str,
+            street = str,
+
+        class UserDTO(DTO):
+            name = str,
+            email = str,
+            address = Optional[AddressDTO],
+            previous_addresses = List[AddressDTO],
+
+        user_dto = UserDTO.from_dict({"name": "dwight", "email": "dshrute@schrutefarms.com",
+                                      "address": {"city": "scranton", "street": "kellum court"},
+                                      "previous_addresses": [{"city": "honesdale", "street": "farm road"}]})
+
+        self.assertEqual(list(user_dto.to_dict()), ["name", "email", "address", "previous_addresses"])
+        self.assertEqual(user_dto.to_dict(fields=["name"]), {"name": "dwight"})
+        self.assertEqual(user_dto.to_dict(fields=["name", "address.city", "previous_addresses.street"]),
+                         {"name": "dwight", "address": {"city": "scranton"},
+                          "previous_addresses": [{"street": "farm road"}]})
+        self.assertEqual(user_dto.to_dict(fields=["address", "address.city"]),
+                         {"address": {"city": "scranton", "street": "kellum court"}})
+
+        with self.assertRaises(KeyError):
+            user_dto.to_dict(fields=["address.country"])
+        with self.assertRaises(KeyError):
+            user_dto.to_dict(fields=["name.first"])
+        with self.assertRaises(KeyError):
+            user_dto.to_dict(fields=["address.city.x.y"])
+
+        user_dto = UserDTO.from_dict({"name": "dwight", "email": "dshrute@schrutefarms.com", "address": None,
+                                      "previous_addresses": []})
+        self.assertEqual(user_dto.to_dict(fields=["address.city"]), {"address": None})
+
+    def test_as_mapping(self):
+        class AddressDTO(DTO):
+            city = str,
+
+        class UserDTO(DTO, partial=True):
+            name = str,
+            address = AddressDTO,
+
+        user_dto = UserDTO.from_dict({"name": "dwight", "address": {"city": "scranton"}})
+        mapping = user_dto.as_mapping()
+
+        self.assertEqual(dict(mapping), {"name": "dwight", "address": user_dto.address})
+        self.assertEqual(len(mapping), 2)
+        self.assertEqual(mapping["name"], "dwight")
+        self.assertIn("address", mapping)
+        self.assertNotIn("other", mapping)
+
+        with self.assertRaises(KeyError):
+            mapping["other"]
+        with self.assertRaises(TypeError):
+            mapping["name"] = "jim"
+
+        uninitialized_mapping = UserDTO.__new__(UserDTO).as_mapping()
+        self.assertEqual(len(uninitialized_mapping), 0)
+        with self.assertRaises(KeyError):
+            uninitialized_mapping["name"]
+
+    def test_union_dispatch(self):
+        class CarDTO(DTO):
+            year = int,
+
+        class BoatDTO(DTO):
+            length = float,
+
+        class SimpleDTO(DTO):
+            number = Union[int, bool, str],
+            vehicle = Optional[Union[CarDTO, BoatDTO]],
+            values = Union[List[int], List[str]],
+
+        checker = SimpleDTO._dto_fields["number"]._checker
+        for value in [1, True, "1"]:
+            self.assertIs(checker(value), value)
+        self.assertIs(checker(1.0), type_checker._INVALID)
+
+        simple_dto = SimpleDTO.from_dict({"number": 1, "vehicle": {"length": 10.0}, "values": ["a"]})
+        self.assertIsInstance(simple_dto.vehicle, BoatDTO)
+        simple_dto = SimpleDTO.from_dict({"number": 1, "vehicle": {"year": 1987}, "values": [1]})
+        self.assertIsInstance(simple_dto.vehicle, CarDTO)
+        simple_dto = SimpleDTO.from_dict({"number": 1, "vehicle": simple_dto.vehicle, "values": []})
+        self.assertIsInstance(simple_dto.vehicle, CarDTO)
+
+        with self.assertRaises(TypeError):
+            SimpleDTO.from_dict({"number": 1, "vehicle": {"year": "1987"}, "values": []})
+        with self.assertRaises(TypeError):
+            SimpleDTO.from_dict({"number": 1, "vehicle": None, "values": [1, "a"]})
+
+    def test_ambiguous_union(self):
+        class CarDTO(DTO):
+            year = int,
+
+        for type_ in [Union[dict, CarDTO], Union[List, List[int]], Union[Dict[str, int], dict]]:
+            with self.assertRaises(TypeError):
+                class SimpleDTO(DTO):
+                    attribute = type_,
+
+    def test_array_storage(self):
+        class TelemetryDTO(DTO):
+            values = List[float], {"array": True}
+            counts = List[int], {"array": True, "validator": lambda counts: all(c >= 0 for c in counts)}
+
+        telemetry_dto = TelemetryDTO.from_dict({"values": [1.0, 2.5], "counts": [1, True]})
+
+        self.assertEqual(telemetry_dto.values, array.array('d', [1.0, 2.5]))
+        self.assertEqual(telemetry_dto.counts, array.array('q', [1, 1]))
+        self.assertEqual(telemetry_dto.to_dict(), {"values": [1.0, 2.5], "counts": [1, 1]})
+        self.assertEqual(json.loads(telemetry_dto.to_json()), {"values": [1.0, 2.5], "counts": [1, 1]})
+        self.assertEqual(TelemetryDTO.from_dict(telemetry_dto.to_dict()), telemetry_dto)
+        self.assertIs(TelemetryDTO.from_dict({"values": telemetry_dto.values, "counts": []}).values,
+                      telemetry_dto.values)
+
+        for invalid_dict in [{"values": [1.0, 2], "counts": []}, {"values": [], "counts": [1, "2"]},
+                             {"values": [], "counts": [2 ** 64]}, {"values": (1.0,), "counts": []}]:
+            with self.assertRaises(TypeError):
+                TelemetryDTO.from_dict(invalid_dict)
+
+        with self.assertRaises(ValueError):
+            TelemetryDTO.from_dict({"values": [], "counts": [1, -1]})
+
+        with self.assertRaises(TypeError):
+            class WrongDTO(DTO):
+                values = List[str], {"array": True}
+
+    def test_dict_items(self):
+        class MapDTO(DTO):
+            counts = Dict[str, int],
+            labels = Dict[int, Optional[str]],
+            colors = Dict[str, Color],
+            nested = Dict[str, PickledAddressDTO],
+
+        map_dict = {"counts": {"a": 1, "b": True}, "labels": {1: "x", 2: None}, "colors": {"r": Color.RED},
+                    "nested": {"a": {"city": "c"}}}
+        map_dto = MapDTO.from_dict(map_dict)
+        self.assertIs(map_dto.counts, map_dict["counts"])
+        self.assertEqual(map_dto.nested["a"].city, "c")
+        self.assertEqual(MapDTO.from_dict(dict(map_dict, counts={}, labels={})).counts, {})
+
+        # Keys are checked against the key type and values against the value type
+        for changes in [{"counts": {1: "a"}}, {"counts": {"a": "1"}}, {"counts": {1: 1}}, {"counts": [("a", 1)]},
+                        {"labels": {"1": "x"}}, {"labels": {1: 1}}, {"colors": {"r": "red"}},
+                        {"nested": {1: {"city": "c"}}}, {"nested": {"a": {"city": 1}}}]:
+            with self.assertRaises(TypeError, msg=str(changes)):
+                MapDTO.from_dict(dict(map_dict, **changes))
+
+    def test_frozen_storage(self):
+        settings = {"a": 1}
+        dto = FrozenSettingsDTO.from_dict({"name": "n", "settings": settings, "extra": {"k": [1, "x"]},
+                                           "options": {"o": "p"}})
+        self.assertIsInstance(dto.settings, types.MappingProxyType)
+        self.assertEqual(dto.settings, {"a": 1})
+        # Copied: changing the input does not change the DTO, which cannot be changed through its field
+        settings["b"] = 2
+        self.assertEqual(dto.settings, {"a": 1})
+        with self.assertRaises(TypeError):
+            dto.settings["a"] = 2
+
+        dto_dict = {"name": "n", "settings": {"a": 1}, "extra": {"k": [1, "x"]}, "options": {"o": "p"}}
+        self.assertEqual(dto.to_dict(), dto_dict)
+        self.assertIs(type(dto.to_dict()["settings"]), dict)
+        self.assertEqual(json.loads(dto.to_json()), dto_dict)
+        self.assertEqual(FrozenSettingsDTO.from_json(dto.to_json()), dto)
+        self.assertEqual(hash(dto), hash(FrozenSettingsDTO.from_dict(dto_dict)))
+        self.assertEqual(dto.to_dict(fields=["settings"]), {"settings": {"a": 1}})
+
+        for value in [dto, dto.replace(options=None)]:
+            restored = pickle.loads(pickle.dumps(value))
+            self.assertEqual(restored, value)
+            self.assertIsInstance(restored.settings, types.MappingProxyType)
+
+        # Optional frozen fields
+        self.assertIsInstance(dto.options, types.MappingProxyType)
+        self.assertIsNone(FrozenSettingsDTO.from_dict(dict(dto_dict, options=None)).options)
+        self.assertEqual(dto.replace(options=None).to_dict(), dict(dto_dict, options=None))
+        with self.assertRaises(TypeError):
+            FrozenSettingsDTO.from_dict(dict(dto_dict, options={"o": 1}))
+
+        # Mapping proxies are accepted and checked
+        replaced = dto.replace(name="m")
+        self.assertIsInstance(replaced.settings, types.MappingProxyType)
+        self.assertEqual(FrozenSettingsDTO.from_dict(dict(dto_dict, settings=dto.settings)).settings, {"a": 1})
+        with self.assertRaises(TypeError):
+            FrozenSettingsDTO.from_dict(dict(dto_dict, settings=types.MappingProxyType({"a": "1"})))
+        with self.assertRaises(TypeError):
+            FrozenSettingsDTO.from_dict(dict(dto_dict, settings={"a": "1"}))
+
+        dtos, errors = FrozenSettingsDTO.from_dicts([dto_dict, dict(dto_dict, settings={1: 1})])
+        self.assertIsInstance(dtos[0].settings, types.MappingProxyType)
+        self.assertEqual([index for index, _ in errors], [1])
+
+        with self.assertRaises(TypeError):
+            class WrongDTO(DTO):
+                values = List[str], {"frozen": True}
+        with self.assertRaises(TypeError):
+            class WrongOptionalDTO(DTO):
+                values = Optional[List[str]], {"frozen": True}
+
+        # Frozen maps of immutable values can be interned, not the ones of lists or of untyped values
+        class InternedSettingsDTO(DTO, intern=10):
+            settings = Dict[str, int], {"frozen": True}
+            options = Optional[Dict[str, Optional[str]]], {"frozen": True}
+
+        first = InternedSettingsDTO.from_dict({"settings": {"a": 1}, "options": None})
+        self.assertIs(InternedSettingsDTO.from_dict({"settings": {"a": 1}, "options": None}), first)
+        self.assertEqual(hash(first), hash(InternedSettingsDTO({"settings": {"a": 1}, "options": None})))
+
+        for field_type in [dict, Dict[str, List[int]], Optional[Dict[str, dict]]]:
+            with self.assertRaises(ValueError):
+                class ContainerSettingsDTO(DTO, intern=10):
+                    settings = field_type, {"frozen": True}
+
+    def test_pickle(self):
+        dto = PickledUserDTO(pickled_user_dict(3))
+        # The coerce of date would fail on its own result if it was run again
+        restored = pickle.loads(pickle.dumps(dto))
+        self.assertIsNot(restored, dto)
+        self.assertEqual(restored, dto)
+        self.assertEqual(restored.scores, array.array('d', [1.5]))
+        self.assertEqual(restored.addresses[0].city, "c")
+        with self.assertRaises(AttributeError):
+            restored.age = 4
+        restored.nickname = "n"
+
+        uninitialized = PickledUserDTO.__new__(PickledUserDTO)
+        uninitialized.age = 1
+        self.assertEqual(pickle.loads(pickle.dumps(uninitialized)).to_dict(), {"age": 1})
+
+    def test_parallel_from_dicts(self):
+        dicts = [pickled_user_dict(i) for i in range(1, 11)]
+        dicts[2]["age"] = 0
+        dicts[7]["age"] = "8"
+        del dicts[8]["date"]
+
+        dtos, errors = PickledUserDTO.parallel_from_dicts(iter(dicts), workers=2, chunksize=3)
+        expected_dtos, expected_errors = PickledUserDTO.from_dicts(dicts)
+        self.assertEqual(dtos, expected_dtos)
+        self.assertEqual([index for index, _ in errors], [2, 7, 8])
+        self.assertEqual([(index, type(error)) for index, error in errors],
+                         [(index, type(error)) for index, error in expected_errors])
+
+        # More chunks than the window of submitted chunks
+        dtos, errors = PickledUserDTO.parallel_from_dicts(dicts * 10, workers=1, chunksize=1)
+        self.assertEqual((len(dtos), len(errors)), (70, 30))
+
+        self.assertEqual(PickledUserDTO.parallel_from_dicts([], workers=1), ([], []))
+        with self.assertRaises(ValueError):
+            PickledUserDTO.parallel_from_dicts(dicts, chunksize=0)
 
+    def test_parallel_from_json_lines(self):
+        lines = [json.dumps(pickled_user_dict(i)) for i in range(1, 6)] + ["", "{", json.dumps({"age": 1})]
 
+        dtos, errors = PickledUserDTO.parallel_from_json_lines(lines, workers=2, chunksize=2)
+        self.assertEqual([dto.age for dto in dtos], [1, 2, 3, 4, 5])
+        self.assertEqual([index for index, _ in errors], [6, 7])
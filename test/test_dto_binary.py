@@ -0,0 +1,191 @@
+import array
+import collections
+import gc
+import io
+import json
+import weakref
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+from unittest import TestCase
+from typing import Optional, Dict, List, Union
+from pydto import DTO, DTOMeta
+from dto_binary import load_many
+from uuid import UUID
+
+
+class CarDTO(DTO):
+    model = str,
+    year = int,
+
+
+class UserDTO(DTO):
+    name = str,
+    age = int,
+    height = float,
+    active = bool,
+    birth = datetime,
+    nickname = Optional[str],
+    scores = List[float],
+    counts = List[int], {"array": True}
+    cars = List[CarDTO],
+    tags = Dict[str, int],
+    extra = dict,
+    value = Union[int, str, CarDTO],
+    z = complex,
+
+
+def user_dict(**changes):
+    user = {"name": "Jöhn", "age": -42, "height": 1.75, "active": True, "birth": datetime(1980, 1, 2, 3, 4, 5, 6),
+            "nickname": None, "scores": [1.5, -2.0], "counts": [1, 2 ** 40], "cars": [{"model": "A", "year": 2001}],
+            "tags": {"a": 1, "b": 2 ** 80}, "extra": {"k": [1, "x", None, 2.5, {"n": False}]}, "value": "v",
+            "z": 1 + 2j}
+    user.update(changes)
+    return user
+
+
+class Status(Enum):
+    ACTIVE = "active"
+    LEVEL = 2
+
+
+class CoercedDTO(DTO):
+    day = date, {"coerce": "iso_date"}
+    amount = Decimal, {"coerce": "decimal"}
+    id = UUID, {"coerce": "uuid"}
+    data = bytes, {"coerce": "base64"}
+    status = Status, {"coerce": "enum"}
+    maybe_day = Optional[date],
+    amounts = List[Decimal],
+    extra = dict,
+
+
+class TestDTOBinary(TestCase):
+    def test_round_trip(self):
+        for changes in [{}, {"nickname": "J", "value": 3}, {"value": {"model": "B", "year": 1}},
+                        {"birth": datetime(2020, 5, 6, 7, 8, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))},
+                        {"birth": datetime(1900, 1, 1), "scores": [], "cars": [], "tags": {}}]:
+            dto = UserDTO(user_dict(**changes))
+            data = dto.to_bytes()
+            self.assertIsInstance(data, bytes)
+            decoded = UserDTO.from_bytes(data)
+            self.assertEqual(decoded, dto)
+            self.assertEqual(decoded.to_dict(), dto.to_dict())
+            self.assertEqual(decoded.birth.utcoffset(), dto.birth.utcoffset())
+            self.assertEqual(decoded.counts, array.array('q', [1, 2 ** 40]))
+            self.assertIsInstance(decoded.value, type(dto.value))
+            with self.assertRaises(AttributeError):
+                decoded.name = "other"
+
+    def test_compact(self):
+        dtos = [CarDTO({"model": "A", "year": 2001}) for _ in range(10)]
+        stream = io.BytesIO()
+        CarDTO.dump_many(dtos, stream)
+        self.assertLess(len(stream.getvalue()), len(json.dumps([dto.to_dict() for dto in dtos])) / 3)
+
+    def test_partial_fields(self):
+        class PartialDTO(DTO, partial=True):
+            a = int,
+            b = Optional[str], {"immutable": False}
+
+        dto = PartialDTO.__new__(PartialDTO)
+        dto.b = "b"
+        self.assertEqual(PartialDTO.from_bytes(dto.to_bytes()).to_dict(), {"b": "b"})
+
+    def test_schema_mismatch(self):
+        data = UserDTO(user_dict()).to_bytes()
+
+        class OtherCarDTO(DTO):
+            model = str,
+            year = float,
+
+        with self.assertRaises(ValueError):
+            OtherCarDTO.from_bytes(CarDTO({"model": "A", "year": 1}).to_bytes())
+        with self.assertRaises(ValueError):
+            CarDTO.from_bytes(data)
+        with self.assertRaises(ValueError):
+            UserDTO.from_bytes(data[:-3])
+        with self.assertRaises(ValueError):
+            UserDTO.from_bytes(data + b'\x00')
+        with self.assertRaises(ValueError):
+            UserDTO.from_bytes(b'{"name": 1}')
+
+    def test_declaration_order(self):
+        # The wire order does not depend on the declaration order (class bodies are not ordered on Python 3.5)
+        first = DTOMeta("SameDTO", (DTO,), collections.OrderedDict([("b", (int,)), ("a", (str,))]))
+        second = DTOMeta("SameDTO", (DTO,), collections.OrderedDict([("a", (str,)), ("b", (int,))]))
+        data = first({"a": "x", "b": 2}).to_bytes()
+        self.assertEqual(data, second({"a": "x", "b": 2}).to_bytes())
+        self.assertEqual(second.from_bytes(data).to_dict(), {"a": "x", "b": 2})
+
+    def test_frozen_fields(self):
+        class SettingsDTO(DTO):
+            settings = Dict[str, int], {"frozen": True}
+            extra = dict, {"frozen": True}
+            options = Optional[Dict[str, str]], {"frozen": True}
+
+        for options in [{"o": "p"}, None]:
+            dto = SettingsDTO({"settings": {"a": 1}, "extra": {"k": [1, None]}, "options": options})
+            decoded = SettingsDTO.from_bytes(dto.to_bytes())
+            self.assertEqual(decoded, dto)
+            self.assertEqual(type(decoded.settings).__name__, "mappingproxy")
+            self.assertEqual(type(decoded.extra).__name__, "mappingproxy")
+            self.assertEqual(type(decoded.options).__name__, "mappingproxy" if options else "NoneType")
+
+    def test_coerced_types(self):
+        dto = CoercedDTO({"day": "2020-02-29", "amount": "-12.340", "id": "12345678-1234-5678-1234-567812345678",
+                          "data": "AAH/", "status": "active", "maybe_day": None, "amounts": [Decimal("1E+3")],
+                          "extra": {"d": date(1, 1, 1), "n": Decimal("0.1"), "u": UUID(int=1), "b": b""}})
+        for status in Status:
+            dto = dto.replace(status=status, maybe_day=date(9999, 12, 31))
+            decoded = CoercedDTO.from_bytes(dto.to_bytes())
+            self.assertEqual(decoded, dto)
+            self.assertIs(decoded.status, status)
+            self.assertEqual(str(decoded.amount), "-12.340")
+            self.assertEqual(decoded.data, b"\x00\x01\xff")
+            self.assertEqual(decoded.extra, dto.extra)
+
+        out = io.BytesIO()
+        CoercedDTO.dump_many([dto, dto], out)
+        out.seek(0)
+        self.assertEqual(list(load_many(CoercedDTO, out)), [dto, dto])
+
+    def test_codec_collected(self):
+        class TemporaryDTO(DTO):
+            car = CarDTO,
+
+        dto = TemporaryDTO({"car": {"model": "A", "year": 1}})
+        self.assertEqual(TemporaryDTO.from_bytes(dto.to_bytes()), dto)
+        self.assertIn('_dto_codec', TemporaryDTO.__dict__)
+        reference = weakref.ref(TemporaryDTO)
+        del TemporaryDTO, dto
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_unsupported_value(self):
+        with self.assertRaises(TypeError):
+            UserDTO(user_dict(extra={"k": {1, 2}})).to_bytes()
+
+    def test_dump_load_many(self):
+        dtos = [UserDTO(user_dict(age=i, name="n" * i)) for i in range(200)]
+        stream = io.BytesIO()
+        UserDTO.dump_many(dtos, stream)
+
+        for chunk_size in [1, 7, 65536]:
+            stream.seek(0)
+            self.assertEqual(list(load_many(UserDTO, stream, chunk_size)), dtos)
+
+        stream.seek(0)
+        self.assertEqual(list(UserDTO.load_many(stream)), dtos)
+
+        empty = io.BytesIO()
+        UserDTO.dump_many([], empty)
+        empty.seek(0)
+        self.assertEqual(list(UserDTO.load_many(empty)), [])
+
+        with self.assertRaises(ValueError):
+            list(UserDTO.load_many(io.BytesIO(stream.getvalue()[:-1])))
+        with self.assertRaises(ValueError):
+            list(CarDTO.load_many(io.BytesIO(stream.getvalue())))
+        with self.assertRaises(TypeError):
+            UserDTO.dump_many([CarDTO({"model": "A", "year": 1})], io.BytesIO())
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest import TestCase
+from typing import List, Optional
+import dto_cache
+from pydto import DTO
+
+
+def define(extra_field: bool = False):
+    class CachedDTO(DTO):
+        x = int,
+        y = Optional[List[str]],
+        if extra_field:
+            z = float,
+
+    return CachedDTO
+
+
+class TestDTOCache(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(dto_cache.disable)
+        self.directory = os.path.join(directory.name, "cache")
+        dto_cache.enable(self.directory)
+
+    def entries(self):
+        return sorted(name for name in os.listdir(self.directory))
+
+    def test_cache(self):
+        dto_class = define()
+        # __init__ and to_dict
+        entries = self.entries()
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(all(name.endswith('.bin') for name in entries))
+
+        dto = dto_class.from_dict({"x": 1, "y": ["a"]})
+        self.assertEqual(dto_class.from_bytes(dto.to_bytes()), dto)
+        self.assertEqual(len(self.entries()), 4)
+
+        # Same schema, the entries are loaded back
+        dto_class = define()
+        self.assertEqual(len(self.entries()), 4)
+        self.assertEqual(dto_class.from_dict({"x": 1, "y": None}).to_dict(), {"x": 1, "y": None})
+        with self.assertRaises(TypeError):
+            dto_class.from_dict({"x": "1", "y": None})
+
+        # Another schema
+        define(extra_field=True)
+        self.assertEqual(len(self.entries()), 6)
+
+        dto_cache.clear()
+        self.assertEqual(self.entries(), [])
+
+    def test_invalid_entries(self):
+        define()
+        for name in self.entries():
+            with open(os.path.join(self.directory, name), 'wb') as fileobj:
+                fileobj.write(b'invalid')
+        dto_class = define()
+        self.assertEqual(dto_class.from_dict({"x": 1, "y": None}).x, 1)
+
+    def test_disabled(self):
+        dto_cache.disable()
+        self.assertIsNone(dto_cache.get_directory())
+        define()
+        self.assertFalse(os.path.exists(self.directory))
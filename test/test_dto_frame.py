@@ -0,0 +1,99 @@
+import array
+from unittest import TestCase
+from typing import Optional, List
+from pydto import DTO
+from dto_frame import DTOFrame
+
+
+class PointDTO(DTO):
+    x = float,
+    y = float,
+
+
+class MeasureDTO(DTO):
+    name = str,
+    count = int, {"validator": lambda c: c >= 0}
+    ratio = Optional[float],
+    point = PointDTO,
+    tags = List[str],
+
+
+def measure_dict(i):
+    return {"name": "m{}".format(i), "count": i, "ratio": i / 2 if i % 2 else None,
+            "point": {"x": float(i), "y": -1.5}, "tags": ["t"] * (i % 3)}
+
+
+class TestDTOFrame(TestCase):
+    def test_from_dicts(self):
+        dicts = [measure_dict(i) for i in range(5)]
+        dicts.insert(2, dict(measure_dict(9), count=-1))
+        dicts.insert(4, dict(measure_dict(9), name=1))
+        frame, errors = DTOFrame.from_dicts(MeasureDTO, dicts)
+
+        self.assertEqual([index for index, _ in errors], [2, 4])
+        self.assertIsInstance(errors[0][1], ValueError)
+        self.assertIsInstance(errors[1][1], TypeError)
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(frame.to_dicts(), [measure_dict(i) for i in range(5)])
+        self.assertEqual(frame.to_dtos(), [MeasureDTO(measure_dict(i)) for i in range(5)])
+
+        # int columns are stored as arrays, nested DTOs are validated and constructed
+        self.assertEqual(frame.column("count"), array.array('q', range(5)))
+        self.assertIsInstance(frame.column("ratio"), list)
+        self.assertEqual(frame.column("point")[3], PointDTO({"x": 3.0, "y": -1.5}))
+        self.assertEqual(frame.fields, tuple(MeasureDTO._dto_descriptors))
+
+    def test_from_dtos(self):
+        dtos = [PointDTO({"x": float(i), "y": 0.5}) for i in range(4)]
+        frame = DTOFrame.from_dtos(PointDTO, dtos)
+        self.assertEqual(frame.column("x"), array.array('d', [0.0, 1.0, 2.0, 3.0]))
+        self.assertEqual(frame.to_dtos(), dtos)
+        with self.assertRaises(TypeError):
+            DTOFrame.from_dtos(PointDTO, [MeasureDTO(measure_dict(0))])
+
+    def test_rows(self):
+        frame, _ = DTOFrame.from_dicts(MeasureDTO, [measure_dict(i) for i in range(4)])
+        row = frame[1]
+        self.assertEqual(row.name, "m1")
+        self.assertEqual(row.point.x, 1.0)
+        self.assertEqual(row.to_dict(), measure_dict(1))
+        self.assertEqual(row.to_dto(), MeasureDTO(measure_dict(1)))
+        self.assertEqual(frame[-1].count, 3)
+        self.assertEqual([row.count for row in frame], [0, 1, 2, 3])
+        with self.assertRaises(IndexError):
+            frame[4]
+        with self.assertRaises(AttributeError):
+            row.count = 2
+        with self.assertRaises(AttributeError):
+            row.unknown
+
+        self.assertEqual(frame[1:3].to_dicts(), [measure_dict(1), measure_dict(2)])
+
+    def test_filter_select(self):
+        frame, _ = DTOFrame.from_dicts(MeasureDTO, [measure_dict(i) for i in range(6)])
+
+        odd = frame.filter(lambda row: row.count % 2)
+        self.assertEqual(odd.to_dicts(), [measure_dict(i) for i in (1, 3, 5)])
+        self.assertEqual(odd.column("count"), array.array('q', [1, 3, 5]))
+
+        big = frame.filter([count > 3 for count in frame.column("count")])
+        self.assertEqual([row.name for row in big], ["m4", "m5"])
+        with self.assertRaises(ValueError):
+            frame.filter([True])
+
+        names = frame.select(["name", "count"])
+        self.assertEqual(names[2].to_dict(), {"name": "m2", "count": 2})
+        self.assertEqual(names[2].to_dto().to_dict(), {"name": "m2", "count": 2})
+        with self.assertRaises(KeyError):
+            frame.select(["unknown"])
+
+    def test_column_storage(self):
+        class ValuesDTO(DTO):
+            i = int,
+            f = float,
+
+        frame, _ = DTOFrame.from_dicts(ValuesDTO, [{"i": True, "f": 1.0}, {"i": 2 ** 70, "f": 2.0}])
+        # bool and big ints do not fit in an array of ints
+        self.assertEqual(frame.column("i"), [True, 2 ** 70])
+        self.assertEqual(frame.column("f"), array.array('d', [1.0, 2.0]))
+        self.assertEqual(frame.to_dicts()[0], {"i": True, "f": 1.0})
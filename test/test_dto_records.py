@@ -0,0 +1,115 @@
+import gc
+import os
+import tempfile
+import weakref
+from datetime import datetime, timezone
+from unittest import TestCase
+from typing import Optional, List
+from pydto import DTO
+from dto_records import DTOView
+
+
+class PlaceDTO(DTO):
+    city = str, {"max_length": 16}
+    zip_code = Optional[int],
+
+
+class PersonDTO(DTO):
+    name = str, {"max_length": 8}
+    nickname = Optional[str], {"max_length": 4}
+    age = int,
+    height = float,
+    active = bool,
+    birth = datetime,
+    place = PlaceDTO,
+    previous_place = Optional[PlaceDTO],
+
+
+def person_dict(i):
+    return {"name": "pé{}".format(i), "nickname": None if i % 2 else "n", "age": i - 5, "height": i / 4,
+            "active": bool(i % 3), "birth": datetime(1990, 1, 1 + i % 28, 12, 30, 0, i),
+            "place": {"city": "city {}".format(i), "zip_code": i if i % 2 else None},
+            "previous_place": {"city": "old", "zip_code": 1} if i % 4 else None}
+
+
+class TestDTORecords(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "records.bin")
+
+    def test_round_trip(self):
+        dtos = [PersonDTO(person_dict(i)) for i in range(20)]
+        self.assertEqual(PersonDTO.write_records(iter(dtos), self.path), 20)
+
+        with PersonDTO.open_records(self.path) as records:
+            self.assertEqual(len(records), 20)
+            self.assertEqual(list(records), dtos)
+            self.assertEqual([record.to_dto() for record in records], dtos)
+
+            view = records[3]
+            self.assertIsInstance(view, DTOView)
+            self.assertEqual(view.name, "pé3")
+            self.assertIsNone(view.nickname)
+            self.assertEqual(view.age, -2)
+            self.assertEqual(view.birth, datetime(1990, 1, 4, 12, 30, 0, 3))
+            self.assertEqual(view.place.city, "city 3")
+            self.assertEqual(view.previous_place.zip_code, 1)
+            self.assertEqual(view.to_dict(), PersonDTO(person_dict(3)).to_dict())
+            self.assertEqual(records[-1].age, 14)
+            with self.assertRaises(IndexError):
+                records[20]
+            with self.assertRaises(AttributeError):
+                view.age = 1
+
+    def test_empty(self):
+        PersonDTO.write_records([], self.path)
+        with PersonDTO.open_records(self.path) as records:
+            self.assertEqual(list(records), [])
+
+    def test_invalid_values(self):
+        with self.assertRaises(ValueError):
+            PersonDTO.write_records([PersonDTO(dict(person_dict(1), name="too long name"))], self.path)
+        with self.assertRaises(ValueError):
+            PersonDTO.write_records([PersonDTO(dict(person_dict(1), age=2 ** 64))], self.path)
+        with self.assertRaises(ValueError):
+            PersonDTO.write_records([PersonDTO(dict(person_dict(1), birth=datetime.now(timezone.utc)))], self.path)
+        with self.assertRaises(TypeError):
+            PersonDTO.write_records([PlaceDTO({"city": "c", "zip_code": None})], self.path)
+
+    def test_layout_collected(self):
+        class TemporaryDTO(DTO):
+            place = PlaceDTO,
+
+        TemporaryDTO.write_records([TemporaryDTO({"place": {"city": "c", "zip_code": 1}})], self.path)
+        with TemporaryDTO.open_records(self.path) as records:
+            self.assertEqual(records[0].place.city, "c")
+        self.assertIn('_dto_layout', TemporaryDTO.__dict__)
+        reference = weakref.ref(TemporaryDTO)
+        del TemporaryDTO, records
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_schema(self):
+        PlaceDTO.write_records([PlaceDTO({"city": "c", "zip_code": None})], self.path)
+        with self.assertRaises(ValueError):
+            PersonDTO.open_records(self.path)
+
+        with open(self.path, 'r+b') as fileobj:
+            fileobj.truncate(30)
+        with self.assertRaises(ValueError):
+            PlaceDTO.open_records(self.path)
+
+        class ListDTO(DTO):
+            values = List[int],
+
+        class TextDTO(DTO):
+            text = str,
+
+        for dto_class in [ListDTO, TextDTO]:
+            with self.assertRaises(TypeError):
+                dto_class.write_records([], self.path)
+
+        with self.assertRaises(ValueError):
+            class InvalidDTO(DTO):
+                text = str, {"max_length": 0}
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from typing import Optional, List
+from unittest import TestCase
+from pydto import DTO
+import json_backend
+
+
+class TestJSONBackend(TestCase):
+    def setUp(self):
+        self.backend = json_backend.get_backend()
+
+    def tearDown(self):
+        json_backend.set_backend(self.backend.name)
+        json_backend._backends.pop("test", None)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            json_backend.set_backend("unknown")
+
+    def test_to_json(self):
+        class AddressDTO(DTO):
+            city = str,
+
+        class UserDTO(DTO):
+            name = str,
+            birth_date = datetime, {"coerce": lambda value: datetime.strptime(value, '%Y-%m-%d')}
+            address = AddressDTO,
+            tags = List[str],
+            salary = Optional[float],
+
+        json_string = '{"name": "dwight", "birth_date": "1974-01-20", "address": {"city": "scranton"}, ' \
+                      '"tags": ["sales"], "salary": null}'
+
+        for name in json_backend._backends:
+            json_backend.set_backend(name)
+
+            user_dto = UserDTO.from_json(json_string)
+
+            self.assertEqual(json.loads(user_dto.to_json()),
+                             {"name": "dwight", "birth_date": "1974-01-20T00:00:00", "address": {"city": "scranton"},
+                              "tags": ["sales"], "salary": None})
+
+    def test_wide_integers(self):
+        class IntDTO(DTO):
+            x = int,
+            values = List[int],
+
+        for name in json_backend._backends:
+            json_backend.set_backend(name)
+
+            for x in [2 ** 64, -2 ** 63 - 1, 10 ** 30, 2 ** 63 - 1, -5]:
+                int_dto = IntDTO.from_json('{{"x": {}, "values": [{}, 1]}}'.format(x, -x))
+                self.assertEqual((int_dto.x, int_dto.values), (x, [-x, 1]))
+                self.assertEqual(json.loads(int_dto.to_json()), {"x": x, "values": [-x, 1]})
+            self.assertEqual(json_backend.loads(b'[12345678901234567890123]'), [12345678901234567890123])
+
+    def test_register_backend(self):
+        calls = []
+
+        def loads(json_string):
+            calls.append(json_string)
+            return json.loads(json_string)
+
+        json_backend.register_backend("test", loads, lambda obj, default: json.dumps(obj, default=default))
+        json_backend.set_backend("test")
+
+        class SimpleDTO(DTO):
+            age = int,
+
+        self.assertEqual(SimpleDTO.from_json('{"age": 1}').to_json(), '{"age": 1}')
+        self.assertEqual(calls, ['{"age": 1}'])
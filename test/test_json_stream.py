@@ -0,0 +1,147 @@
+import asyncio
+import concurrent.futures
+import io
+import json
+from unittest import TestCase
+from pydto import DTO
+from json_stream import iter_json_values, AsyncLines
+
+
+# Defined at the top level to be validated in a process pool
+class AsyncDTO(DTO):
+    age = int, {"validator": lambda x: x >= 0}
+
+
+class _Chunks:
+    """Async iterable of byte chunks, recording how many chunks were read."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.count = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.count += 1
+        return chunk
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _collect(iterator):
+    results = []
+    while True:
+        try:
+            results.append(await iterator.__anext__())
+        except StopAsyncIteration:
+            return results
+        except (TypeError, ValueError) as e:
+            # JSON backends raise their own ValueError subclasses
+            results.append(ValueError if isinstance(e, ValueError) else TypeError)
+
+
+class TestJSONStream(TestCase):
+    def test_iter_json_values_array(self):
+        values = [{"a": 1, "b": [1.5, "x"]}, 12345, "string with ] and ,", None, [], {}]
+        text = json.dumps(values)
+
+        for chunk_size in [1, 2, 7, 65536]:
+            self.assertEqual(list(iter_json_values(io.StringIO(text), chunk_size)), values)
+            self.assertEqual(list(iter_json_values(io.BytesIO(text.encode()), chunk_size)), values)
+
+        self.assertEqual(list(iter_json_values(io.StringIO(" [ ] "))), [])
+
+    def test_iter_json_values_lines(self):
+        values = [{"a": 1}, {"b": "été"}, 12345]
+        text = "\n".join(json.dumps(value) for value in values) + "\n\n"
+
+        for chunk_size in [1, 3, 65536]:
+            self.assertEqual(list(iter_json_values(io.BytesIO(text.encode()), chunk_size)), values)
+
+    def test_iter_json_values_short_reads(self):
+        class OneByteReader:
+            def __init__(self, data):
+                self.data = io.BytesIO(data)
+
+            def read(self, size):
+                return self.data.read(1)
+
+        values = ["é", {"x€y": ["😀"]}, 1.5e-3, True, None]
+        self.assertEqual(list(iter_json_values(OneByteReader(json.dumps(values, ensure_ascii=False).encode()))),
+                         values)
+        self.assertEqual(list(iter_json_values(io.BytesIO('["é"]'.encode()), chunk_size=1)), ["é"])
+
+    def test_iter_json_values_malformed_stops_reading(self):
+        text = '[{"a": x}, ' + ', '.join(['{"b": 1}'] * 10000) + ']'
+        fileobj = io.StringIO(text)
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_values(fileobj, 100))
+        self.assertLess(fileobj.tell(), 1000)
+
+    def test_iter_json_values_invalid(self):
+        for text in ['[{"a": 1}', '[{"a": 1} {"a": 2}]', '{"a": ', '[1] 2']:
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_values(io.StringIO(text), 2))
+
+    def test_dto_iter_json(self):
+        class SimpleDTO(DTO):
+            age = int,
+
+        text = '[{"age": 1}, {"age": 2}, {"age": "3"}]'
+        dtos = SimpleDTO.iter_json(io.StringIO(text), chunk_size=4)
+
+        self.assertEqual(next(dtos).age, 1)
+        self.assertEqual(next(dtos).age, 2)
+        with self.assertRaises(TypeError):
+            next(dtos)
+
+    def test_async_lines(self):
+        text = b'{"a": 1}\n\n{"b": "\xc3\xa9"}\n{"c": 3}'
+        for chunk_size in [1, 4, 100]:
+            chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+            self.assertEqual(_run(_collect(AsyncLines(_Chunks(chunks)))), [b'{"a": 1}\n', b'\n', b'{"b": "\xc3\xa9"}\n',
+                                                                             b'{"c": 3}'])
+
+        async def read_stream():
+            reader = asyncio.StreamReader()
+            reader.feed_data(text)
+            reader.feed_eof()
+            return await _collect(AsyncLines(reader, chunk_size=3))
+
+        self.assertEqual(len(_run(read_stream())), 4)
+
+    def test_dto_aiter_json_lines(self):
+        lines = b'{"age": 1}\n\n{"age": -1}\n{"age": "2"}\n{"age": \n{"age": 3}\n'
+        chunks = [lines[i:i + 5] for i in range(0, len(lines), 5)]
+
+        async def read(executor=None):
+            results = await _collect(AsyncDTO.aiter_json_lines(_Chunks(chunks), executor=executor, batch_size=2))
+            return [result.age if isinstance(result, DTO) else result for result in results]
+
+        expected = [1, ValueError, TypeError, ValueError, 3]
+        self.assertEqual(_run(read()), expected)
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            self.assertEqual(_run(read(executor)), expected)
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            self.assertEqual(_run(read(executor)), expected)
+
+    def test_dto_aiter_json_lines_backpressure(self):
+        source = _Chunks(['{{"age": {}}}\n'.format(i).encode() for i in range(100)])
+
+        async def read_two():
+            dtos = AsyncDTO.aiter_json_lines(source)
+            return [(await dtos.__anext__()).age, (await dtos.__anext__()).age]
+
+        self.assertEqual(_run(read_two()), [0, 1])
+        self.assertEqual(source.count, 2)
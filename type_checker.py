@@ -1,117 +1,396 @@
+import array
 import datetime
-from typing import Union, Dict, List
+import decimal
+import dto_errors
+import enum
+import types
+import uuid
+from itertools import islice
+from typing import Union, Dict, List, TypeVar
 import pydto
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-def _raise_value_not_valid_type(dto_descriptor, value):
-    raise TypeError("Value '{}' is not of type '{}' (field '{}' of DTO class '{}')".format(value,
-                                                                                           dto_descriptor._type,
-                                                                                           dto_descriptor._field,
-                                                                                           dto_descriptor._dto_class_name))
+_BUILTIN_TYPES = (str, float, int, bool, complex, dict, list, datetime.datetime, datetime.date, decimal.Decimal,
+                  uuid.UUID, bytes)
 
+# Returned by compiled checkers when a value does not match their type
+_INVALID = object()
 
-def _check_type_dto_descriptor(dto_descriptor, value):
-    try:
-        inferred_type = _check_type(dto_descriptor._type, value)
-        return inferred_type
-    except TypeError:
-        _raise_value_not_valid_type(dto_descriptor, value)
+# Item types of the List fields that can be stored as arrays
+_ARRAY_TYPECODES = {int: 'q', float: 'd'}
+_ARRAY_TYPES = (array.array,) if numpy is None else (array.array, numpy.ndarray)
 
 
-def _check_type(type_, value):
-    if type(type_) is Union.__class__:
-        return _check_type_Union(type_, value)
+def _value_not_valid_type(dto_descriptor, value):
+    # The message is formatted by the exception only if it is printed
+    return dto_errors.InvalidTypeError(dto_errors.FieldError(dto_errors.TYPE, dto_descriptor._field,
+                                                             dto_descriptor._type, value,
+                                                             dto_descriptor._dto_class_name))
 
-    elif type_ in [str, float, int, bool, complex, dict, list, datetime.datetime]:
-        if not isinstance(value, type_):
-            raise TypeError
-        return type_
 
-    elif isinstance(type_, pydto.DTO):
-        if not isinstance(value, type_):
-            raise TypeError
-        return type_
+def _raise_value_not_valid_type(dto_descriptor, value):
+    raise _value_not_valid_type(dto_descriptor, value)
 
-    elif issubclass(type_, Dict):
-        return _check_type_Dict(type_, value)
 
-    elif issubclass(type_, List):
-        return _check_type_List(type_, value)
+def _is_union(type_):
+    if type(type_) is Union.__class__:
+        # Python 3.5/3.6
+        return type_ is not Union
+    return getattr(type_, '__origin__', None) is Union
 
-    elif issubclass(type_, None.__class__):
-        return _check_type_None(type_, value)
 
+def _union_args(type_):
+    if hasattr(type_, '__args__'):
+        # Python 3.6+
+        return type_.__args__
     else:
-        raise NotImplementedError("Type checker for type {} is not implemented".format(type_))
+        # Python 3.5
+        return type_.__union_params__
 
 
-def _check_type_None(type_, value):
-    if value is not None:
-        raise TypeError
-    return type_
+def _is_generic(type_, generic, builtin):
+    origin = getattr(type_, '__origin__', None)
+    if origin is not None:
+        # Python 3.7+ uses the builtin as origin, Python 3.6 the generic itself
+        return origin is builtin or origin is generic
+    return isinstance(type_, type) and issubclass(type_, generic)
 
 
-def _check_type_Union(type_, value):
-    if hasattr(type_, '__args__'):
-        # Python 3.6+
-        union_args = type_.__args__
-    else:
+def _generic_args(type_):
+    args = getattr(type_, '__args__', None)
+    if args is None:
         # Python 3.5
-        union_args = type_.__union_params__
+        args = getattr(type_, '__parameters__', None)
+    if not args or any(isinstance(arg, TypeVar) for arg in args):
+        return None
+    return args
 
-    matched_types = []
-    for arg in union_args:
-        try:
-            arg = _check_type(arg, value)
-        except TypeError:
-            pass
-        else:
-            matched_types.append(arg)
 
-    if not matched_types:
-        raise TypeError
+def _is_enum(type_):
+    return isinstance(type_, enum.EnumMeta)
 
-    assert len(
-        matched_types) == 1, "Value {} matches multiple subtype of type {}".format(value, type_)
 
-    return _check_type(matched_types[0], value)
+def _contains_dto(type_):
+    """Returns whether values of ``type_`` may hold nested DTOs (and so need to be materialized)."""
+    if isinstance(type_, pydto.DTOMeta):
+        return True
+    if _is_union(type_):
+        return any(_contains_dto(arg) for arg in _union_args(type_))
+    if _is_generic(type_, Dict, dict) or _is_generic(type_, List, list):
+        return any(_contains_dto(arg) for arg in _generic_args(type_) or ())
+    return False
 
 
-def _check_type_Dict(type_, value):
-    if not isinstance(value, dict):
-        raise TypeError
+def _compile_type(type_, construct: bool = True, level: str = "full", max_items: int = None):
+    """
+    Compiles a declared field type into a specialized checker closure. The dispatch on the kind of type is done once
+    here, the returned checker takes a value and returns it if it matches the type or ``_INVALID`` otherwise.
 
-    key_value_types = getattr(type_, "__args__", type_.__parameters__)
+    With ``construct`` the dictionaries found for nested DTO types are materialized into DTO instances and the
+    checker returns the converted value, otherwise they are only validated.
 
-    if key_value_types is not None:
-        key_type, value_type = key_value_types
+    :param level: validation level of the nested DTOs ("full", "types" or "trusted"), with "trusted" the values are
+    not checked and only nested DTOs are materialized
+    :param max_items: only check the first ``max_items`` items of ``List`` and ``Dict`` values
+    """
+    if level == "trusted" and not (construct and _contains_dto(type_)):
+        return _trusted
 
-        for k, v in value.items():
-            _ = _check_type(key_type, v)
-            _ = _check_type(value_type, k)
+    if _is_union(type_):
+        return _compile_Union(type_, construct, level, max_items)
 
-        return type_
+    elif type_ in _BUILTIN_TYPES or _is_enum(type_):
+        return _compile_instance(type_)
+
+    elif isinstance(type_, pydto.DTOMeta):
+        return _compile_DTO(type_, construct, level)
+
+    elif _is_generic(type_, Dict, dict):
+        return _compile_Dict(type_, construct, level, max_items)
+
+    elif _is_generic(type_, List, list):
+        return _compile_List(type_, construct, level, max_items)
+
+    elif type_ is None.__class__:
+        return _check_None
 
     else:
-        return type_
+        raise NotImplementedError("Type checker for type {} is not implemented".format(type_))
+
+
+def _trusted(value):
+    return value
 
 
-def _check_type_List(type_, value):
-    if not isinstance(value, list):
-        raise TypeError
+def _check_None(value):
+    if value is not None:
+        return _INVALID
+    return value
+
+
+def _compile_instance(type_):
+    def check(value):
+        if not isinstance(value, type_):
+            return _INVALID
+        return value
 
-    value_type = getattr(type_, "__args__", type_.__parameters__)
-    if value_type is not None:
-        value_type = value_type[0]
+    return check
 
-    if value_type is not None:
-        # If a list has a subtype but the list is empty should it be treated as type error?!
-        # if len(value) == 0:
-        #     raise TypeError
-        for v in value:
-            _ = _check_type(value_type, v)
 
-        return type_
+def _compile_DTO(dto_class, construct, level):
+    instance_check = type.__instancecheck__
 
+    def check(value):
+        if instance_check(dto_class, value):
+            return value
+        if not isinstance(value, dict):
+            return _INVALID
+        if not construct:
+            return value if dto_class._dto_validate(value, level) else _INVALID
+        try:
+            return dto_class.from_dict(value, validate=level)
+        except (TypeError, ValueError, AssertionError):
+            return _INVALID
+
+    return check
+
+
+def _compile_Union(type_, construct, level, max_items):
+    """
+    Compiles a Union into a dispatch table keyed by the concrete type of the values. Values of builtin member types
+    are accepted by a single lookup, DTO and generic members get their checker. Members competing for the same
+    concrete type (e.g. two DTOs for dictionaries) are tried in declaration order, members that would always be
+    ambiguous (e.g. ``dict`` and a DTO) are rejected here, once, instead of per value.
+    """
+    if level == "trusted":
+        # The member matching the value still has to be found to materialize it
+        level = "types"
+
+    dispatch = {}
+    member_checkers = []
+    for arg in _union_args(type_):
+        member_checker = _compile_type(arg, construct, level, max_items)
+        member_checkers.append(member_checker)
+        for concrete_type, checker in _union_member_dispatch(arg, member_checker):
+            if concrete_type not in dispatch:
+                dispatch[concrete_type] = checker
+            elif checker is None or dispatch[concrete_type] is None:
+                raise TypeError("Union type {} is ambiguous, several of its types accept '{}' values".format(
+                    type_, concrete_type.__name__))
+            else:
+                dispatch[concrete_type] = _first_match(dispatch[concrete_type], checker)
+
+    missing = object()
+
+    def check(value):
+        checker = dispatch.get(value.__class__, missing)
+        if checker is None:
+            return value
+        if checker is not missing:
+            return checker(value)
+        # Instances of subclasses of the member types
+        for member_checker in member_checkers:
+            result = member_checker(value)
+            if result is not _INVALID:
+                return result
+        return _INVALID
+
+    return check
+
+
+def _union_member_dispatch(type_, checker):
+    """Returns the (concrete type, checker) entries of a Union member, None as checker accepts the values as is."""
+    if type_ in _BUILTIN_TYPES or type_ is None.__class__ or _is_enum(type_):
+        return [(type_, None)]
+    elif isinstance(type_, pydto.DTOMeta):
+        return [(type_, None), (dict, checker)]
+    elif _is_generic(type_, Dict, dict):
+        return [(dict, None if _generic_args(type_) is None else checker)]
+    elif _is_generic(type_, List, list):
+        return [(list, None if _generic_args(type_) is None else checker)]
+    raise NotImplementedError("Type checker for type {} is not implemented".format(type_))
+
+
+def _first_match(first_checker, second_checker):
+    def check(value):
+        result = first_checker(value)
+        if result is _INVALID:
+            return second_checker(value)
+        return result
+
+    return check
+
+
+def _exact_types(type_):
+    """
+    Returns the set of the classes of the values of ``type_`` when it is a builtin type, an Enum, None or a Union of
+    them, so that values can be checked by a scan of their classes. Returns None for other types.
+    """
+    if type_ in _BUILTIN_TYPES or type_ is None.__class__ or _is_enum(type_):
+        return frozenset((type_,))
+    if _is_union(type_):
+        args = [_exact_types(arg) for arg in _union_args(type_)]
+        if None not in args:
+            return frozenset().union(*args)
+    return None
+
+
+def _compile_Dict(type_, construct, level, max_items):
+    key_value_types = _generic_args(type_)
+    if key_value_types is None:
+        return _compile_instance(dict)
+
+    key_checker, value_checker = [_compile_type(arg, construct, level, max_items) for arg in key_value_types]
+    key_types, value_types = [_exact_types(arg) for arg in key_value_types]
+
+    if construct and _contains_dto(type_):
+        def check(value):
+            if not isinstance(value, dict):
+                return _INVALID
+            converted = {}
+            for k, v in value.items():
+                k, v = key_checker(k), value_checker(v)
+                if k is _INVALID or v is _INVALID:
+                    return _INVALID
+                converted[k] = v
+            return converted
+
+        return check
+
+    if key_types is None and value_types is None:
+        def check(value):
+            if not isinstance(value, dict):
+                return _INVALID
+            for k, v in islice(value.items(), max_items):
+                if key_checker(k) is _INVALID or value_checker(v) is _INVALID:
+                    return _INVALID
+            return value
+
+        return check
+
+    def check_scanned(value):
+        # The classes of the keys and of the values of maps of builtin types are checked by scans running in C, the
+        # items are only checked one by one on the side whose scan found other classes (e.g. bool for int)
+        if not isinstance(value, dict):
+            return _INVALID
+        keys_valid = key_types is not None and key_types.issuperset(map(type, islice(value, max_items)))
+        values_valid = value_types is not None and \
+            value_types.issuperset(map(type, islice(value.values(), max_items)))
+        if keys_valid and values_valid:
+            return value
+        for k, v in islice(value.items(), max_items):
+            if not keys_valid and key_checker(k) is _INVALID or not values_valid and value_checker(v) is _INVALID:
+                return _INVALID
+        return value
+
+    return check_scanned
+
+
+def _compile_frozen(checker, construct=True):
+    """
+    Wraps the checker of a ``Dict`` (or ``Optional`` one) field stored frozen: the validated dictionary is copied (unless the checker
+    already built a new one) and stored as a read-only ``MappingProxyType``, which the DTO can hand out without
+    defensive copies. Mapping proxies are accepted as values and copied (only checked without ``construct``).
+    """
+    if not construct:
+        return lambda value: checker(dict(value) if value.__class__ is types.MappingProxyType else value)
+
+    def check_frozen(value):
+        copied = value.__class__ is types.MappingProxyType
+        checked = checker(dict(value) if copied else value)
+        if checked is _INVALID or checked is None:
+            return checked
+        return types.MappingProxyType(checked if copied or checked is not value else dict(checked))
+
+    return check_frozen
+
+
+def _compile_List(type_, construct, level, max_items):
+    value_type = _generic_args(type_)
+    if value_type is None:
+        return _compile_instance(list)
+
+    item_checker = _compile_type(value_type[0], construct, level, max_items)
+
+    if construct and _contains_dto(type_):
+        def check(value):
+            if not isinstance(value, list):
+                return _INVALID
+            converted = []
+            for v in value:
+                v = item_checker(v)
+                if v is _INVALID:
+                    return _INVALID
+                converted.append(v)
+            return converted
+
+        return check
+
+    def check(value):
+        if not isinstance(value, list):
+            return _INVALID
+        for v in islice(value, max_items):
+            if item_checker(v) is _INVALID:
+                return _INVALID
+        return value
+
+    return check
+
+
+def _array_item_type(type_):
+    """Returns the item type of ``List[int]`` / ``List[float]``, the List types that can be stored as arrays."""
+    if _is_generic(type_, List, list):
+        args = _generic_args(type_)
+        if args is not None and args[0] in _ARRAY_TYPECODES:
+            return args[0]
+    return None
+
+
+def _compile_array(type_, storage, check: bool = True):
+    """
+    Compiles a checker for a ``List[int]`` / ``List[float]`` field stored as an ``array.array`` (or a NumPy array with
+    ``storage="numpy"``). Lists are validated with a single scan of their item types and converted, arrays of the
+    right type are accepted as they are.
+    """
+    item_type = _array_item_type(type_)
+    item_types = {item_type}
+    typecode = _ARRAY_TYPECODES[item_type]
+    # Integer array.array reject any non integer item themselves, float arrays and NumPy would convert them
+    scan = check and (item_type is float or storage == "numpy")
+
+    if storage == "numpy":
+        dtype = numpy.dtype(typecode)
+
+        def is_array(value):
+            return value.__class__ is numpy.ndarray and value.dtype == dtype
+
+        def to_array(value):
+            return numpy.array(value, dtype=dtype)
     else:
-        return type_
+        def is_array(value):
+            return value.__class__ is array.array and value.typecode == typecode
+
+        def to_array(value):
+            return array.array(typecode, value)
+
+    def check_array(value):
+        if is_array(value):
+            return value
+        if not isinstance(value, list):
+            return _INVALID
+        if scan and not item_types.issuperset(map(type, value)):
+            # Subclasses of the item type (e.g. bool for int)
+            for v in value:
+                if not isinstance(v, item_type):
+                    return _INVALID
+        try:
+            # Ints that do not fit in 64 bits raise OverflowError
+            return to_array(value)
+        except (TypeError, ValueError, OverflowError):
+            return _INVALID
+
+    return check_array